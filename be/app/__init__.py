@@ -1,9 +1,12 @@
 from flask import Flask
 from config.settings import ActiveConfig
 from app.database import init_db, mongo, db # MySQL 초기화
+from app.database.indexes import init_indexes
 from app.models import init_models 
 from app.routes import register_routes 
 from app.utils.error_handler import register_error_handlers  
+from app.utils.metrics import init_metrics
+from app.cli import register_commands
 from flask_swagger_ui import get_swaggerui_blueprint
 from flask_cors import CORS  
 from flask_mail import Mail
@@ -25,6 +28,9 @@ def create_app():
     # MongoDB와 MySQL 초기화
     init_db(app)
 
+    # MongoDB 인덱스 생성 (MONGO_ENSURE_INDEXES)
+    init_indexes(app)
+
     # CORS 활성화
     CORS(app)
 
@@ -40,6 +46,12 @@ def create_app():
     # 에러 핸들러 등록
     register_error_handlers(app)
 
+    # 요청별 구간 측정 및 느린 요청 로그
+    init_metrics(app)
+
+    # 운영용 CLI 명령 등록 (flask chat ..., flask diary ..., flask mongo ...)
+    register_commands(app)
+
     # Flask-Mail 초기화
     mail.init_app(app)
 
@@ -0,0 +1,305 @@
+"""
+# ASGI 앱 (비동기 채팅/일기 요약 경로)
+
+LLM 대기 시간이 긴 엔드포인트만 이벤트 루프에서 처리하는 Starlette 앱
+요청/응답 형식과 상태 코드는 Flask 뷰(chat_routes, diary_routes)와 동일
+
+실행: uvicorn asgi:app --host 0.0.0.0 --port 5001 --workers 4
+"""
+
+import json
+import logging
+from datetime import datetime
+from functools import wraps
+
+import jwt
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.responses import JSONResponse, StreamingResponse
+from starlette.routing import Route
+
+from config.settings import ActiveConfig
+from app.async_app.services import AsyncServices
+from app.services.chat_service import KST, modify_response_with_emotion
+
+
+def extract_user_id(request):
+    """Authorization 헤더의 JWT에서 사용자 ID 추출 (app.utils.auth.extract_jwt_token과 동일한 규칙)"""
+    token = request.headers.get("Authorization")
+    if not token:
+        return None, "JWT 토큰이 필요합니다."
+
+    if token.startswith("Bearer "):
+        token = token[len("Bearer "):]
+
+    try:
+        decoded_token = jwt.decode(token, ActiveConfig.SECRET_KEY, algorithms=["HS256"])
+    except jwt.ExpiredSignatureError:
+        return None, "토큰이 만료되었습니다."
+    except jwt.InvalidTokenError:
+        return None, "유효하지 않은 토큰입니다."
+
+    user_id = decoded_token.get("sub")
+    if not user_id:
+        return None, "유효하지 않은 토큰: 'sub' 필드가 없음."
+    return user_id, None
+
+
+def jwt_required(f):
+    @wraps(f)
+    async def decorated_function(request):
+        user_id, error = extract_user_id(request)
+        if error:
+            return JSONResponse({"error": error}, status_code=401)
+        request.state.user_id = user_id
+        return await f(request)
+
+    return decorated_function
+
+
+async def read_json(request):
+    try:
+        return await request.json()
+    except Exception:
+        return None
+
+
+def sse_event(event, data):
+    """Server-Sent Events 메시지 포맷"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+def parse_chat_request(data):
+    """
+    emotion-chat 요청 본문 검증
+
+    :return: (chatroom_id, user_message, emotion_id, conversation_end), 오류 시 JSONResponse
+    """
+    if not data:
+        logging.error("전달된 JSON 데이터가 없습니다.")
+        return None, JSONResponse({"error": "JSON 데이터를 전달해야 합니다."}, status_code=400)
+
+    chatroom_id = data.get("chatroom_id")
+    user_message = data.get("user_message", "")
+    emotion_id = data.get("emotion_id", None)
+    conversation_end = data.get("conversation_end", False)
+
+    if not chatroom_id:
+        logging.error("chatroom_id가 누락되었습니다.")
+        return None, JSONResponse({"error": "chatroom_id가 누락되었습니다."}, status_code=400)
+    if user_message is None:
+        logging.error("user_message가 누락되었습니다.")
+        return None, JSONResponse({"error": "user_message가 누락되었습니다."}, status_code=400)
+
+    return (chatroom_id, user_message, emotion_id, conversation_end), None
+
+
+# --- 채팅 ---
+
+
+@jwt_required
+async def chat_with_emotion(request):
+    services = request.app.state.services
+    try:
+        user_id = request.state.user_id
+        parsed, error = parse_chat_request(await read_json(request))
+        if error:
+            return error
+        chatroom_id, user_message, emotion_id, conversation_end = parsed
+
+        # 감정만 바뀐 빈 메시지 턴은 미리 만든 첫마디로 응답 (LLM 호출 생략)
+        opener = await services.get_emotion_opener(user_id, chatroom_id, user_message)
+
+        emotion_label, confidence, user_message = await services.resolve_message_emotion(
+            user_id, chatroom_id, emotion_id, user_message
+        )
+
+        bot_response = opener or await services.generate_response(
+            user_id, chatroom_id, user_message
+        )
+
+        # 감정 반영된 응답 처리 (신뢰도가 0.7 이상인 경우)
+        if emotion_label and confidence >= 0.7:
+            bot_response = modify_response_with_emotion(bot_response, emotion_label, confidence)
+
+        await services.add_chat(
+            user_id=user_id,
+            chatroom_id=chatroom_id,
+            user_message=user_message,
+            bot_response=bot_response,
+            emotion_id=emotion_id,
+            confidence=confidence,
+            conversation_end=conversation_end,
+        )
+
+        return JSONResponse(
+            {
+                "message": "대화가 저장되었습니다.",
+                "bot_response": bot_response,
+                "emotion": emotion_label,
+                "confidence": confidence,
+                "emotion_id": emotion_id,
+            },
+            status_code=201,
+        )
+    except Exception as e:
+        logging.error(f"서버 오류: {e}")
+        return JSONResponse({"error": f"서버 내부 오류: {str(e)}"}, status_code=500)
+
+
+@jwt_required
+async def chat_with_emotion_stream(request):
+    """감정 기반 챗봇 응답 스트리밍 (이벤트 형식은 Flask /chat/emotion-chat/stream과 동일)"""
+    services = request.app.state.services
+    user_id = request.state.user_id
+    parsed, error = parse_chat_request(await read_json(request))
+    if error:
+        return error
+    chatroom_id, user_message, emotion_id, conversation_end = parsed
+
+    opener = await services.get_emotion_opener(user_id, chatroom_id, user_message)
+
+    emotion_label, confidence, user_message = await services.resolve_message_emotion(
+        user_id, chatroom_id, emotion_id, user_message
+    )
+
+    async def generate():
+        try:
+            prefix = ""
+            if emotion_label and confidence >= 0.7:
+                prefix = modify_response_with_emotion("", emotion_label, confidence)
+            if prefix:
+                yield sse_event("token", {"text": prefix})
+
+            parts = []
+            if opener:
+                parts.append(opener)
+                yield sse_event("token", {"text": opener})
+            else:
+                async for text in services.generate_response_stream(
+                    user_id, chatroom_id, user_message
+                ):
+                    parts.append(text)
+                    yield sse_event("token", {"text": text})
+
+            bot_response = prefix + "".join(parts)
+
+            await services.add_chat(
+                user_id=user_id,
+                chatroom_id=chatroom_id,
+                user_message=user_message,
+                bot_response=bot_response,
+                emotion_id=emotion_id,
+                confidence=confidence,
+                conversation_end=conversation_end,
+            )
+
+            yield sse_event("done", {
+                "message": "대화가 저장되었습니다.",
+                "bot_response": bot_response,
+                "emotion": emotion_label,
+                "confidence": confidence,
+                "emotion_id": emotion_id,
+            })
+        except Exception as e:
+            logging.error(f"스트리밍 응답 중 오류: {e}")
+            yield sse_event("error", {"error": f"서버 내부 오류: {str(e)}"})
+
+    return StreamingResponse(
+        generate(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+# --- 일기 요약 ---
+
+
+@jwt_required
+async def summarize_conversation(request):
+    services = request.app.state.services
+    try:
+        data = await read_json(request) or {}
+        chatroom_id = data.get("chatroom_id")
+        if not chatroom_id:
+            return JSONResponse({"error": "chatroom_id가 필요합니다."}, status_code=400)
+
+        summary = await services.generate_summary(chatroom_id)
+        if isinstance(summary, tuple):
+            return JSONResponse({"error": summary[0]}, status_code=summary[1])
+
+        return JSONResponse({"summary": summary}, status_code=200)
+    except Exception as e:
+        logging.error(f"[ERROR] /summary: {e}")
+        return JSONResponse({"error": f"오류 발생: {str(e)}"}, status_code=500)
+
+
+@jwt_required
+async def summarize_and_save_diary(request):
+    services = request.app.state.services
+    try:
+        user_id = request.state.user_id
+        data = await read_json(request) or {}
+        chatroom_id = data.get("chatroom_id")
+        if not chatroom_id:
+            return JSONResponse({"error": "chatroom_id가 필요합니다."}, status_code=400)
+
+        summary = await services.generate_summary(chatroom_id)
+        if isinstance(summary, tuple):
+            return JSONResponse({"error": summary[0]}, status_code=summary[1])
+
+        emotion_data = await services.get_emotion_results(chatroom_id, user_id)
+        emotion_info = emotion_data.get("most_common", {"emotion": "neutral", "confidence": 0.5})
+        emotion = emotion_info.get("emotion")
+
+        diary_id, created = await services.create_diary(user_id, chatroom_id, summary, emotion, summary)
+        if diary_id and not created:
+            # 채팅방 일기는 하나만 저장 → 이미 저장된 일기 반환 (Flask /diary/summary/save와 동일)
+            return JSONResponse(
+                {"message": "이미 저장된 일기가 있습니다.", "diary_id": diary_id, "summary": summary},
+                status_code=200,
+            )
+        if diary_id:
+            return JSONResponse(
+                {"message": "요약 및 일기 저장 성공!", "diary_id": diary_id, "summary": summary},
+                status_code=201,
+            )
+        return JSONResponse({"message": "요약은 생성되었지만, 일기 저장 실패!"}, status_code=400)
+    except Exception as e:
+        logging.error(f"[ERROR] /summary/save: {e}")
+        return JSONResponse({"error": f"오류 발생: {str(e)}"}, status_code=500)
+
+
+async def health(request):
+    return JSONResponse({"status": "ok", "time": datetime.now(KST).isoformat()})
+
+
+def create_async_app():
+    """Starlette 애플리케이션 팩토리 함수"""
+
+    async def startup():
+        # motor/redis.asyncio 클라이언트는 워커의 이벤트 루프에서 생성
+        app.state.services = AsyncServices()
+        print("비동기 채팅 서비스 초기화 완료")
+
+    async def shutdown():
+        app.state.services.close()
+
+    routes = [
+        Route("/health", health, methods=["GET"]),
+        Route("/chat/emotion-chat", chat_with_emotion, methods=["POST"]),
+        Route("/chat/emotion-chat/stream", chat_with_emotion_stream, methods=["POST"]),
+        Route("/diary/summary", summarize_conversation, methods=["POST"]),
+        Route("/diary/summary/save", summarize_and_save_diary, methods=["POST"]),
+    ]
+
+    app = Starlette(
+        routes=routes,
+        middleware=[
+            Middleware(CORSMiddleware, allow_origins=["*"], allow_methods=["*"], allow_headers=["*"])
+        ],
+        on_startup=[startup],
+        on_shutdown=[shutdown],
+    )
+    return app
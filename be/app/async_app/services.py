@@ -0,0 +1,606 @@
+"""
+# 비동기 채팅/일기 요약 서비스 (ASGI 경로)
+
+동기 서비스의 프롬프트/정리/집계 함수는 그대로 재사용하고 I/O만 비동기로 대체
+- MongoDB: motor
+- OpenAI: ChatOpenAI.ainvoke / astream, AsyncOpenAI
+- 동시 호출 수 제한과 재시도는 asyncio.Semaphore + 같은 백오프 규칙(llm_gateway)
+"""
+
+import os
+import asyncio
+import logging
+from datetime import datetime
+
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+from openai import OpenAI, AsyncOpenAI, OpenAIError, AuthenticationError, RateLimitError
+
+from config.settings import ActiveConfig
+from app.services.chat_service import (
+    KST,
+    is_valid_uuid,
+    modify_message_based_on_emotion,
+)
+from app.services.diary_service import diary_document
+from app.services.diary_summary_service import (
+    SUMMARY_COMPLETION_PARAMS,
+    build_conversation_text,
+    build_long_summary_prompt,
+    build_summary_messages,
+    build_summary_prompt,
+    clean_summary,
+    count_tokens,
+    fold_running_notes,
+    get_cached_summary,
+    messages_digest,
+    plan_running_update,
+    running_notes_if_current,
+    running_notes_update,
+    running_summary_pipeline,
+    should_pregenerate_diary,
+    summary_cache_key,
+    summary_cache_update,
+)
+from app.services.emotion_service import summarize_emotions
+from app.services.history_service import (
+    build_summary_prompt as build_history_summary_prompt,
+    format_turns,
+    history_pipeline,
+    plan_summary_update,
+    recent_start,
+    summary_llm,
+    summary_update_filter,
+    to_history_state,
+)
+from app.services.llm_gateway import RETRYABLE_ERRORS, backoff_delay
+from app.services.message_store import (
+    bucket_append_update,
+    bucket_of,
+    bucket_range_query,
+    bucket_replace_requests,
+    build_bucket_documents,
+    migration_finish_update,
+    room_counter_update,
+    stitch_messages,
+    with_seq,
+)
+from app.services.llm_service import (
+    StreamingResponseCleaner,
+    PROMPT_VERSION,
+    build_prompt_messages,
+    llm,
+    pick_emotion_opener,
+    semantic_cache,
+)
+from app.services.rag_service import retriever
+from app.services.search_service import search_entry
+from app.services.semantic_cache import emotion_bucket
+from app.utils.metrics import record_openai_usage, record_usage_metadata
+
+NEUTRAL_RESULTS = {"emotions": [], "most_common": {"emotion": "neutral", "confidence": 0.5}}
+
+
+class AsyncServices:
+    """이벤트 루프 안에서 만들어야 하는 클라이언트 모음 (앱 시작 시 생성)"""
+
+    def __init__(self):
+        self.mongo = AsyncIOMotorClient(ActiveConfig.MONGO_URI)
+        self.db = self.mongo.get_default_database()
+        self.openai = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"), max_retries=0)
+        # 긴 대화 분할 요약은 동기 구현(스레드 풀 + llm_gateway)을 스레드에서 실행
+        self.sync_openai = OpenAI(api_key=os.getenv("OPENAI_API_KEY"), max_retries=0)
+        self.llm_semaphore = asyncio.Semaphore(ActiveConfig.LLM_MAX_IN_FLIGHT)
+        self.background_tasks = set()
+        self.pending_rooms = set()  # (작업 종류, chatroom_id) - 채팅방별 백그라운드 작업은 하나만
+
+    def close(self):
+        self.mongo.close()
+
+    # --- 공통 ---
+
+    async def call_llm(self, make_coro):
+        """
+        동시 호출 수 제한 + 일시적 오류 재시도 (동기 llm_gateway와 같은 설정/백오프 규칙)
+
+        :param make_coro: 호출할 때마다 새 코루틴을 만드는 함수
+        """
+        for attempt in range(ActiveConfig.LLM_MAX_RETRIES + 1):
+            try:
+                async with self.llm_semaphore:
+                    return await make_coro()
+            except RETRYABLE_ERRORS as e:
+                if attempt == ActiveConfig.LLM_MAX_RETRIES:
+                    raise
+                delay = backoff_delay(
+                    attempt, e, ActiveConfig.LLM_BACKOFF_BASE, ActiveConfig.LLM_BACKOFF_MAX
+                )
+                if delay is None:
+                    logging.warning(
+                        f"[WARNING] LLM 호출 재시도 포기 ({type(e).__name__}, "
+                        f"retry-after가 최대 대기 시간 {ActiveConfig.LLM_BACKOFF_MAX}초보다 김)"
+                    )
+                    raise
+                logging.warning(
+                    f"[WARNING] LLM 호출 재시도 {attempt + 1}/{ActiveConfig.LLM_MAX_RETRIES} "
+                    f"({type(e).__name__}, {delay:.2f}초 후)"
+                )
+                # 세마포어를 반납한 상태로 대기
+                await asyncio.sleep(delay)
+
+    def run_in_background(self, coro):
+        """응답과 무관한 작업 실행 (태스크 참조 유지)"""
+        task = asyncio.create_task(coro)
+        self.background_tasks.add(task)
+        task.add_done_callback(self.background_tasks.discard)
+
+    def run_once_in_background(self, key, make_coro):
+        """
+        같은 key의 작업이 실행 중이 아닐 때만 백그라운드 실행 (동기 경로의 _pending_rooms와 동일)
+
+        :param make_coro: 실행할 때만 코루틴을 만드는 함수
+        """
+        if key in self.pending_rooms:
+            return
+        self.pending_rooms.add(key)
+
+        async def run():
+            try:
+                await make_coro()
+            finally:
+                self.pending_rooms.discard(key)
+
+        self.run_in_background(run())
+
+    # --- 감정 ---
+
+    async def get_emotion_data(self, user_id, chatroom_id):
+        """llm_service.get_emotion_data의 비동기 버전"""
+        try:
+            emotion_data = await self.db.emotions.find_one(
+                {"user_id": user_id, "chatroom_id": chatroom_id}, sort=[("timestamp", -1)]
+            )
+            if emotion_data:
+                return emotion_data.get("emotion", "neutral"), emotion_data.get("confidence", 0.0)
+            return "neutral", 0.0
+        except Exception as e:
+            logging.error(f"MongoDB 감정 데이터 불러오기 실패: {e}")
+            return "neutral", 0.0
+
+    async def get_emotion_results(self, chatroom_id, user_id):
+        """emotion_service.get_emotion_results의 비동기 버전"""
+        try:
+            if not isinstance(chatroom_id, str):
+                return NEUTRAL_RESULTS
+            chatroom = await self.db.chatrooms.find_one(
+                {"chatroom_id": chatroom_id, "user_id": user_id}, {"_id": 1}
+            )
+            if chatroom is None:
+                logging.error(
+                    f"[ERROR] 접근 권한 없음: user_id={user_id}, chatroom_id={chatroom_id}"
+                )
+                return NEUTRAL_RESULTS
+            docs = await self.db.emotions.find({"chatroom_id": chatroom_id}).to_list(None)
+            return summarize_emotions(docs)
+        except Exception as e:
+            logging.error(f"[ERROR] 감정 결과 조회 오류: {e}")
+            return NEUTRAL_RESULTS
+
+    async def resolve_message_emotion(self, user_id, chatroom_id, emotion_id, user_message):
+        """chat_routes.resolve_message_emotion의 비동기 버전"""
+        emotion_label = "neutral"
+        confidence = 0.5
+        if emotion_id:
+            emotion_data = await self.get_emotion_results(chatroom_id, user_id)
+            if emotion_data and emotion_data["most_common"]["emotion"] != "default":
+                emotion_label = emotion_data["most_common"]["emotion"]
+                confidence = emotion_data["most_common"]["confidence"]
+                user_message = modify_message_based_on_emotion(user_message, emotion_label)
+        return emotion_label, confidence, user_message
+
+    # --- 응답 생성 ---
+
+    async def get_emotion_opener(self, user_id, chatroom_id, user_message):
+        """llm_service.get_emotion_opener의 비동기 버전 (대화 상태 저장소는 동기 경로와 공유)"""
+        if not ActiveConfig.OPENER_ENABLED or (user_message or "").strip():
+            return None
+        emotion, confidence = await self.get_emotion_data(user_id, chatroom_id)
+        return await asyncio.to_thread(
+            pick_emotion_opener, chatroom_id, user_message, emotion, confidence
+        )
+
+    async def load_history_state(self, chatroom_id, window=None):
+        if window is None:
+            window = ActiveConfig.CHAT_HISTORY_TURNS
+        cursor = self.db.chatrooms.aggregate(history_pipeline(chatroom_id))
+        result = await cursor.to_list(None)
+        recent = None
+        if result and window > 0:
+            recent = await self.load_messages(
+                chatroom_id, recent_start(result[0], window), result[0]["count"]
+            )
+        return to_history_state(result, recent)
+
+    async def load_messages(self, chatroom_id, start=0, end=None):
+        """message_store.load_messages의 비동기 버전"""
+        start = max(start, 0)
+        if end is not None and end <= start:
+            return []
+        cursor = self.db.chat_buckets.find(bucket_range_query(chatroom_id, start, end)).sort(
+            "bucket", 1
+        )
+        buckets = await cursor.to_list(None)
+        if buckets:
+            return stitch_messages(buckets, start, end)
+
+        # 아직 버킷으로 옮기지 않은 채팅방
+        room = await self.db.chatrooms.find_one(
+            {"chatroom_id": chatroom_id, "chats": {"$exists": True}}, {"chats": 1}
+        )
+        chats = room.get("chats", []) if room else []
+        return with_seq(chats, 0)[start:end]
+
+    async def retrieve_context(self, user_message):
+        if not user_message.strip():
+            return ""
+        docs = await retriever.ainvoke(user_message)
+        return "\n".join(doc.page_content for doc in docs)
+
+    async def generate_response(self, user_id, chatroom_id, user_message):
+        """llm_service.generate_response의 비동기 버전"""
+        try:
+            (emotion, confidence), history_state, retrieved_context = await asyncio.gather(
+                self.get_emotion_data(user_id, chatroom_id),
+                self.load_history_state(chatroom_id),
+                self.retrieve_context(user_message),
+            )
+
+            cache_key = None
+            if (
+                semantic_cache is not None
+                and user_message.strip()
+                and history_state["count"] < ActiveConfig.SEMANTIC_CACHE_MAX_TURNS
+            ):
+                bucket = emotion_bucket(emotion, confidence)
+                cached_response, vector = await asyncio.to_thread(
+                    semantic_cache.lookup, bucket, user_message
+                )
+                if cached_response:
+                    return cached_response
+                cache_key = (bucket, vector)
+
+            messages = build_prompt_messages(
+                user_id,
+                chatroom_id,
+                user_message,
+                retrieved_context,
+                emotion=emotion,
+                confidence=confidence,
+                history_state=history_state,
+            )
+
+            response = await self.call_llm(lambda: llm.ainvoke(messages))
+            record_usage_metadata(response.usage_metadata, prompt_version=PROMPT_VERSION)
+            bot_response = response.content.strip()
+            bot_response = bot_response.replace("\n\n", " ").replace("\n", " ").strip()
+
+            if cache_key is not None:
+                bucket, vector = cache_key
+                semantic_cache.store(bucket, user_message, bot_response, vector)
+            return bot_response
+        except Exception as e:
+            logging.error(f"LLM 응답 생성 중 오류 발생: {e}")
+            return "챗봇 응답 생성 중 오류가 발생했습니다. 다시 시도해주세요."
+
+    async def generate_response_stream(self, user_id, chatroom_id, user_message):
+        """llm_service.generate_response_stream의 비동기 버전"""
+        (emotion, confidence), history_state, retrieved_context = await asyncio.gather(
+            self.get_emotion_data(user_id, chatroom_id),
+            self.load_history_state(chatroom_id),
+            self.retrieve_context(user_message),
+        )
+        messages = build_prompt_messages(
+            user_id,
+            chatroom_id,
+            user_message,
+            retrieved_context,
+            emotion=emotion,
+            confidence=confidence,
+            history_state=history_state,
+        )
+
+        cleaner = StreamingResponseCleaner()
+        # 스트리밍은 중간에 재시도할 수 없으므로 동시 호출 수 제한만 적용
+        async with self.llm_semaphore:
+            async for chunk in llm.astream(messages):
+                usage = getattr(chunk, "usage_metadata", None)
+                if usage:
+                    record_usage_metadata(usage, prompt_version=PROMPT_VERSION)
+                text = cleaner.feed(chunk.content or "")
+                if text:
+                    yield text
+
+    # --- 저장 ---
+
+    async def add_chat(
+        self,
+        user_id,
+        chatroom_id,
+        user_message,
+        bot_response,
+        emotion_id=None,
+        confidence=None,
+        conversation_end=False,
+    ):
+        """chat_service.add_chat의 비동기 버전"""
+        if not isinstance(chatroom_id, str) or not is_valid_uuid(chatroom_id):
+            raise ValueError("유효하지 않은 chatroom_id입니다.")
+
+        kst_now = datetime.now(KST)
+        chat_data = {
+            "user_id": user_id,
+            "user_message": user_message,
+            "bot_response": bot_response,
+            "emotion_id": emotion_id,
+            "confidence": confidence,
+            "conversation_end": conversation_end,
+            "timestamp": kst_now.isoformat(),
+        }
+        updates = {"updated_at": kst_now.isoformat(), "conversation_end": conversation_end}
+        if conversation_end:
+            updates["conversation_end_timestamp"] = kst_now.isoformat()
+
+        # 아직 버킷으로 옮기지 않은 채팅방은 먼저 옮긴 뒤 버킷에 추가 (message_store.append_message와 동일)
+        await self.migrate_chatroom(chatroom_id)
+        room = await self.db.chatrooms.find_one_and_update(
+            {"chatroom_id": chatroom_id},
+            room_counter_update(updates, {"user_id": user_id, "created_at": kst_now.isoformat()}),
+            projection={"message_count": 1},
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+        )
+        seq = room["message_count"] - 1
+        await self.db.chat_buckets.update_one(
+            {"chatroom_id": chatroom_id, "bucket": bucket_of(seq)},
+            bucket_append_update(user_id, seq, chat_data),
+            upsert=True,
+        )
+        await self.index_message(user_id, chatroom_id, seq, chat_data)
+
+        if ActiveConfig.CHAT_HISTORY_SUMMARY_ENABLED:
+            self.run_once_in_background(
+                ("history", chatroom_id), lambda: self.update_history_summary(chatroom_id)
+            )
+        if ActiveConfig.RUNNING_SUMMARY_ENABLED:
+            self.run_once_in_background(
+                ("running", chatroom_id), lambda: self.update_running_summary(chatroom_id)
+            )
+        return True
+
+    async def migrate_chatroom(self, chatroom_id):
+        """message_store.migrate_chatroom의 비동기 버전"""
+        room = await self.db.chatrooms.find_one(
+            {"chatroom_id": chatroom_id, "chats": {"$exists": True}},
+            {"user_id": 1, "chats": 1},
+        )
+        if room is None:
+            return None
+
+        chats = room.get("chats", [])
+        documents = build_bucket_documents(chatroom_id, room.get("user_id"), chats)
+        if documents:
+            await self.db.chat_buckets.bulk_write(
+                bucket_replace_requests(chatroom_id, documents), ordered=False
+            )
+
+        result = await self.db.chatrooms.update_one(
+            *migration_finish_update(chatroom_id, len(chats))
+        )
+        if result.modified_count == 0:
+            logging.warning(f"[WARNING] 버킷 이전 중 대화가 추가됨 - 대화방 ID: {chatroom_id}")
+            return None
+        return len(chats)
+
+    async def index_message(self, user_id, chatroom_id, seq, chat_data):
+        """search_service.index_message의 비동기 버전"""
+        entry = search_entry(user_id, chatroom_id, seq, chat_data)
+        if entry is None:
+            return
+        try:
+            await self.db.chat_search.replace_one(
+                {"chatroom_id": chatroom_id, "seq": seq}, entry, upsert=True
+            )
+        except Exception as e:
+            logging.error(f"[ERROR] 대화 검색 색인 실패 (chatroom_id={chatroom_id}, seq={seq}): {e}")
+
+    async def update_history_summary(self, chatroom_id):
+        """history_service.update_history_summary의 비동기 버전"""
+        try:
+            state = await self.load_history_state(chatroom_id, window=0)
+            plan = plan_summary_update(state)
+            if plan is None:
+                return
+            upto, target = plan
+
+            conversation = format_turns(await self.load_messages(chatroom_id, upto, target))
+            if not conversation:
+                return
+
+            summary_prompt = build_history_summary_prompt(state["summary"], conversation)
+            response = await self.call_llm(lambda: summary_llm.ainvoke(summary_prompt))
+            summary = response.content.strip().replace("\n\n", " ").replace("\n", " ")
+
+            await self.db.chatrooms.update_one(
+                summary_update_filter(chatroom_id, upto),
+                {"$set": {"history_summary": summary, "history_summary_upto": target}},
+            )
+        except Exception as e:
+            logging.error(f"[ERROR] 대화 요약 갱신 실패 - 대화방 ID: {chatroom_id}: {e}")
+
+    async def update_running_summary(self, chatroom_id):
+        """diary_summary_service.update_running_summary의 비동기 버전"""
+        try:
+            result = await self.db.chatrooms.aggregate(running_summary_pipeline(chatroom_id)).to_list(
+                None
+            )
+            if not result:
+                return
+            state = result[0]
+
+            plan = plan_running_update(state)
+            if plan is not None:
+                if plan == "rebuild":
+                    logging.info(f"[INFO] 대화방 ID: {chatroom_id} - 대화가 바뀌어 누적 메모 재생성")
+                    chats, notes, previous_digest = await self.load_messages(chatroom_id), "", ""
+                else:
+                    chats = await self.load_messages(chatroom_id, state["upto"], state["count"])
+                    notes, previous_digest = state["notes"], state["digest"]
+                    if not chats:
+                        return
+
+                # 조각별 순차 요약은 동기 구현(llm_gateway)을 스레드에서 실행
+                notes, usages = await asyncio.to_thread(
+                    fold_running_notes, self.sync_openai, notes, chats
+                )
+                for usage in usages:
+                    record_openai_usage(usage)
+                upto = chats[-1]["seq"] + 1 if chats else 0
+                await self.db.chatrooms.update_one(
+                    *running_notes_update(
+                        chatroom_id,
+                        state["upto"],
+                        notes,
+                        upto,
+                        messages_digest(chats, previous_digest),
+                    )
+                )
+                state.update(notes=notes, upto=upto)
+                if plan == "rebuild":
+                    state["count"] = upto
+
+            # 대화가 끝났으면 메모로 일기를 만들어 요약 캐시에 저장
+            if should_pregenerate_diary(state):
+                prompt = build_summary_prompt(state["notes"])
+                cache_key = summary_cache_key(prompt)
+                if cache_key != state.get("cache_key"):
+                    response = await self.call_llm(
+                        lambda: self.openai.chat.completions.create(
+                            messages=build_summary_messages(prompt), **SUMMARY_COMPLETION_PARAMS
+                        )
+                    )
+                    record_openai_usage(response.usage)
+                    await self.db.chatrooms.update_one(
+                        {"chatroom_id": chatroom_id},
+                        summary_cache_update(cache_key, clean_summary(response.choices[0].message.content)),
+                    )
+        except Exception as e:
+            logging.error(f"[ERROR] 누적 메모 갱신 실패 - 대화방 ID: {chatroom_id}: {e}")
+
+    # --- 일기 요약 ---
+
+    async def generate_summary(self, chatroom_id):
+        """
+        diary_summary_service.generate_summary의 비동기 버전
+
+        :return: 요약 문자열, 실패 시 (오류 딕셔너리, 상태 코드)
+        """
+        try:
+            chatroom = await self.db.chatrooms.find_one(
+                {"chatroom_id": chatroom_id},
+                {
+                    "conversation_end": 1,
+                    "summary_cache": 1,
+                    "running_summary": 1,
+                    "running_summary_upto": 1,
+                    "running_summary_digest": 1,
+                },
+            )
+        except Exception as e:
+            logging.error(f"[ERROR] MongoDB 쿼리 중 오류 발생: {e}")
+            return {"error": "데이터베이스 오류"}, 500
+
+        if not chatroom:
+            return {"error": "해당 대화방을 찾을 수 없습니다."}, 404
+        if not chatroom.get("conversation_end"):
+            return {"error": "대화가 종료되지 않았습니다."}, 400
+
+        try:
+            chats = await self.load_messages(chatroom_id)
+        except Exception as e:
+            logging.error(f"[ERROR] MongoDB 쿼리 중 오류 발생: {e}")
+            return {"error": "데이터베이스 오류"}, 500
+
+        conversation_text = build_conversation_text(chats)
+        if not conversation_text.strip():
+            return {"error": "대화 내용이 없습니다."}, 400
+
+        # 누적 메모가 모든 대화를 반영하고 있으면 메모로 요약 (남은 대화 합치기는 동기 경로에서만)
+        notes = (
+            running_notes_if_current(chatroom, chats) if ActiveConfig.RUNNING_SUMMARY_ENABLED else None
+        )
+        prompt = build_summary_prompt(notes or conversation_text)
+        cache_key = summary_cache_key(prompt)
+        cached = get_cached_summary(chatroom, cache_key)
+        if cached is not None:
+            return cached
+
+        try:
+            if notes is None and count_tokens(conversation_text) > ActiveConfig.SUMMARY_MAX_INPUT_TOKENS:
+                prompt, _ = await asyncio.to_thread(
+                    build_long_summary_prompt, self.sync_openai, chats
+                )
+            response = await self.call_llm(
+                lambda: self.openai.chat.completions.create(
+                    messages=build_summary_messages(prompt), **SUMMARY_COMPLETION_PARAMS
+                )
+            )
+        except AuthenticationError as e:
+            logging.error(f"[ERROR] OpenAI API 인증 오류: {e}")
+            return {"error": "OpenAI API 인증 오류: API 키를 확인하세요."}, 500
+        except RateLimitError as e:
+            logging.error(f"[ERROR] OpenAI API 요청 한도 초과: {e}")
+            return {"error": "OpenAI API 요청 한도 초과: 잠시 후 다시 시도하세요."}, 429
+        except OpenAIError as e:
+            logging.error(f"[ERROR] OpenAI API 서버 오류: {e}")
+            return {"error": f"OpenAI API 서버 오류: {str(e)}"}, 500
+        except Exception as e:
+            logging.error(f"[ERROR] OpenAI API 호출 중 예기치 않은 오류: {e}")
+            return {"error": "서버 내부 오류"}, 500
+
+        summary = clean_summary(response.choices[0].message.content)
+        if ActiveConfig.SUMMARY_CACHE_ENABLED:
+            try:
+                await self.db.chatrooms.update_one(
+                    {"chatroom_id": chatroom_id}, summary_cache_update(cache_key, summary)
+                )
+            except Exception as e:
+                logging.error(f"[ERROR] 요약 캐시 저장 실패 - 대화방 ID: {chatroom_id}: {e}")
+        return summary
+
+    async def create_diary(self, user_id, chatroom_id, content, emotion, summary=None):
+        """
+        diary_service.create_diary의 비동기 버전 (채팅방 일기는 chatroom_id 기준 upsert)
+
+        :return: (일기 ID, 새로 저장했는지 여부)
+        """
+        diary_data = diary_document(user_id, chatroom_id, content, emotion, summary)
+        if not chatroom_id:
+            result = await self.db.diaries.insert_one(diary_data)
+            return str(result.inserted_id), True
+
+        for _ in range(2):
+            try:
+                result = await self.db.diaries.update_one(
+                    {"chatroom_id": chatroom_id}, {"$setOnInsert": diary_data}, upsert=True
+                )
+            except DuplicateKeyError:
+                # 다른 요청이 같은 채팅방 일기를 동시에 만든 경우 → 그 일기를 다시 조회
+                continue
+            if result.upserted_id is not None:
+                return str(result.upserted_id), True
+            diary = await self.db.diaries.find_one({"chatroom_id": chatroom_id}, {"_id": 1})
+            if diary:
+                return str(diary["_id"]), False
+        raise RuntimeError("일기 저장 실패")
+
@@ -0,0 +1,121 @@
+"""
+# 운영용 Flask CLI 명령
+
+flask --app app.py chat auto-end              # 날짜가 지난 미종료 채팅방 종료
+flask --app app.py chat migrate-buckets       # chats 배열을 chat_buckets로 이전
+flask --app app.py chat reindex-search        # 대화 검색 색인 다시 생성
+flask --app app.py diary batch-summarize      # 종료된 채팅방 일기 일괄 생성
+flask --app app.py mongo ensure-indexes       # 인덱스 목록(app/database/indexes.py) 적용
+flask --app app.py mongo check-queries        # 서비스 쿼리 실행 계획 확인 (COLLSCAN 검출)
+"""
+
+import click
+from flask.cli import AppGroup
+
+from app.database import mongo
+from app.database.indexes import ensure_indexes, missing_indexes
+from app.database.query_plans import check_query_plans
+from app.models.chat import auto_end_chatroom_by_date
+from app.services.diary_batch_service import run_diary_batch
+from app.services.message_store import migrate_all_chatrooms
+from app.services.search_service import reindex_all_chatrooms
+
+chat_cli = AppGroup("chat", help="채팅방 관리 명령")
+diary_cli = AppGroup("diary", help="일기 관리 명령")
+mongo_cli = AppGroup("mongo", help="MongoDB 인덱스 관리 명령")
+
+
+@chat_cli.command("auto-end")
+def auto_end_command():
+    """날짜가 지난 미종료 채팅방 종료"""
+    count = auto_end_chatroom_by_date()
+    click.echo(f"종료 처리된 채팅방: {count}개")
+
+
+@chat_cli.command("migrate-buckets")
+@click.option("--limit", type=int, default=None, help="최대 처리 채팅방 수")
+def migrate_buckets_command(limit):
+    """채팅방 문서의 chats 배열을 chat_buckets 컬렉션으로 이전"""
+    stats = migrate_all_chatrooms(limit=limit)
+    click.echo(
+        f"이전한 채팅방 {stats['chatrooms']}개 (대화 {stats['messages']}개), "
+        f"건너뜀 {stats['skipped']}개"
+    )
+
+
+@chat_cli.command("reindex-search")
+@click.option("--limit", type=int, default=None, help="최대 처리 채팅방 수")
+def reindex_search_command(limit):
+    """모든 채팅방의 대화를 검색 색인(chat_search)에 다시 기록"""
+    stats = reindex_all_chatrooms(limit=limit)
+    click.echo(
+        f"색인한 채팅방 {stats['chatrooms']}개 (대화 {stats['messages']}개), "
+        f"실패 {stats['failed']}개"
+    )
+
+
+@diary_cli.command("batch-summarize")
+@click.option("--limit", type=int, default=None, help="한 번에 처리할 최대 채팅방 수")
+@click.option("--concurrency", type=int, default=None, help="parallel 모드 동시 호출 수")
+@click.option(
+    "--mode",
+    type=click.Choice(["parallel", "openai_batch"]),
+    default=None,
+    help="요약 호출 방식 (기본값: DIARY_BATCH_MODE)",
+)
+def batch_summarize_command(limit, concurrency, mode):
+    """종료됐지만 일기가 없는 채팅방의 일기 일괄 생성"""
+    stats = run_diary_batch(limit=limit, concurrency=concurrency, mode=mode)
+    click.echo(
+        f"대상 채팅방 {stats['chatrooms']}개, 새 요약 {stats['summarized']}개, "
+        f"실패 {stats['failed']}개, 저장된 일기 {stats['diaries']}개, "
+        f"이미 일기가 있는 채팅방 {stats['duplicates']}개"
+    )
+
+
+@mongo_cli.command("ensure-indexes")
+@click.option("--dry-run", is_flag=True, help="생성하지 않고 없는 인덱스만 출력")
+def ensure_indexes_command(dry_run):
+    """app/database/indexes.py에 정의한 인덱스 생성 (이미 있으면 그대로)"""
+    if dry_run:
+        missing = missing_indexes(mongo.db)
+        for collection, names in missing.items():
+            click.echo(f"{collection}: {', '.join(names)}")
+        click.echo(f"없는 인덱스: {sum(len(names) for names in missing.values())}개")
+        return
+
+    stats = ensure_indexes(mongo.db)
+    for collection, name, error in stats["failed"]:
+        click.echo(f"실패 {collection}.{name}: {error}", err=True)
+    click.echo(
+        f"적용한 인덱스 {stats['applied']}개, 삭제 {stats['dropped']}개, 실패 {len(stats['failed'])}개"
+    )
+    if stats["failed"]:
+        raise SystemExit(1)
+
+
+@mongo_cli.command("check-queries")
+def check_queries_command():
+    """서비스 쿼리 실행 계획 확인 (인덱스 없이 전체 스캔하는 쿼리가 있으면 실패)"""
+    results = check_query_plans(mongo.db)
+    problems = 0
+    for result in results:
+        if result["error"]:
+            status = f"오류 ({result['error']})"
+        elif result["collscan"]:
+            status = "COLLSCAN"
+        else:
+            status = "OK"
+        if status != "OK":
+            problems += 1
+        click.echo(f"{status:<10} {result['collection']:<14} {result['name']}")
+    click.echo(f"확인한 쿼리 {len(results)}개, 문제 {problems}개")
+    if problems:
+        raise SystemExit(1)
+
+
+def register_commands(app):
+    """Flask 앱에 CLI 명령 등록"""
+    app.cli.add_command(chat_cli)
+    app.cli.add_command(diary_cli)
+    app.cli.add_command(mongo_cli)
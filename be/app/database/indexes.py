@@ -0,0 +1,176 @@
+"""
+# MongoDB 인덱스 목록 (선언형)
+
+컬렉션별로 필요한 인덱스를 한곳에 정의하고 앱 시작 시(MONGO_ENSURE_INDEXES) 또는 CLI로 생성
+- 이름과 정의가 같은 인덱스가 이미 있으면 아무것도 하지 않음 (여러 번 실행해도 안전)
+- 인덱스마다 따로 생성해서 하나가 실패해도(기존 데이터 중복 등) 나머지는 생성
+- 정의를 바꾼 인덱스의 예전 이름은 DROPPED_INDEXES에 남겨 두면 생성 전에 삭제
+
+flask --app app.py mongo ensure-indexes       # 없는 인덱스 생성
+flask --app app.py mongo check-queries        # 서비스 쿼리 실행 계획 확인 (COLLSCAN 검출)
+"""
+
+import logging
+
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from pymongo.errors import OperationFailure, PyMongoError
+
+from app.database import mongo
+
+# 컬렉션 → [{name, keys, options}]
+INDEXES = {
+    "chatrooms": [
+        # 채팅방 단건 조회 (add_chat, 요약, 대화 이력) - 기존 데이터 중복 가능성 때문에 unique 아님
+        {"name": "chatroom_id", "keys": [("chatroom_id", ASCENDING)]},
+        # 사용자 채팅방 권한 확인/조회
+        {"name": "user_chatroom", "keys": [("user_id", ASCENDING), ("chatroom_id", ASCENDING)]},
+        # 채팅방 목록 페이지네이션 (updated_at, chatroom_id 내림차순)
+        {
+            "name": "user_updated_at_page",
+            "keys": [
+                ("user_id", ASCENDING),
+                ("updated_at", DESCENDING),
+                ("chatroom_id", DESCENDING),
+            ],
+        },
+        # 자동 종료 대상, 종료된 채팅방 일괄 요약
+        {
+            "name": "end_updated_at",
+            "keys": [("conversation_end", ASCENDING), ("updated_at", ASCENDING)],
+        },
+    ],
+    "chat_buckets": [
+        # 채팅방별 버킷 번호는 하나만 (upsert 동시 실행 시 중복 방지 + 구간 조회)
+        {
+            "name": "chatroom_bucket",
+            "keys": [("chatroom_id", ASCENDING), ("bucket", ASCENDING)],
+            "options": {"unique": True},
+        },
+    ],
+    "chat_search": [
+        # 대화 검색 (n-gram 역색인, terms는 배열이라 multikey 인덱스)
+        {"name": "user_terms", "keys": [("user_id", ASCENDING), ("terms", ASCENDING)]},
+        # 대화 하나당 검색 문서 하나 (색인/재색인 upsert, 채팅방 삭제)
+        {
+            "name": "chatroom_seq",
+            "keys": [("chatroom_id", ASCENDING), ("seq", ASCENDING)],
+            "options": {"unique": True},
+        },
+    ],
+    "emotions": [
+        # 채팅방 감정 결과 (일기 감정, 일괄 요약)
+        {"name": "chatroom_id", "keys": [("chatroom_id", ASCENDING)]},
+        # 채팅방의 최근 감정 (sort timestamp -1)
+        {
+            "name": "user_chatroom_timestamp",
+            "keys": [
+                ("user_id", ASCENDING),
+                ("chatroom_id", ASCENDING),
+                ("timestamp", DESCENDING),
+            ],
+        },
+        # 기간별 감정 통계
+        {"name": "user_timestamp", "keys": [("user_id", ASCENDING), ("timestamp", ASCENDING)]},
+    ],
+    "diaries": [
+        # 날짜별 일기 조회 (+ chatroom_id), 사용자 일기 검색
+        {"name": "user_date", "keys": [("user_id", ASCENDING), ("date", ASCENDING)]},
+        # 채팅방당 일기 하나 (일괄 요약/요약 작업이 겹쳐도 중복 저장 방지), 일기가 없는 채팅방 찾기
+        # 채팅방 없이 쓴 일기(chatroom_id=None)는 제외
+        {
+            "name": "chatroom_id_unique",
+            "keys": [("chatroom_id", ASCENDING)],
+            "options": {"unique": True, "partialFilterExpression": {"chatroom_id": {"$type": "string"}}},
+        },
+    ],
+    "summary_jobs": [
+        # 채팅방당 진행 중(active) 작업은 하나만 허용 → 동시 등록도 하나로 병합
+        {
+            "name": "active_job_per_chatroom",
+            "keys": [("type", ASCENDING), ("chatroom_id", ASCENDING)],
+            "options": {"unique": True, "partialFilterExpression": {"active": True}},
+        },
+        # 작업 가져오기 (상태별 실행 가능 시각 순)
+        {"name": "claim_order", "keys": [("status", ASCENDING), ("run_after", ASCENDING)]},
+        # 임대 만료된 작업 회수
+        {"name": "lease_expiry", "keys": [("status", ASCENDING), ("lease_until", ASCENDING)]},
+    ],
+    "user_sessions": [
+        {"name": "user_id", "keys": [("user_id", ASCENDING)]},
+    ],
+}
+
+
+# 더 이상 쓰지 않는 인덱스 (같은 키로 다시 정의한 인덱스와 충돌하므로 생성 전에 삭제)
+DROPPED_INDEXES = {
+    "diaries": ["chatroom_id"],  # → chatroom_id_unique
+}
+
+
+def index_models(collection):
+    return [
+        IndexModel(spec["keys"], name=spec["name"], **spec.get("options", {}))
+        for spec in INDEXES.get(collection, [])
+    ]
+
+
+def missing_indexes(db, collections=None):
+    """
+    아직 만들어지지 않은 인덱스 목록
+
+    :return: {컬렉션: [인덱스 이름]} (없으면 빈 딕셔너리)
+    """
+    missing = {}
+    for collection in collections or INDEXES:
+        existing = set(db[collection].index_information())
+        names = [spec["name"] for spec in INDEXES[collection] if spec["name"] not in existing]
+        if names:
+            missing[collection] = names
+    return missing
+
+
+def ensure_indexes(db, collections=None):
+    """
+    INDEXES에 정의한 인덱스 생성 (이미 있으면 그대로), DROPPED_INDEXES의 인덱스는 삭제
+
+    :param db: pymongo Database
+    :param collections: 생성할 컬렉션 목록 (기본값: 전체)
+    :return: {"applied": 적용한 인덱스 수, "dropped": 삭제한 인덱스 수, "failed": [(컬렉션, 이름, 오류)]}
+    """
+    stats = {"applied": 0, "dropped": 0, "failed": []}
+    for collection in collections or INDEXES:
+        existing = set(db[collection].index_information())
+        for name in DROPPED_INDEXES.get(collection, []):
+            if name not in existing:
+                continue
+            try:
+                db[collection].drop_index(name)
+                stats["dropped"] += 1
+            except OperationFailure as e:
+                logging.error(f"[ERROR] 인덱스 삭제 실패 - {collection}.{name}: {e}")
+                stats["failed"].append((collection, name, str(e)))
+
+        for model in index_models(collection):
+            name = model.document["name"]
+            try:
+                db[collection].create_indexes([model])
+                stats["applied"] += 1
+            except OperationFailure as e:
+                # 같은 이름에 다른 정의, 기존 데이터가 unique 조건 위반 등
+                logging.error(f"[ERROR] 인덱스 생성 실패 - {collection}.{name}: {e}")
+                stats["failed"].append((collection, name, str(e)))
+    return stats
+
+
+def init_indexes(app):
+    """앱 시작 시 인덱스 생성 (MONGO_ENSURE_INDEXES), 실패해도 앱은 계속 실행"""
+    if not app.config.get("MONGO_ENSURE_INDEXES"):
+        return
+    with app.app_context():
+        try:
+            stats = ensure_indexes(mongo.db)
+            logging.info(
+                f"[INFO] MongoDB 인덱스 확인 완료 - 적용 {stats['applied']}개, 실패 {len(stats['failed'])}개"
+            )
+        except PyMongoError as e:
+            logging.error(f"[ERROR] MongoDB 인덱스 생성 중 오류: {e}")
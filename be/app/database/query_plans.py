@@ -0,0 +1,169 @@
+"""
+# 서비스 쿼리 실행 계획 확인
+
+서비스에서 자주 실행하는 쿼리를 explain(queryPlanner)으로 확인해서
+인덱스를 쓰지 않는(COLLSCAN) 쿼리를 찾아냄 → 새 쿼리를 추가하면 query_samples()에도 추가
+
+flask --app app.py mongo check-queries
+"""
+
+from datetime import datetime, timezone
+
+from app.services.chat_service import chatroom_page_filter
+from app.services.diary_summary_service import running_summary_pipeline
+from app.services.history_service import history_pipeline
+from app.services.message_store import bucket_range_query, recent_messages_pipeline
+from app.services.search_service import query_terms, search_filter
+
+# 실행 계획 확인용 값 (값은 계획 선택에 영향이 거의 없음)
+_ID = "__explain__"
+_TS = "2025-01-01T00:00:00+09:00"
+_NOW = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+
+def query_samples():
+    """
+    확인할 쿼리 목록
+
+    :return: [{"name", "collection", "filter"/"pipeline", "sort"(선택)}]
+    """
+    return [
+        # chatrooms
+        {"name": "채팅방 단건 조회", "collection": "chatrooms", "filter": {"chatroom_id": _ID}},
+        {
+            "name": "사용자 채팅방 조회",
+            "collection": "chatrooms",
+            "filter": {"user_id": _ID, "chatroom_id": _ID},
+        },
+        {"name": "사용자 채팅방 목록", "collection": "chatrooms", "filter": {"user_id": _ID}},
+        {
+            "name": "채팅방 목록 페이지",
+            "collection": "chatrooms",
+            "filter": chatroom_page_filter(_ID, [_TS, _ID]),
+            "sort": [("updated_at", -1), ("chatroom_id", -1)],
+        },
+        {
+            "name": "날짜 지난 채팅방 자동 종료",
+            "collection": "chatrooms",
+            "filter": {"conversation_end": False, "updated_at": {"$lt": _TS}},
+        },
+        {
+            "name": "일괄 요약 대상 채팅방",
+            "collection": "chatrooms",
+            "filter": {
+                "conversation_end": True,
+                "$or": [{"message_count": {"$gt": 0}}, {"chats.0": {"$exists": True}}],
+            },
+        },
+        {"name": "대화 이력 상태", "collection": "chatrooms", "pipeline": history_pipeline(_ID)},
+        {"name": "누적 메모 상태", "collection": "chatrooms", "pipeline": running_summary_pipeline(_ID)},
+        {
+            "name": "채팅방 최근 대화",
+            "collection": "chatrooms",
+            "pipeline": recent_messages_pipeline({"user_id": _ID, "chatroom_id": _ID}, 10),
+        },
+        # chat_buckets
+        {
+            "name": "버킷 구간 조회",
+            "collection": "chat_buckets",
+            "filter": bucket_range_query(_ID, 0, 100),
+            "sort": [("bucket", 1)],
+        },
+        {
+            "name": "여러 채팅방 버킷",
+            "collection": "chat_buckets",
+            "filter": {"chatroom_id": {"$in": [_ID]}},
+            "sort": [("chatroom_id", 1), ("bucket", 1)],
+        },
+        # chat_search
+        {
+            "name": "대화 검색",
+            "collection": "chat_search",
+            "filter": search_filter(_ID, *query_terms("학교 친구")),
+        },
+        {
+            "name": "대화 검색 스니펫",
+            "collection": "chat_search",
+            "filter": {"user_id": _ID, "$or": [{"chatroom_id": _ID, "seq": {"$in": [0, 1]}}]},
+        },
+        # emotions
+        {"name": "채팅방 감정 결과", "collection": "emotions", "filter": {"chatroom_id": _ID}},
+        {
+            "name": "여러 채팅방 감정",
+            "collection": "emotions",
+            "filter": {"chatroom_id": {"$in": [_ID]}},
+        },
+        {
+            "name": "채팅방 최근 감정",
+            "collection": "emotions",
+            "filter": {"user_id": _ID, "chatroom_id": _ID},
+            "sort": [("timestamp", -1)],
+        },
+        {
+            "name": "기간별 감정 통계",
+            "collection": "emotions",
+            "filter": {"user_id": _ID, "timestamp": {"$gte": _TS, "$lte": _TS}},
+        },
+        # diaries
+        {"name": "날짜별 일기", "collection": "diaries", "filter": {"user_id": _ID, "date": "2025-01-01"}},
+        {
+            "name": "일기 검색",
+            "collection": "diaries",
+            "filter": {"user_id": _ID, "content": {"$regex": _ID, "$options": "i"}},
+        },
+        {"name": "채팅방 일기", "collection": "diaries", "filter": {"chatroom_id": _ID}},
+        # summary_jobs
+        {
+            "name": "요약 작업 가져오기",
+            "collection": "summary_jobs",
+            "filter": {
+                "$or": [
+                    {"status": "queued", "run_after": {"$lte": _NOW}},
+                    {"status": "running", "lease_until": {"$lt": _NOW}},
+                ]
+            },
+            "sort": [("run_after", 1)],
+        },
+        # user_sessions
+        {"name": "사용자 세션", "collection": "user_sessions", "filter": {"user_id": _ID}},
+    ]
+
+
+def find_stages(plan, stage_name):
+    """실행 계획(중첩 dict/list)에서 stage_name 단계가 있는지 찾음"""
+    if isinstance(plan, dict):
+        if plan.get("stage") == stage_name:
+            return True
+        return any(find_stages(value, stage_name) for value in plan.values())
+    if isinstance(plan, list):
+        return any(find_stages(value, stage_name) for value in plan)
+    return False
+
+
+def explain_sample(db, sample):
+    """쿼리 하나의 실행 계획 (queryPlanner)"""
+    collection = sample["collection"]
+    if "pipeline" in sample:
+        return db.command("aggregate", collection, pipeline=sample["pipeline"], explain=True)
+
+    command = {"find": collection, "filter": sample["filter"]}
+    if sample.get("sort"):
+        command["sort"] = dict(sample["sort"])
+    return db.command("explain", command, verbosity="queryPlanner")
+
+
+def check_query_plans(db, samples=None):
+    """
+    쿼리별로 인덱스 사용 여부 확인
+
+    :return: [{"name", "collection", "collscan": 전체 스캔 여부, "error": 오류 메시지}]
+    """
+    results = []
+    for sample in samples or query_samples():
+        result = {"name": sample["name"], "collection": sample["collection"], "collscan": False, "error": None}
+        try:
+            result["collscan"] = find_stages(explain_sample(db, sample), "COLLSCAN")
+        except Exception as e:
+            result["error"] = str(e)
+        results.append(result)
+    return results
@@ -1,14 +1,12 @@
 from datetime import datetime
 import pytz
-from flask_pymongo import PyMongo
-from pymongo import MongoClient
+from app.database import mongo
+from app.services.message_store import append_message
+from app.services.search_service import index_message
 
 # 한국 표준시(KST) 정의
 KST = pytz.timezone("Asia/Seoul")
 
-mongo = PyMongo()
-
-
 def generate_chatroom_id(user_id):
     """새로운 대화 시작 시 자동으로 채팅방 ID 생성"""
     timestamp = datetime.now(KST).strftime("%Y%m%d%H%M%S")
@@ -24,14 +22,25 @@ def end_previous_chatroom(user_id):
 
 
 def auto_end_chatroom_by_date():
-    """날짜가 바뀌면 미종료된 대화 자동 종료"""
-    now = datetime.now(KST)
-    today_start = datetime(now.year, now.month, now.day, tzinfo=KST)
+    """
+    날짜가 바뀌면 미종료된 대화 자동 종료
 
-    mongo.db.chats.update_many(
-        {"conversation_end": False, "timestamp": {"$lt": today_start}},
-        {"$set": {"conversation_end": True}},
+    :return: 종료 처리된 채팅방 수
+    """
+    now = datetime.now(KST)
+    today_start = KST.localize(datetime(now.year, now.month, now.day))
+
+    # updated_at은 KST isoformat 문자열이므로 같은 형식 문자열로 비교
+    result = mongo.db.chatrooms.update_many(
+        {"conversation_end": False, "updated_at": {"$lt": today_start.isoformat()}},
+        {
+            "$set": {
+                "conversation_end": True,
+                "conversation_end_timestamp": now.isoformat(),
+            }
+        },
     )
+    return result.modified_count
 
 
 def save_chat(
@@ -44,19 +53,6 @@ def save_chat(
     confidence=None,
 ):
     try:
-        # MongoDB에서 채팅방 찾기
-        chatroom = mongo.db.chatrooms.find_one({"chatroom_id": chatroom_id})
-
-        if chatroom is None:
-            # 채팅방이 없으면 새로 생성
-            chatroom = {
-                "user_id": user_id,
-                "chatroom_id": chatroom_id,
-                "chats": [],
-                "updated_at": datetime.now(KST),
-            }
-            mongo.db.chatrooms.insert_one(chatroom)
-
         # 채팅 데이터 생성
         chat_data = {
             "user_message": user_message,
@@ -67,26 +63,26 @@ def save_chat(
             "timestamp": datetime.now(KST),
         }
 
-        # 채팅방에 채팅 데이터 추가
-        mongo.db.chatrooms.update_one(
-            {"chatroom_id": chatroom_id},
-            {"$push": {"chats": chat_data}},
-        )
-
-        # 채팅방의 업데이트 시간 기록
-        mongo.db.chatrooms.update_one(
-            {"chatroom_id": chatroom_id},
-            {"$set": {"updated_at": datetime.now(KST)}},
+        # 대화는 chat_buckets에 저장하고 채팅방의 업데이트 시간 기록 (채팅방이 없으면 새로 생성)
+        seq = append_message(
+            user_id,
+            chatroom_id,
+            chat_data,
+            # add_chat과 같은 isoformat 문자열 (채팅방 목록 정렬/자동 종료 비교 기준)
+            {"updated_at": datetime.now(KST).isoformat()},
+            room_defaults={"user_id": user_id},
         )
+        # 대화 검색 색인
+        index_message(user_id, chatroom_id, seq, chat_data)
 
         print(f"채팅 데이터 저장됨: {chat_data}")
         print(f"저장된 채팅방 ID: {chatroom_id}")
-        print(f"현재 채팅방의 채팅 개수: {len(chatroom['chats'])}")
+        print(f"현재 채팅방의 채팅 개수: {seq}")
 
         return {
             "message": "챗봇 대화가 성공적으로 저장되었습니다.",
             "chatroom_id": chatroom_id,
-            "chats_count": len(chatroom["chats"]),
+            "chats_count": seq,
         }
 
     except Exception as e:
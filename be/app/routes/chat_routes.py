@@ -1,12 +1,14 @@
-from flask import Blueprint, request, jsonify, current_app
+from flask import Blueprint, request, jsonify, current_app, Response, stream_with_context
 from werkzeug.exceptions import BadRequest, NotFound, InternalServerError
 from functools import wraps
+import json
 from app.services.chat_service import (
     save_chat,
     get_chat_history,
     end_chatroom,
     create_chatroom,
     get_user_chat_history,
+    get_user_chatroom_page,
     delete_chat_message,
     chat_with_bot,
     add_chat,
@@ -22,7 +24,13 @@ from app.services.rag_service import preview_rag_search
 from app.utils.auth import jwt_required_without_bearer, login_required
 import logging
 from app.services.emotion_service import get_emotion_results
-from app.services.llm_service import generate_response
+from app.services.llm_service import (
+    generate_response,
+    generate_response_stream,
+    get_emotion_opener,
+)
+from app.utils.metrics import span
+from app.utils.pagination import parse_page_size
 
 logging.basicConfig(level=logging.INFO)
 
@@ -93,9 +101,16 @@ def get_chat(chatroom_id):
         if not user_id:
             return jsonify({"error": "인증이 필요합니다."}), 401
 
-        limit = int(request.args.get("limit", 10))
-        history = get_user_chatroom_history(user_id, chatroom_id, limit)
+        # cursor: 이전 응답의 next_cursor → 그보다 오래된 대화 limit개
+        limit = parse_page_size(request.args.get("limit"), default=10)
+        history = get_user_chatroom_history(
+            user_id, chatroom_id, limit, before=request.args.get("cursor")
+        )
         return jsonify(history), 200
+    except BadRequest as e:
+        return jsonify({"error": e.description}), 400
+    except NotFound as e:
+        return jsonify({"error": e.description}), 404
     except Exception as e:
         return jsonify({"error": "서버 내부 오류"}), 500
 
@@ -111,8 +126,19 @@ def get_chat_history(user_id):
         return jsonify({"error": "잘못된 사용자 ID입니다."}), 403
 
     try:
+        # limit 또는 cursor가 있으면 최근 대화 순으로 한 페이지씩 (next_cursor로 다음 페이지)
+        if "limit" in request.args or "cursor" in request.args:
+            page = get_user_chatroom_page(
+                user_id,
+                parse_page_size(request.args.get("limit")),
+                cursor=request.args.get("cursor"),
+            )
+            return jsonify(page), 200
+
         chatrooms = get_user_chat_history(user_id)
         return jsonify({"chatrooms": chatrooms}), 200
+    except BadRequest as e:
+        return jsonify({"error": e.description}), 400
     except Exception as e:
         print(f"[ERROR] 채팅방 조회 중 오류 발생 (user_id={user_id}): {e}")
         return jsonify({"error": "채팅방 조회 중 오류가 발생했습니다."}), 500
@@ -226,6 +252,28 @@ def chat_rag_response():
         return jsonify({"error": str(e)}), 500
 
 
+def resolve_message_emotion(user_id, chatroom_id, emotion_id, user_message):
+    """
+    채팅방 감정 분석 결과를 조회하여 감정/신뢰도와 감정이 반영된 사용자 메시지 반환
+
+    :return: (감정 레이블, 신뢰도, 사용자 메시지)
+    """
+    emotion_label = "neutral"  # 기본값 설정
+    confidence = 0.5  # 기본값 설정
+    if emotion_id:
+        emotion_data = get_emotion_results(chatroom_id, user_id)
+        if emotion_data and emotion_data["most_common"]["emotion"] != "default":
+            emotion_label = emotion_data["most_common"]["emotion"]
+            confidence = emotion_data["most_common"]["confidence"]
+            user_message = modify_message_based_on_emotion(user_message, emotion_label)
+    return emotion_label, confidence, user_message
+
+
+def sse_event(event, data):
+    """Server-Sent Events 메시지 포맷"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
 @chat_bp.route("/emotion-chat", methods=["POST"])
 @jwt_required_without_bearer
 def chat_with_emotion():
@@ -252,18 +300,17 @@ def chat_with_emotion():
             logging.error("user_message가 누락되었습니다.")
             return jsonify({"error": "user_message가 누락되었습니다."}), 400
 
+        # 감정만 바뀐 빈 메시지 턴은 미리 만든 첫마디로 응답 (LLM 호출 생략)
+        opener = get_emotion_opener(user_id, chatroom_id, user_message)
+
         # 감정 데이터 처리
-        emotion_label = "neutral"  # 기본값 설정
-        confidence = 0.5  # 기본값 설정
-        if emotion_id:
-            emotion_data = get_emotion_results(chatroom_id, user_id)
-            if emotion_data and emotion_data["most_common"]["emotion"] != "default":
-                emotion_label = emotion_data["most_common"]["emotion"]
-                confidence = emotion_data["most_common"]["confidence"]
-                user_message = modify_message_based_on_emotion(user_message, emotion_label)
+        with span("emotion_results"):
+            emotion_label, confidence, user_message = resolve_message_emotion(
+                user_id, chatroom_id, emotion_id, user_message
+            )
 
         # 챗봇 응답 생성
-        bot_response = generate_response(
+        bot_response = opener or generate_response(
             user_id=user_id,
             chatroom_id=chatroom_id,
             user_message=user_message,
@@ -275,15 +322,16 @@ def chat_with_emotion():
             bot_response = modify_response_with_emotion(bot_response, emotion_label, confidence)
 
         # 대화 기록 저장
-        add_chat(
-            user_id=user_id,
-            chatroom_id=chatroom_id,
-            user_message=user_message,
-            bot_response=bot_response,
-            emotion_id=emotion_id,
-            confidence=confidence,
-            conversation_end=conversation_end,
-        )
+        with span("add_chat"):
+            add_chat(
+                user_id=user_id,
+                chatroom_id=chatroom_id,
+                user_message=user_message,
+                bot_response=bot_response,
+                emotion_id=emotion_id,
+                confidence=confidence,
+                conversation_end=conversation_end,
+            )
 
         return jsonify({
             "message": "대화가 저장되었습니다.",
@@ -297,6 +345,98 @@ def chat_with_emotion():
         return jsonify({"error": f"서버 내부 오류: {str(e)}"}), 500
 
 
+@chat_bp.route("/emotion-chat/stream", methods=["POST"])
+@jwt_required_without_bearer
+def chat_with_emotion_stream():
+    """
+    감정 기반 챗봇 응답 스트리밍 (Server-Sent Events)
+
+    이벤트 순서:
+    - token: {"text": 응답 조각} (감정 접두어가 있으면 가장 먼저 전송)
+    - done: {"bot_response", "emotion", "confidence", "emotion_id"} (대화 저장 완료 후)
+    - error: {"error": 오류 메시지}
+    """
+    user_id = request.user_id
+    if not user_id:
+        logging.error("인증된 사용자 ID가 없습니다.")
+        return jsonify({"error": "인증이 필요합니다."}), 401
+    data = request.get_json(silent=True)
+    if not data:
+        logging.error("전달된 JSON 데이터가 없습니다.")
+        return jsonify({"error": "JSON 데이터를 전달해야 합니다."}), 400
+
+    chatroom_id = data.get("chatroom_id")
+    user_message = data.get("user_message", "")
+    emotion_id = data.get("emotion_id", None)
+    conversation_end = data.get("conversation_end", False)
+
+    if not chatroom_id:
+        logging.error("chatroom_id가 누락되었습니다.")
+        return jsonify({"error": "chatroom_id가 누락되었습니다."}), 400
+    if user_message is None:
+        logging.error("user_message가 누락되었습니다.")
+        return jsonify({"error": "user_message가 누락되었습니다."}), 400
+
+    opener = get_emotion_opener(user_id, chatroom_id, user_message)
+
+    emotion_label, confidence, user_message = resolve_message_emotion(
+        user_id, chatroom_id, emotion_id, user_message
+    )
+
+    def generate():
+        try:
+            # 감정 반영 접두어 (신뢰도가 0.7 이상인 경우)는 LLM 응답 전에 바로 전송
+            prefix = ""
+            if emotion_label and confidence >= 0.7:
+                prefix = modify_response_with_emotion("", emotion_label, confidence)
+            if prefix:
+                yield sse_event("token", {"text": prefix})
+
+            parts = []
+            if opener:
+                parts.append(opener)
+                yield sse_event("token", {"text": opener})
+            else:
+                for text in generate_response_stream(
+                    user_id=user_id,
+                    chatroom_id=chatroom_id,
+                    user_message=user_message,
+                    retrieved_context="",
+                ):
+                    parts.append(text)
+                    yield sse_event("token", {"text": text})
+
+            bot_response = prefix + "".join(parts)
+
+            # 스트림이 끝나면 전체 응답을 대화 기록에 저장
+            add_chat(
+                user_id=user_id,
+                chatroom_id=chatroom_id,
+                user_message=user_message,
+                bot_response=bot_response,
+                emotion_id=emotion_id,
+                confidence=confidence,
+                conversation_end=conversation_end,
+            )
+
+            yield sse_event("done", {
+                "message": "대화가 저장되었습니다.",
+                "bot_response": bot_response,
+                "emotion": emotion_label,
+                "confidence": confidence,
+                "emotion_id": emotion_id,
+            })
+        except Exception as e:
+            logging.error(f"스트리밍 응답 중 오류: {e}")
+            yield sse_event("error", {"error": f"서버 내부 오류: {str(e)}"})
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @chat_bp.route("/chatroom/<chatroom_id>", methods=["DELETE"])
 @jwt_required_without_bearer
 def delete_chatroom(chatroom_id):
@@ -323,9 +463,10 @@ def delete_chatroom(chatroom_id):
 @jwt_required_without_bearer
 def search_chat_history():
     """
-    사용자의 채팅방 검색
+    사용자의 채팅방 검색 (일치 대화가 많은 채팅방 순, 채팅방별 스니펫 포함)
     요청 파라미터:
     - query: 검색어
+    - limit: 최대 채팅방 수 (기본값 20)
     """
     try:
         user_id = request.user_id
@@ -336,9 +477,12 @@ def search_chat_history():
         if not query:
             return jsonify({"error": "검색어가 필요합니다."}), 400
 
-        result = search_chatrooms(user_id, query)
+        result = search_chatrooms(user_id, query, parse_page_size(request.args.get("limit")))
         return jsonify({"chatrooms": result}), 200
 
+    except BadRequest as e:
+        return jsonify({"error": e.description}), 400
+
     except Exception as e:
         logging.error(f"채팅방 검색 중 오류 발생 (user_id={user_id}): {e}")
         return jsonify({"error": "서버 내부 오류"}), 500
@@ -8,12 +8,18 @@ from app.services.diary_service import (
     search_diary_by_keyword,
 )
 from app.services.diary_summary_service import generate_summary
+from app.services.summary_job_service import (
+    enqueue_summary_job,
+    get_summary_job,
+    serialize_job,
+)
 from app.services.emotion_service import (
     get_most_common_emotion, get_emotion_results
 )
 from datetime import datetime, timezone
 import logging
 from app.utils.auth import jwt_required_without_bearer
+from app.utils.metrics import span
 import pytz
 
 diary_bp = Blueprint("diary", __name__)
@@ -65,13 +71,18 @@ def summarize_and_save_diary():
             return jsonify({"error": summary[0]}), summary[1]
 
         # 감정 데이터를 가져와서 가장 많이 나타난 감정을 추출
-        emotion_data = get_emotion_results(chatroom_id, user_id)  
+        with span("emotion_results"):
+            emotion_data = get_emotion_results(chatroom_id, user_id)
         emotion_info = emotion_data.get("most_common", {"emotion": "neutral", "confidence": 0.5})  
         emotion = emotion_info.get("emotion") 
 
         # 일기 저장 (summary를 content로 사용)
-        diary_id = create_diary(user_id, chatroom_id, summary, date, emotion, summary)
+        with span("create_diary"):
+            diary_id, created = create_diary(user_id, chatroom_id, summary, date, emotion, summary)
 
+        if diary_id and not created:
+            # 채팅방 일기는 하나만 저장 → 이미 저장된 일기 반환
+            return jsonify({"message": "이미 저장된 일기가 있습니다.", "diary_id": str(diary_id), "summary": summary}), 200
         if diary_id:
             return jsonify({"message": "요약 및 일기 저장 성공!", "diary_id": str(diary_id), "summary": summary}), 201
         return jsonify({"message": "요약은 생성되었지만, 일기 저장 실패!"}), 400
@@ -81,6 +92,48 @@ def summarize_and_save_diary():
         return jsonify({"error": f"오류 발생: {str(e)}"}), 500
 
 
+# 일기 요약 작업 등록 (요약/저장은 워커가 처리, 결과는 작업 조회로 확인)
+@diary_bp.route("/summary/jobs", methods=["POST"])
+@jwt_required_without_bearer
+def enqueue_summary():
+    try:
+        user_id = request.user_id
+        data = request.get_json(silent=True) or {}
+        chatroom_id = data.get("chatroom_id")
+
+        date = data.get("date")
+        if not date:
+            date = datetime.now(KST).strftime("%Y-%m-%d")
+
+        if not chatroom_id:
+            return jsonify({"error": "chatroom_id가 필요합니다."}), 400
+
+        job, created = enqueue_summary_job(user_id, chatroom_id, date)
+        if job["user_id"] != user_id:
+            return jsonify({"error": "해당 대화방을 찾을 수 없습니다."}), 404
+
+        return jsonify({**serialize_job(job), "coalesced": not created}), 202
+
+    except Exception as e:
+        logging.error(f"[ERROR] /summary/jobs: {e}")
+        return jsonify({"error": f"오류 발생: {str(e)}"}), 500
+
+
+# 일기 요약 작업 상태 조회
+@diary_bp.route("/summary/jobs/<job_id>", methods=["GET"])
+@jwt_required_without_bearer
+def get_summary_job_status(job_id):
+    try:
+        job = get_summary_job(job_id, request.user_id)
+        if job is None:
+            return jsonify({"error": "작업을 찾을 수 없습니다."}), 404
+        return jsonify(serialize_job(job)), 200
+
+    except Exception as e:
+        logging.error(f"[ERROR] /summary/jobs/{job_id}: {e}")
+        return jsonify({"error": f"오류 발생: {str(e)}"}), 500
+
+
 # 일기 저장
 @diary_bp.route("/save", methods=["POST"])
 @jwt_required_without_bearer
@@ -96,8 +149,10 @@ def save_diary():
         if not content:
             return jsonify({"message": "일기 내용은 필수입니다!"}), 400
 
-        diary_id = create_diary(user_id, chatroom_id, content, date, emotion, summary)
+        diary_id, created = create_diary(user_id, chatroom_id, content, date, emotion, summary)
 
+        if diary_id and not created:
+            return jsonify({"message": "이미 저장된 일기가 있습니다.", "diary_id": str(diary_id)}), 200
         if diary_id:
             return (
                 jsonify({"message": "일기 저장 성공!", "diary_id": str(diary_id)}),
@@ -241,7 +296,7 @@ def create_diary_route():
         if not content:
             return jsonify({"message": "일기 내용은 필수입니다!"}), 400
 
-        diary_id = create_diary(
+        diary_id, created = create_diary(
             user_id,
             chatroom_id,
             content,
@@ -249,6 +304,8 @@ def create_diary_route():
             emotion,
         )
 
+        if diary_id and not created:
+            return jsonify({"message": "이미 저장된 일기가 있습니다.", "diary_id": str(diary_id)}), 200
         if diary_id:
             return (
                 jsonify({"message": "일기 작성 성공!", "diary_id": str(diary_id)}),
@@ -1,4 +1,6 @@
-from flask import Blueprint, jsonify, current_app
+from flask import Blueprint, Response, jsonify, current_app
+from app.services.llm_gateway import llm_gateway
+from app.utils.metrics import render_metrics
 
 home_bp = Blueprint("home", __name__)
 
@@ -9,3 +11,22 @@ def home():
     except Exception as e:
         current_app.logger.error(f"Error in home route: {str(e)}")
         raise  
+
+
+@home_bp.route("/llm-gateway/metrics", methods=["GET"])
+def llm_gateway_metrics():
+    """LLM 게이트웨이 대기열 길이, 대기 시간 등 지표"""
+    return jsonify(llm_gateway.metrics()), 200
+
+
+@home_bp.route("/metrics", methods=["GET"])
+def prometheus_metrics():
+    """Prometheus 형식 지표 (요청/구간별 지연 시간, 토큰 수, 캐시 적중, LLM 게이트웨이 상태)"""
+    gateway = llm_gateway.metrics()
+    gauges = {
+        "robotpet_llm_in_flight": ("실행 중인 LLM 호출 수", gateway["in_flight"]),
+        "robotpet_llm_queue_depth": ("LLM 대기열 길이", gateway["queue_depth"]),
+        "robotpet_llm_retries": ("LLM 재시도 누적 횟수", gateway["retries"]),
+        "robotpet_llm_coalesced": ("병합된 LLM 요청 누적 수", gateway["coalesced"]),
+    }
+    return Response(render_metrics(gauges), mimetype="text/plain; version=0.0.4")
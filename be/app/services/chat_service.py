@@ -4,6 +4,17 @@ from werkzeug.exceptions import NotFound, BadRequest
 from app.database import mongo
 from app.services.rag_service import retrieve_relevant_documents
 from app.services.llm_service import generate_response
+from app.services.history_service import schedule_summary_update
+from app.services.diary_summary_service import schedule_running_summary
+from app.services.message_store import (
+    append_message,
+    attach_recent_messages,
+    delete_messages,
+    load_messages,
+    recent_messages_pipeline,
+)
+from app.services.search_service import delete_search_entries, index_message, search_messages
+from app.utils.pagination import decode_cursor, encode_cursor
 from app.models.chat import save_chat
 from datetime import datetime, timezone, timedelta
 from flask import current_app
@@ -101,7 +112,9 @@ def end_chatroom(user_id: str, chatroom_id: str) -> dict:
     :return: 종료된 채팅방에 대한 메시지
     """
     try:
-        chatroom = mongo.db.chatrooms.find_one({"chatroom_id": chatroom_id, "user_id": user_id})
+        chatroom = mongo.db.chatrooms.find_one(
+            {"chatroom_id": chatroom_id, "user_id": user_id}, {"_id": 0, "conversation_end": 1}
+        )
         
         if not chatroom:
             raise NotFound(f"사용자의 채팅방을 찾을 수 없습니다.")
@@ -124,6 +137,9 @@ def end_chatroom(user_id: str, chatroom_id: str) -> dict:
         
         if result.modified_count == 0:
             return {"error": f"채팅방 {chatroom_id}을 찾을 수 없습니다."}
+
+        # 남은 대화를 메모에 합치고 일기를 미리 생성
+        schedule_running_summary(chatroom_id)
         
         return {"message": "채팅방 종료 완료"}
     
@@ -144,7 +160,10 @@ def get_chat_end_status_service(user_id, chatroom_id):
     :return: 채팅방 종료 상태 및 감정 데이터
     """
     try:
-        chatroom = mongo.db.chatrooms.find_one({"chatroom_id": chatroom_id, "user_id": user_id})
+        chatroom = mongo.db.chatrooms.find_one(
+            {"chatroom_id": chatroom_id, "user_id": user_id},
+            {"_id": 0, "conversation_end": 1, "conversation_end_timestamp": 1},
+        )
 
         if not chatroom:
             return {"error": "채팅방을 찾을 수 없습니다."}, 404
@@ -188,13 +207,18 @@ def create_chatroom(user_id: str) -> str:
     try:
         chatroom_id = str(uuid.uuid4())
         # UTC → KST 변환
-        timestamp = datetime.now(KST).strftime("%Y%m%d%H%M%S")  
+        kst_now = datetime.now(KST)
+        timestamp = kst_now.strftime("%Y%m%d%H%M%S")  
         
         chatroom_data = {
             "user_id": user_id,
             "chatroom_id": chatroom_id,
             "timestamp": timestamp,
-            "conversation_end": False
+            "conversation_end": False,
+            "message_count": 0,
+            "created_at": kst_now.isoformat(),
+            # 채팅방 목록 페이지네이션 정렬 키 (대화가 없어도 목록에 나오도록)
+            "updated_at": kst_now.isoformat(),
         }
 
         mongo.db.chatrooms.insert_one(chatroom_data)
@@ -207,6 +231,84 @@ def create_chatroom(user_id: str) -> str:
         raise RuntimeError(f"채팅방 생성 중 오류 발생: {e}")
 
 
+CHATROOM_SUMMARY_FIELDS = {"_id": 0, "chatroom_id": 1, "timestamp": 1, "conversation_end": 1, "updated_at": 1}
+
+
+def format_chatroom_summary(chatroom):
+    """채팅방 목록 응답 형식으로 변환"""
+    timestamp = chatroom.get("timestamp")
+
+    # timestamp가 문자열이라면 datetime 객체로 변환
+    if isinstance(timestamp, str) and len(timestamp) == 14:
+        timestamp = datetime.strptime(timestamp, "%Y%m%d%H%M%S")
+
+    return {
+        "chatroom_id": chatroom["chatroom_id"],
+        "timestamp": timestamp.isoformat() if timestamp else None,  # ISO 형식 변환
+        "conversation_end": chatroom.get("conversation_end", False),
+        "updated_at": chatroom.get("updated_at")
+    }
+
+
+def chatroom_page_filter(user_id, after):
+    """
+    (updated_at, chatroom_id) 내림차순에서 커서 다음 채팅방 조건
+
+    BSON 정렬 순서(null < 문자열 < 날짜)를 따라 내림차순이면 날짜 → 문자열 → 값 없음 순서
+    :param after: 이전 페이지 마지막 채팅방의 [updated_at, chatroom_id] (첫 페이지면 None)
+    """
+    query = {"user_id": user_id}
+    if after is None:
+        return query
+
+    if not isinstance(after, list) or len(after) != 2:
+        raise BadRequest("유효하지 않은 cursor입니다.")
+    updated_at, chatroom_id = after
+    if updated_at is None:
+        query.update({"updated_at": None, "chatroom_id": {"$lt": chatroom_id}})
+        return query
+
+    conditions = [
+        {"updated_at": {"$lt": updated_at}},
+        {"updated_at": updated_at, "chatroom_id": {"$lt": chatroom_id}},
+        {"updated_at": None},
+    ]
+    if isinstance(updated_at, datetime):
+        conditions.append({"updated_at": {"$type": "string"}})
+    query["$or"] = conditions
+    return query
+
+
+def get_user_chatroom_page(user_id: str, limit: int, cursor: str = None) -> dict:
+    """
+    사용자의 채팅방 목록을 최근 대화 순으로 한 페이지씩 조회 (keyset 페이지네이션)
+
+    :param user_id: 사용자의 고유 ID
+    :param limit: 페이지 크기
+    :param cursor: 이전 응답의 next_cursor (첫 페이지면 None)
+    :return: {"chatrooms": [...], "next_cursor": 다음 페이지 커서 또는 None}
+    """
+    after = decode_cursor("chatrooms", cursor)
+
+    # 다음 페이지 존재 여부 확인을 위해 하나 더 조회
+    chatrooms = list(
+        mongo.db.chatrooms.find(chatroom_page_filter(user_id, after), CHATROOM_SUMMARY_FIELDS)
+        .sort([("updated_at", pymongo.DESCENDING), ("chatroom_id", pymongo.DESCENDING)])
+        .limit(limit + 1)
+    )
+    has_more = len(chatrooms) > limit
+    chatrooms = chatrooms[:limit]
+
+    next_cursor = None
+    if has_more:
+        last = chatrooms[-1]
+        next_cursor = encode_cursor("chatrooms", [last.get("updated_at"), last["chatroom_id"]])
+    return {
+        "chatrooms": [format_chatroom_summary(chatroom) for chatroom in chatrooms],
+        "next_cursor": next_cursor,
+    }
+
+
 def get_user_chat_history(user_id: str) -> list:
     """
     특정 사용자의 모든 채팅방을 조회하는 함수
@@ -214,30 +316,17 @@ def get_user_chat_history(user_id: str) -> list:
     :return: 사용자의 채팅방 목록
     """
     try:
-        chatrooms = list(mongo.db.chatrooms.find({"user_id": user_id}))
+        # 목록에 필요한 필드만 조회 (대화 내용은 가져오지 않음)
+        chatrooms = list(mongo.db.chatrooms.find(
+            {"user_id": user_id},
+            CHATROOM_SUMMARY_FIELDS,
+        ))
 
         if not chatrooms:
             print(f"[DEBUG] 사용자 {user_id}의 기존 채팅방이 없음.")
             return []
 
-        result = []
-        for chatroom in chatrooms:
-            timestamp = chatroom.get("timestamp")
-
-            # timestamp가 문자열이라면 datetime 객체로 변환
-            if isinstance(timestamp, str) and len(timestamp) == 14:
-                timestamp = datetime.strptime(timestamp, "%Y%m%d%H%M%S")
-            
-            print(f"[DEBUG] 채팅방 ID: {chatroom['chatroom_id']}, timestamp: {timestamp}")
-
-            result.append({
-                "chatroom_id": chatroom["chatroom_id"],
-                "timestamp": timestamp.isoformat() if timestamp else None,  # ISO 형식 변환
-                "conversation_end": chatroom["conversation_end"],
-                "updated_at": chatroom.get("updated_at")
-            })
-
-        return result
+        return [format_chatroom_summary(chatroom) for chatroom in chatrooms]
 
     except Exception as e:
         print(f"[ERROR] 채팅방 조회 오류 (user_id={user_id}): {e}")
@@ -276,39 +365,33 @@ def add_chat(user_id, chatroom_id, user_message, bot_response, emotion_id=None,
             "timestamp": kst_now.isoformat(),  
         }
         
-        existing_chatroom = mongo.db.chatrooms.find_one({"chatroom_id": chatroom_id})
-
-        # 채팅방이 없으면 새로운 채팅방 생성
-        if not existing_chatroom:
-            print(f"새로운 채팅방 생성: {chatroom_id}")
-            chatroom_data = {
+        room_updates = {
+            "updated_at": kst_now.isoformat(),
+            "conversation_end": conversation_end,
+        }
+        # 종료 메시지면 종료 시각도 함께 기록
+        # (conversation_end를 먼저 True로 바꾼 뒤 end_chatroom을 호출하면 '이미 종료'로 처리되어 시각이 남지 않음)
+        if conversation_end:
+            room_updates["conversation_end_timestamp"] = kst_now.isoformat()
+
+        # 대화는 chat_buckets에 저장하고 채팅방 문서에는 대화 수와 상태만 기록 (없으면 채팅방 생성)
+        seq = append_message(
+            user_id,
+            chatroom_id,
+            chat_data,
+            room_updates,
+            room_defaults={
                 "user_id": user_id,
-                "chatroom_id": chatroom_id,
-                "chats": [chat_data],
-                "created_at": kst_now.isoformat(),  
-                "updated_at": kst_now.isoformat(),  
-                "conversation_end": conversation_end
-            }
-            mongo.db.chatrooms.insert_one(chatroom_data)
-        else:
-            # 기존 채팅방에 메시지 추가
-            update_result = mongo.db.chatrooms.update_one(
-                {"chatroom_id": chatroom_id},
-                {
-                    "$push": {"chats": chat_data},
-                    "$set": {
-                        "updated_at": kst_now.isoformat(), 
-                        "conversation_end": conversation_end
-                    }
-                }
-            )
+                "created_at": kst_now.isoformat(),
+            },
+        )
+        # 대화 검색 색인
+        index_message(user_id, chatroom_id, seq, chat_data)
 
-            if update_result.modified_count == 0:
-                raise ValueError("메시지 추가 실패")
-            
-        # conversation_end가 True이면 채팅방 종료 처리 호출
-        if conversation_end:
-            end_chatroom(chatroom_id)
+        # 오래된 대화가 쌓이면 백그라운드에서 누적 요약 갱신
+        schedule_summary_update(chatroom_id)
+        # 일기용 누적 메모 갱신 (RUNNING_SUMMARY_ENABLED일 때만)
+        schedule_running_summary(chatroom_id)
 
         return True
 
@@ -350,7 +433,7 @@ def is_valid_uuid(uuid_string):
     
 
 def handle_message(user_id, chatroom_id, user_message, bot_response, conversation_end):
-    chatroom_data = mongo.db.chatrooms.find_one({"chatroom_id": chatroom_id})
+    chatroom_data = mongo.db.chatrooms.find_one({"chatroom_id": chatroom_id}, {"_id": 1})
     
     if chatroom_data is None:
         chatroom_data = {
@@ -388,15 +471,20 @@ def get_chat_history(user_id, limit=10):
     :return: 대화 기록 리스트
     """
     try:
-        chatrooms = mongo.db.chatrooms.find({"user_id": user_id})
+        # 채팅방별 최근 limit개 대화만 조회 (필요한 버킷 / chats 배열의 $slice)
+        chatrooms = list(mongo.db.chatrooms.aggregate(
+            recent_messages_pipeline({"user_id": user_id}, limit)
+        ))
 
         if not chatrooms:
             raise NotFound(f"사용자의 채팅방을 찾을 수 없습니다.")
 
+        attach_recent_messages(chatrooms, limit)
+
         chat_history = []
         for chatroom in chatrooms:
             chatroom_id = chatroom.get("chatroom_id")
-            chats = chatroom.get("chats", [])
+            chats = chatroom["chats"]
 
             # 각 채팅방에서 최대 limit 개수의 대화만 가져옴
             chat_history.extend([
@@ -420,21 +508,46 @@ def get_chat_history(user_id, limit=10):
         raise RuntimeError("대화 기록 조회 중 오류 발생")
 
 
-def get_user_chatroom_history(user_id, chatroom_id, limit):
-    """특정 사용자의 특정 채팅방 대화 기록을 조회"""
+def get_user_chatroom_history(user_id, chatroom_id, limit, before=None):
+    """
+    특정 사용자의 특정 채팅방 대화 기록을 조회
+
+    :param limit: 가져올 대화 수
+    :param before: 이전 응답의 next_cursor (이 대화보다 오래된 대화를 조회, 없으면 최근 대화)
+    :return: {"chats", "conversationEnd", "next_cursor": 더 오래된 대화 페이지 커서 또는 None}
+    """
     try:
-        # print(f"[DEBUG] user_id: {user_id}, chatroom_id: {chatroom_id}")  
-        chatroom = mongo.db.chatrooms.find_one(
-            {"user_id": user_id, "chatroom_id": chatroom_id}
-        )
-        
-        if not chatroom:
-            raise NotFound(f"사용자의 채팅방을 찾을 수 없습니다.")
-        
-        chats = chatroom.get("chats", [])
-        conversation_end = chatroom.get("conversation_end", False)
-        
-        return {"chats": chats[-limit:], "conversationEnd": conversation_end}
+        end = decode_cursor("messages", before)
+        if end is not None and not isinstance(end, int):
+            raise BadRequest("유효하지 않은 cursor입니다.")
+
+        if end is None:
+            # 종료 여부와 최근 limit개 대화만 조회 (전체 대화를 가져와 자르지 않음)
+            chatrooms = list(mongo.db.chatrooms.aggregate(recent_messages_pipeline(
+                {"user_id": user_id, "chatroom_id": chatroom_id}, limit, fields=("conversation_end",)
+            )))
+            if not chatrooms:
+                raise NotFound(f"사용자의 채팅방을 찾을 수 없습니다.")
+
+            chatroom = attach_recent_messages(chatrooms, limit)[0]
+            chats = chatroom["chats"]
+            start = max(chatroom["count"] - limit, 0)
+        else:
+            # seq 구간 [end - limit, end)가 들어 있는 버킷만 조회
+            chatroom = mongo.db.chatrooms.find_one(
+                {"user_id": user_id, "chatroom_id": chatroom_id}, {"_id": 0, "conversation_end": 1}
+            )
+            if not chatroom:
+                raise NotFound(f"사용자의 채팅방을 찾을 수 없습니다.")
+
+            start = max(end - limit, 0)
+            chats = load_messages(chatroom_id, start, end)
+
+        return {
+            "chats": chats,
+            "conversationEnd": chatroom.get("conversation_end", False),
+            "next_cursor": encode_cursor("messages", start) if start > 0 else None,
+        }
 
     except Exception as e:
         print(f"[ERROR] 대화 기록 조회 오류: {e}")
@@ -454,6 +567,9 @@ def delete_chatroom_service(user_id: str, chatroom_id: str) -> bool:
         # 삭제된 문서가 없는 경우
         if result.deleted_count == 0:
             raise NotFound("채팅방을 찾을 수 없습니다.")
+
+        delete_messages(chatroom_id)
+        delete_search_entries(chatroom_id)
         
         return True
 
@@ -465,35 +581,45 @@ def delete_chatroom_service(user_id: str, chatroom_id: str) -> bool:
         logging.error(f"[ERROR] 채팅방 삭제 중 예기치 않은 오류 발생 (user_id={user_id}, chatroom_id={chatroom_id}): {e}")
         return False
     
-def search_chatrooms(user_id: str, query: str) -> list:
+def search_chatrooms(user_id: str, query: str, limit: int = 20) -> list:
     """
-    사용자의 채팅방을 검색하는 서비스 로직
+    사용자의 채팅방을 검색하는 서비스 로직 (대화 검색 색인 사용, 일치 대화가 많은 채팅방 순)
     :param user_id: 사용자 ID
     :param query: 검색어
-    :return: 검색된 채팅방 목록
+    :param limit: 최대 채팅방 수
+    :return: 검색된 채팅방 목록 (일치 대화 수, 스니펫 포함)
     """
     try:
         if not query.strip():
             raise BadRequest("검색어가 비어 있습니다.")
 
-        chatrooms = list(mongo.db.chatrooms.find({
-            "user_id": user_id,
-            "$or": [
-                {"chatroom_id": {"$regex": query, "$options": "i"}},
-                {"chats": {"$elemMatch": {"user_message": {"$regex": ".*" + query + ".*", "$options": "i"}}}}
-            ]
-        }))
+        hits = search_messages(user_id, query, limit)
+        # 채팅방 ID를 그대로 입력한 경우 맨 앞에 포함
+        if not any(hit["chatroom_id"] == query for hit in hits):
+            if mongo.db.chatrooms.find_one({"user_id": user_id, "chatroom_id": query}, {"_id": 1}):
+                hits = [{"chatroom_id": query, "hits": 0, "snippets": []}] + hits[: limit - 1]
+
+        chatrooms = {
+            chatroom["chatroom_id"]: chatroom
+            for chatroom in mongo.db.chatrooms.find(
+                {"user_id": user_id, "chatroom_id": {"$in": [hit["chatroom_id"] for hit in hits]}},
+                {"_id": 0, "chatroom_id": 1, "timestamp": 1, "conversation_end": 1},
+            )
+        }
 
+        # 색인에만 남아 있는 삭제된 채팅방은 제외
         result = [
             {
-                "chatroom_id": chatroom["chatroom_id"],
-                "timestamp": chatroom["timestamp"],
-                "conversation_end": chatroom["conversation_end"]
+                "chatroom_id": hit["chatroom_id"],
+                "timestamp": chatrooms[hit["chatroom_id"]].get("timestamp"),
+                "conversation_end": chatrooms[hit["chatroom_id"]].get("conversation_end", False),
+                "hits": hit["hits"],
+                "snippets": hit["snippets"],
             }
-            for chatroom in chatrooms
+            for hit in hits
+            if hit["chatroom_id"] in chatrooms
         ]
 
-        print(f"[DEBUG] 검색 결과: {result}") 
         return result
 
     except BadRequest as e:
@@ -0,0 +1,133 @@
+"""
+# 채팅방별 대화 상태(직전 감정 등) 저장소
+
+- InMemoryStateStore: 프로세스 내 LRU + TTL (채팅방 수 상한으로 메모리 일정 유지)
+- RedisStateStore: 여러 Gunicorn 워커가 같은 상태를 보도록 Redis 해시에 저장
+  (짧은 필드명 + 작은 해시라 Redis가 listpack으로 압축 저장, 키마다 EXPIRE)
+
+CHAT_STATE_BACKEND 설정으로 선택 ('memory' 또는 'redis')
+"""
+
+import os
+import time
+import threading
+from collections import OrderedDict
+
+from config.settings import ActiveConfig
+
+# 상태 필드 ↔ Redis 해시 필드 (짧은 이름으로 저장)
+_FIELD_ALIASES = {"emotion": "e", "confidence": "c"}
+_FIELD_NAMES = {alias: name for name, alias in _FIELD_ALIASES.items()}
+
+
+class InMemoryStateStore:
+    """
+    프로세스 내 대화 상태 저장소 (LRU + TTL)
+
+    :param max_rooms: 보관할 최대 채팅방 수 (초과 시 가장 오래 사용하지 않은 방부터 제거)
+    :param ttl: 마지막 갱신 후 상태 유지 시간(초)
+    """
+
+    def __init__(self, max_rooms=10000, ttl=86400):
+        self.max_rooms = max_rooms
+        self.ttl = ttl
+        self._states = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, chatroom_id):
+        """채팅방 상태 조회 (없거나 만료되면 None)"""
+        with self._lock:
+            item = self._states.get(chatroom_id)
+            if item is None:
+                return None
+            expires_at, state = item
+            if expires_at <= time.time():
+                del self._states[chatroom_id]
+                return None
+            self._states.move_to_end(chatroom_id)
+            return dict(state)
+
+    def set(self, chatroom_id, state):
+        """채팅방 상태 저장 (TTL 갱신)"""
+        with self._lock:
+            self._states[chatroom_id] = (time.time() + self.ttl, dict(state))
+            self._states.move_to_end(chatroom_id)
+            while len(self._states) > self.max_rooms:
+                self._states.popitem(last=False)
+
+    def delete(self, chatroom_id):
+        with self._lock:
+            self._states.pop(chatroom_id, None)
+
+    def __len__(self):
+        return len(self._states)
+
+
+class RedisStateStore:
+    """
+    Redis 해시 기반 대화 상태 저장소 (워커 간 공유)
+
+    :param client: redis 클라이언트
+    :param ttl: 마지막 갱신 후 상태 유지 시간(초)
+    :param prefix: 키 접두사
+    """
+
+    def __init__(self, client, ttl=86400, prefix="cs:"):
+        self.client = client
+        self.ttl = ttl
+        self.prefix = prefix
+
+    def _key(self, chatroom_id):
+        return f"{self.prefix}{chatroom_id}"
+
+    @staticmethod
+    def _encode(state):
+        encoded = {}
+        for name, value in state.items():
+            if name == "confidence":
+                value = f"{float(value or 0):.4f}"
+            encoded[_FIELD_ALIASES.get(name, name)] = "" if value is None else str(value)
+        return encoded
+
+    @staticmethod
+    def _decode(raw):
+        state = {}
+        for field, value in raw.items():
+            field = field.decode() if isinstance(field, bytes) else field
+            value = value.decode() if isinstance(value, bytes) else value
+            name = _FIELD_NAMES.get(field, field)
+            state[name] = float(value) if name == "confidence" else value
+        return state
+
+    def get(self, chatroom_id):
+        raw = self.client.hgetall(self._key(chatroom_id))
+        return self._decode(raw) if raw else None
+
+    def set(self, chatroom_id, state):
+        key = self._key(chatroom_id)
+        pipe = self.client.pipeline()
+        pipe.delete(key)
+        pipe.hset(key, mapping=self._encode(state))
+        pipe.expire(key, self.ttl)
+        pipe.execute()
+
+    def delete(self, chatroom_id):
+        self.client.delete(self._key(chatroom_id))
+
+
+def create_state_store():
+    """설정(CHAT_STATE_BACKEND)에 맞는 대화 상태 저장소 생성"""
+    if ActiveConfig.CHAT_STATE_BACKEND == "redis":
+        import redis
+
+        client = redis.StrictRedis(
+            host=os.getenv("REDIS_HOST", "localhost"),
+            port=int(os.getenv("REDIS_PORT", 6379)),
+            db=int(os.getenv("REDIS_DB", 0)),
+        )
+        print("대화 상태 저장소: Redis")
+        return RedisStateStore(client, ttl=ActiveConfig.CHAT_STATE_TTL)
+
+    return InMemoryStateStore(
+        max_rooms=ActiveConfig.CHAT_STATE_MAX_ROOMS, ttl=ActiveConfig.CHAT_STATE_TTL
+    )
@@ -0,0 +1,329 @@
+"""
+# 종료된 채팅방 일기 일괄 생성 (야간 배치)
+
+대화형 요청 경로 밖에서 요약 비용을 처리
+1. 종료됐지만 일기가 없는 채팅방을 한 번에 조회
+2. 요약 프롬프트를 일괄 생성 (요약 캐시가 있으면 재사용)
+3. 요약 호출
+   - parallel: 동시 호출 수를 제한한 스레드 풀 (llm_gateway 경유)
+   - openai_batch: OpenAI Batch API에 JSONL로 제출 후 완료까지 대기 (비용 절감, 최대 24시간)
+     토큰 한도를 넘는 긴 대화는 조각별 메모가 필요하므로 parallel로 처리
+4. 감정 결과를 한 번에 조회해서 일기를 insert_many로 저장
+   diaries.chatroom_id unique 인덱스로 다른 배치/요약 작업이 먼저 저장한 채팅방은 건너뜀
+
+실행: flask --app app.py diary batch-summarize
+"""
+
+import io
+import os
+import json
+import time
+import logging
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import pytz
+from openai import OpenAI
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+
+from app.database import mongo
+from app.services.diary_summary_service import (
+    SUMMARY_COMPLETION_PARAMS,
+    build_conversation_text,
+    build_summary_messages,
+    build_long_summary_prompt,
+    build_summary_prompt,
+    clean_summary,
+    count_tokens,
+    get_cached_summary,
+    running_notes_if_current,
+    summary_cache_key,
+    summary_cache_update,
+)
+from app.services.emotion_service import summarize_emotions
+from app.services.message_store import load_messages_for_rooms
+from app.services.llm_gateway import llm_gateway
+from config.settings import ActiveConfig
+
+KST = pytz.timezone("Asia/Seoul")
+
+
+def find_pending_chatrooms(limit):
+    """종료됐지만 일기가 없는 채팅방 (대화 내용, 요약 캐시, 누적 메모만 조회)"""
+    pipeline = [
+        {
+            "$match": {
+                "conversation_end": True,
+                "$or": [{"message_count": {"$gt": 0}}, {"chats.0": {"$exists": True}}],
+            }
+        },
+        {
+            "$lookup": {
+                "from": "diaries",
+                "let": {"chatroom_id": "$chatroom_id"},
+                "pipeline": [
+                    {"$match": {"$expr": {"$eq": ["$chatroom_id", "$$chatroom_id"]}}},
+                    {"$limit": 1},
+                    {"$project": {"_id": 1}},
+                ],
+                "as": "diary",
+            }
+        },
+        {"$match": {"diary": {"$size": 0}}},
+        {"$limit": limit},
+        {
+            "$project": {
+                "_id": 0,
+                "user_id": 1,
+                "chatroom_id": 1,
+                "created_at": 1,
+                "summary_cache": 1,
+                "running_summary": 1,
+                "running_summary_upto": 1,
+                "running_summary_digest": 1,
+            }
+        },
+    ]
+    chatrooms = list(mongo.db.chatrooms.aggregate(pipeline))
+
+    # 대화는 채팅방별 버킷을 한 번에 조회해서 붙임
+    messages = load_messages_for_rooms([chatroom["chatroom_id"] for chatroom in chatrooms])
+    for chatroom in chatrooms:
+        chatroom["chats"] = messages.get(chatroom["chatroom_id"], [])
+    return chatrooms
+
+
+def build_batch_items(chatrooms):
+    """
+    채팅방별 요약 요청 생성
+
+    :return: (LLM 호출이 필요한 항목, 캐시로 이미 요약이 있는 항목)
+    """
+    pending, cached = [], []
+    for chatroom in chatrooms:
+        conversation_text = build_conversation_text(chatroom.get("chats", []))
+        if not conversation_text.strip():
+            continue
+        # 대화 중에 쌓아 둔 메모가 모든 대화를 반영하고 있으면 메모로 요약
+        notes = (
+            running_notes_if_current(chatroom, chatroom["chats"])
+            if ActiveConfig.RUNNING_SUMMARY_ENABLED
+            else None
+        )
+        prompt = build_summary_prompt(notes or conversation_text)
+        cache_key = summary_cache_key(prompt)
+        item = {
+            "user_id": chatroom["user_id"],
+            "chatroom_id": chatroom["chatroom_id"],
+            "created_at": chatroom.get("created_at"),
+            "prompt": prompt,
+            "cache_key": cache_key,
+            "long": notes is None
+            and count_tokens(conversation_text) > ActiveConfig.SUMMARY_MAX_INPUT_TOKENS,
+            "chats": chatroom.get("chats", []),
+            "summary": get_cached_summary(chatroom, cache_key),
+        }
+        (cached if item["summary"] is not None else pending).append(item)
+    return pending, cached
+
+
+def summarize_parallel(client, items, concurrency):
+    """스레드 풀로 요약 호출 (동시 호출 수 제한, 재시도는 llm_gateway에서 처리)"""
+
+    def summarize(item):
+        try:
+            prompt = item["prompt"]
+            if item["long"]:
+                # 긴 대화는 조각별 메모로 줄인 뒤 요약
+                prompt, _ = build_long_summary_prompt(client, item["chats"])
+            response = llm_gateway.call(
+                lambda: client.chat.completions.create(
+                    messages=build_summary_messages(prompt), **SUMMARY_COMPLETION_PARAMS
+                ),
+                key=("summary", item["chatroom_id"]),
+            )
+            item["summary"] = clean_summary(response.choices[0].message.content)
+        except Exception as e:
+            logging.error(f"[ERROR] 일괄 요약 실패 - 대화방 ID: {item['chatroom_id']}: {e}")
+
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="diary-batch") as pool:
+        list(pool.map(summarize, items))
+
+
+def summarize_openai_batch(client, items, poll_seconds, timeout):
+    """
+    OpenAI Batch API로 요약 요청을 한 번에 제출하고 결과를 기다림
+
+    프롬프트를 그대로 보내므로 긴 대화(item["long"])는 넣지 않음 → summarize_parallel
+    """
+    lines = [
+        json.dumps(
+            {
+                "custom_id": item["chatroom_id"],
+                "method": "POST",
+                "url": "/v1/chat/completions",
+                "body": {
+                    "messages": build_summary_messages(item["prompt"]),
+                    **SUMMARY_COMPLETION_PARAMS,
+                },
+            },
+            ensure_ascii=False,
+        )
+        for item in items
+    ]
+    batch_file = client.files.create(
+        file=("diary_summaries.jsonl", io.BytesIO("\n".join(lines).encode("utf-8"))),
+        purpose="batch",
+    )
+    batch = client.batches.create(
+        input_file_id=batch_file.id,
+        endpoint="/v1/chat/completions",
+        completion_window="24h",
+    )
+    logging.info(f"[INFO] OpenAI 배치 제출 - batch_id: {batch.id}, 요청 {len(items)}개")
+
+    deadline = time.monotonic() + timeout
+    while batch.status not in ("completed", "failed", "expired", "cancelled"):
+        if time.monotonic() > deadline:
+            raise TimeoutError(f"OpenAI 배치 대기 시간 초과 - batch_id: {batch.id}")
+        time.sleep(poll_seconds)
+        batch = client.batches.retrieve(batch.id)
+
+    if batch.status != "completed" or not batch.output_file_id:
+        raise RuntimeError(f"OpenAI 배치 실패 - batch_id: {batch.id}, 상태: {batch.status}")
+
+    items_by_id = {item["chatroom_id"]: item for item in items}
+    for line in client.files.content(batch.output_file_id).text.splitlines():
+        if not line.strip():
+            continue
+        result = json.loads(line)
+        item = items_by_id.get(result.get("custom_id"))
+        body = (result.get("response") or {}).get("body") or {}
+        if item is None or result.get("error") or not body.get("choices"):
+            logging.error(f"[ERROR] 배치 요약 실패 - 대화방 ID: {result.get('custom_id')}")
+            continue
+        item["summary"] = clean_summary(body["choices"][0]["message"]["content"])
+
+
+def load_most_common_emotions(chatroom_ids):
+    """채팅방별 가장 많이 나온 감정 (한 번의 조회로 묶어서 계산)"""
+    docs_by_room = defaultdict(list)
+    for doc in mongo.db.emotions.find(
+        {"chatroom_id": {"$in": chatroom_ids}},
+        {"_id": 0, "chatroom_id": 1, "emotion": 1, "confidence": 1, "timestamp": 1},
+    ):
+        docs_by_room[doc["chatroom_id"]].append(doc)
+    return {
+        chatroom_id: summarize_emotions(docs_by_room.get(chatroom_id, []))["most_common"]["emotion"]
+        for chatroom_id in chatroom_ids
+    }
+
+
+def diary_date(item, now):
+    """일기 날짜: 채팅방 생성일(KST), 없으면 실행일"""
+    created_at = item.get("created_at")
+    if isinstance(created_at, str) and len(created_at) >= 10:
+        return created_at[:10]
+    return now.strftime("%Y-%m-%d")
+
+
+def run_diary_batch(limit=None, concurrency=None, mode=None):
+    """
+    종료된 채팅방의 일기를 일괄 생성
+
+    :param limit: 한 번에 처리할 최대 채팅방 수
+    :param concurrency: parallel 모드 동시 호출 수
+    :param mode: 'parallel' 또는 'openai_batch'
+    :return: 처리 결과 통계
+    """
+    limit = limit or ActiveConfig.DIARY_BATCH_SIZE
+    concurrency = concurrency or ActiveConfig.DIARY_BATCH_CONCURRENCY
+    mode = mode or ActiveConfig.DIARY_BATCH_MODE
+
+    chatrooms = find_pending_chatrooms(limit)
+    pending, cached = build_batch_items(chatrooms)
+    logging.info(
+        f"[INFO] 일기 배치 시작 - 대상 {len(chatrooms)}개, 요약 필요 {len(pending)}개, "
+        f"캐시 {len(cached)}개, 모드: {mode}"
+    )
+
+    if pending:
+        # parallel 모드는 재시도를 llm_gateway에서 처리
+        client = OpenAI(
+            api_key=os.getenv("OPENAI_API_KEY"), max_retries=0 if mode == "parallel" else 2
+        )
+        if mode == "openai_batch":
+            # 긴 대화는 조각별 메모로 줄이는 중간 호출이 필요해서 배치에 넣을 수 없음
+            long_items = [item for item in pending if item["long"]]
+            batch_items = [item for item in pending if not item["long"]]
+            if batch_items:
+                summarize_openai_batch(
+                    client,
+                    batch_items,
+                    poll_seconds=ActiveConfig.DIARY_BATCH_POLL_SECONDS,
+                    timeout=ActiveConfig.DIARY_BATCH_TIMEOUT,
+                )
+            if long_items:
+                summarize_parallel(client, long_items, concurrency)
+        else:
+            summarize_parallel(client, pending, concurrency)
+
+    items = [item for item in cached + pending if item["summary"]]
+    if not items:
+        return {
+            "chatrooms": len(chatrooms),
+            "summarized": 0,
+            "failed": len(pending),
+            "diaries": 0,
+            "duplicates": 0,
+        }
+
+    # 새로 만든 요약은 요약 캐시에도 저장 (이후 /diary/summary 요청에서 재사용)
+    fresh = [item for item in pending if item["summary"]]
+    if fresh and ActiveConfig.SUMMARY_CACHE_ENABLED:
+        mongo.db.chatrooms.bulk_write(
+            [
+                UpdateOne(
+                    {"chatroom_id": item["chatroom_id"]},
+                    summary_cache_update(item["cache_key"], item["summary"]),
+                )
+                for item in fresh
+            ],
+            ordered=False,
+        )
+
+    emotions = load_most_common_emotions([item["chatroom_id"] for item in items])
+    now = datetime.now(KST)
+    documents = [
+        {
+            "user_id": item["user_id"],
+            "chatroom_id": item["chatroom_id"],
+            "content": item["summary"],
+            "date": diary_date(item, now),
+            "emotion": emotions.get(item["chatroom_id"], "neutral"),
+            "summary": item["summary"],
+            "created_at": now.isoformat(),
+        }
+        for item in items
+    ]
+    # ordered=False: 이미 일기가 있는 채팅방(unique 인덱스 중복)만 건너뛰고 나머지는 저장
+    try:
+        inserted = len(mongo.db.diaries.insert_many(documents, ordered=False).inserted_ids)
+    except BulkWriteError as e:
+        errors = e.details.get("writeErrors", [])
+        if any(error.get("code") != 11000 for error in errors):
+            raise
+        inserted = e.details.get("nInserted", 0)
+        logging.info(f"[INFO] 이미 일기가 있는 채팅방 {len(errors)}개 건너뜀")
+
+    stats = {
+        "chatrooms": len(chatrooms),
+        "summarized": len(fresh),
+        "failed": len(pending) - len(fresh),
+        "diaries": inserted,
+        "duplicates": len(documents) - inserted,
+    }
+    logging.info(f"[INFO] 일기 배치 완료 - {stats}")
+    return stats
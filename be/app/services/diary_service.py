@@ -4,6 +4,7 @@ from bson.objectid import ObjectId
 from datetime import datetime, timedelta
 import pytz  
 import logging
+import re
 
 # 한국 표준시(KST) 정의
 KST = pytz.timezone("Asia/Seoul")
@@ -11,31 +12,63 @@ KST = pytz.timezone("Asia/Seoul")
 # 일기장 저장
 def create_diary(user_id, chatroom_id, content, date, emotion, summary=None):
     """
-    새 일기 저장
+    새 일기 저장 (채팅방 일기는 채팅방당 하나, 이미 있으면 기존 일기 반환)
     :param user_id: 사용자 ID
-    :param chatroom_id: 채팅방 ID
+    :param chatroom_id: 채팅방 ID (None이면 채팅방 없이 쓴 일기 → 항상 새로 저장)
     :param content: 일기 내용
     :param date: 작성 날짜 (무시됨, 현재 KST 날짜가 사용됨)
     :param emotion: 감정
     :param summary: 요약 (선택 사항)
+    :return: (일기 ID, 새로 저장했는지 여부)
+    """
+    if chatroom_id:
+        return create_diary_once(user_id, chatroom_id, content, emotion, summary)
+
+    try:
+        result = mongo.db.diaries.insert_one(diary_document(user_id, chatroom_id, content, emotion, summary))
+        return str(result.inserted_id), True
+
+    except Exception as e:
+        logging.error(f"[ERROR] 일기 저장 중 오류 발생: {str(e)}")
+        raise Exception(f"일기 저장 중 오류 발생: {str(e)}")
+
+def diary_document(user_id, chatroom_id, content, emotion, summary=None):
+    """저장할 일기 문서 (날짜는 항상 현재 KST 기준)"""
+    kst_now = datetime.now(KST)
+    return {
+        "user_id": user_id,
+        "chatroom_id": chatroom_id,
+        "content": content,
+        "date": kst_now.strftime("%Y-%m-%d"),  # YYYY-MM-DD 형식
+        "emotion": emotion,
+        "summary": summary,
+        "created_at": kst_now.isoformat(),
+    }
+
+def create_diary_once(user_id, chatroom_id, content, emotion, summary=None):
+    """
+    채팅방의 일기를 한 번만 저장 (이미 있으면 기존 일기 유지)
+
+    저장 요청 반복, 요약 작업 재시도, 야간 배치가 겹쳐도 일기가 두 개 생기지 않도록 chatroom_id 기준 upsert
+    (diaries.chatroom_id unique 인덱스)
+    :return: (일기 ID, 새로 저장했는지 여부)
     """
     try:
-        # 항상 현재 KST 시간을 기준으로 함
-        kst_now = datetime.now(KST)
-        kst_date = kst_now.strftime("%Y-%m-%d")  # YYYY-MM-DD 형식
-
-        diary_data = {
-            "user_id": user_id,
-            "chatroom_id": chatroom_id,
-            "content": content,
-            "date": kst_date,  
-            "emotion": emotion,
-            "summary": summary if summary is not None else None,
-            "created_at": kst_now.isoformat(), 
-        }
-
-        result = mongo.db.diaries.insert_one(diary_data)
-        return str(result.inserted_id)
+        diary_data = diary_document(user_id, chatroom_id, content, emotion, summary)
+        for _ in range(2):
+            try:
+                result = mongo.db.diaries.update_one(
+                    {"chatroom_id": chatroom_id}, {"$setOnInsert": diary_data}, upsert=True
+                )
+            except pymongo.errors.DuplicateKeyError:
+                # 다른 요청이 같은 채팅방 일기를 동시에 만든 경우 → 그 일기를 다시 조회
+                continue
+            if result.upserted_id is not None:
+                return str(result.upserted_id), True
+            diary = mongo.db.diaries.find_one({"chatroom_id": chatroom_id}, {"_id": 1})
+            if diary:
+                return str(diary["_id"]), False
+        raise RuntimeError("일기 저장 실패")
 
     except Exception as e:
         logging.error(f"[ERROR] 일기 저장 중 오류 발생: {str(e)}")
@@ -147,7 +180,7 @@ def search_diary_by_keyword(user_id, keyword):
     """
     try:
         diaries = mongo.db.diaries.find(
-            {"user_id": user_id, "content": {"$regex": keyword, "$options": "i"}}
+            {"user_id": user_id, "content": {"$regex": re.escape(keyword), "$options": "i"}}
         )
         return [{**diary, "_id": str(diary["_id"])} for diary in diaries]
     except Exception as e:
@@ -1,14 +1,517 @@
 import openai
 from dotenv import load_dotenv
 import os
+import json
+import hashlib
 import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+import tiktoken
+from flask import current_app
 from app.database import mongo
+from app.services.llm_gateway import llm_gateway
+from app.services.message_store import MESSAGE_COUNT_EXPR, load_messages
+from app.utils.metrics import record_cache, record_openai_usage, span
+from config.settings import ActiveConfig
 from openai import OpenAI, OpenAIError, AuthenticationError, RateLimitError
 
 load_dotenv()
 openai.api_key = os.getenv("OPENAI_API_KEY")
 
 
+# 일기 요약 호출 파라미터 (동기/비동기 경로 공통)
+SUMMARY_COMPLETION_PARAMS = {
+    "model": "gpt-4o-mini",
+    "max_tokens": 200,
+    "temperature": 0.7,
+    "stop": ["\n\n", "일기 끝"],
+}
+
+
+def build_conversation_text(chats):
+    """
+    대화 목록을 요약용 텍스트로 변환
+    :param chats: 채팅방 chats 배열
+    """
+    parts = []
+    for chat in chats:
+        user_message = chat.get("user_message", "").strip()
+        bot_response = chat.get("bot_response", "").strip()
+        if user_message or bot_response:
+            parts.append(f"User: {user_message}\nBot: {bot_response}\n")
+    return "".join(parts)
+
+
+def build_summary_prompt(conversation_text):
+    """
+    일기 요약 프롬프트 생성
+    :param conversation_text: build_conversation_text로 만든 대화 내용
+    """
+    return f"""
+    아래 내용을 바탕으로 감성적인 일기를 생성하세요.
+    - 일기는 개인적인 감정을 솔직하게 표현하며, 자연스러운 말투로 작성됩니다.
+    - 이모지를 적절히 사용하여 감정을 생생하게 표현하세요.
+    - 제공된 대화 내용만 기반으로 작성하고, 새로운 정보를 추가하지 마세요.
+    - 날짜나 시간 정보를 임의로 작성하지 마세요. 
+    - 문장을 자연스럽게 연결하여 완성된 글로 작성하세요.
+    - 문장이 끊기지 않도록 주의하며, 완결성있게 마무리지으세요.
+    - 8문장 내로 마무리 지어주세요.
+
+    대화 내용:
+    {conversation_text}
+    일기 형식으로 요약:
+    """
+
+
+def build_summary_messages(prompt):
+    return [
+        {"role": "system", "content": "You are a helpful assistant."},
+        {"role": "user", "content": prompt},
+    ]
+
+
+def clean_summary(text):
+    """요약 결과의 줄바꿈 정리"""
+    return text.strip().replace("\n\n", " ").replace("\n", " ")
+
+
+# --- 긴 대화 요약 (map-reduce) ---
+
+# 대화 조각 요약 호출 파라미터 (사실 위주 메모라 낮은 temperature)
+CHUNK_SUMMARY_PARAMS = {
+    "model": "gpt-4o-mini",
+    "max_tokens": 300,
+    "temperature": 0.3,
+}
+
+CHUNK_SUMMARY_PROMPT = """아래는 긴 대화의 일부({part}/{total})야.
+나중에 일기를 쓸 수 있도록 사용자가 말한 사건, 감정, 생각을 시간 순서대로 메모해줘.
+- 대화에 있는 내용만 쓰고, 새로운 정보는 추가하지 마.
+- 8문장 이내, 사용자 시점의 짧은 문장으로 작성해.
+
+대화 내용:
+{conversation_text}
+메모:"""
+
+try:
+    _encoding = tiktoken.encoding_for_model(SUMMARY_COMPLETION_PARAMS["model"])
+except KeyError:
+    _encoding = tiktoken.get_encoding("o200k_base")
+
+
+def count_tokens(text):
+    return len(_encoding.encode(text))
+
+
+def split_by_tokens(texts, chunk_tokens):
+    """
+    텍스트 목록(대화 턴 또는 메모)을 순서대로 묶어 chunk_tokens 이하 조각으로 분할
+    (한 턴이 chunk_tokens보다 길면 그 턴만 잘라서 사용)
+    """
+    chunks, current, current_tokens = [], [], 0
+    for text in texts:
+        tokens = _encoding.encode(text)
+        if len(tokens) > chunk_tokens:
+            text, tokens = _encoding.decode(tokens[:chunk_tokens]), tokens[:chunk_tokens]
+        if current and current_tokens + len(tokens) > chunk_tokens:
+            chunks.append("".join(current))
+            current, current_tokens = [], 0
+        current.append(text)
+        current_tokens += len(tokens)
+    if current:
+        chunks.append("".join(current))
+    return chunks
+
+
+def build_chunk_messages(conversation_text, part, total):
+    prompt = CHUNK_SUMMARY_PROMPT.format(
+        part=part, total=total, conversation_text=conversation_text
+    )
+    return build_summary_messages(prompt)
+
+
+def summarize_chunks(client, chunks):
+    """
+    대화 조각을 병렬로 요약 (map)
+
+    :return: (조각별 메모 목록, 호출별 usage 목록)
+    """
+
+    def summarize(indexed_chunk):
+        part, chunk = indexed_chunk
+        # 같은 조각은 동시에 한 번만 호출
+        key = ("summary_chunk", hashlib.sha256(chunk.encode("utf-8")).hexdigest())
+        response = llm_gateway.call(
+            lambda: client.chat.completions.create(
+                messages=build_chunk_messages(chunk, part, len(chunks)), **CHUNK_SUMMARY_PARAMS
+            ),
+            key=key,
+        )
+        return response.choices[0].message.content.strip(), response.usage
+
+    with ThreadPoolExecutor(
+        max_workers=ActiveConfig.SUMMARY_CHUNK_CONCURRENCY, thread_name_prefix="summary-chunk"
+    ) as pool:
+        results = list(pool.map(summarize, enumerate(chunks, start=1)))
+    return [note for note, _ in results], [usage for _, usage in results]
+
+
+def build_long_summary_prompt(client, chats):
+    """
+    긴 대화는 토큰 기준으로 나눠 조각별 메모를 만들고, 메모를 합쳐 일기 프롬프트 생성 (reduce)
+    메모를 합쳐도 예산을 넘으면 메모를 다시 나눠 한 번 더 요약
+
+    :return: (일기 프롬프트, 조각 요약 호출별 usage 목록)
+    """
+    texts = [build_conversation_text([chat]) for chat in chats]
+    texts = [text for text in texts if text]
+    usages = []
+    while True:
+        chunks = split_by_tokens(texts, ActiveConfig.SUMMARY_CHUNK_TOKENS)
+        notes, chunk_usages = summarize_chunks(client, chunks)
+        usages.extend(chunk_usages)
+        notes_text = "\n".join(notes) + "\n"
+        if len(chunks) == 1 or count_tokens(notes_text) <= ActiveConfig.SUMMARY_MAX_INPUT_TOKENS:
+            return build_summary_prompt(notes_text), usages
+        texts = [note + "\n" for note in notes]
+
+
+def summary_cache_key(prompt):
+    """
+    요약 캐시 키: 실제로 보낼 메시지 + 호출 파라미터의 해시
+    (대화 내용, 프롬프트, 모델 설정 중 하나라도 바뀌면 키가 달라짐)
+    """
+    payload = json.dumps(
+        {"messages": build_summary_messages(prompt), **SUMMARY_COMPLETION_PARAMS},
+        ensure_ascii=False,
+        sort_keys=True,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def get_cached_summary(chatroom, cache_key):
+    """채팅방 문서에 저장된 요약이 같은 키로 만든 것이면 반환 (아니면 None)"""
+    if not ActiveConfig.SUMMARY_CACHE_ENABLED:
+        return None
+    cache = chatroom.get("summary_cache") or {}
+    if cache.get("key") == cache_key:
+        return cache.get("summary")
+    return None
+
+
+def summary_cache_update(cache_key, summary):
+    """채팅방 문서에 요약 캐시 저장용 update"""
+    return {
+        "$set": {
+            "summary_cache": {
+                "key": cache_key,
+                "summary": summary,
+                "created_at": datetime.now(timezone.utc).isoformat(),
+            }
+        }
+    }
+
+
+# --- 누적 일기 메모 (running summary) ---
+# 대화 중에 add_chat 이후 백그라운드에서 새 대화를 메모에 합쳐 두고,
+# 대화가 끝나면 전체 대화 대신 메모로 일기를 만들어 요약 캐시에 미리 저장
+# 채팅방 문서: running_summary(메모), running_summary_upto(반영한 대화 수),
+#             running_summary_digest(반영한 대화 [0, upto)의 내용 해시, 중간 대화 삭제/수정 확인용)
+
+RUNNING_SUMMARY_PROMPT = """아래는 일기를 쓰기 위해 지금까지의 대화를 정리한 메모와, 그 뒤에 이어진 대화야.
+기존 메모에 새 대화 내용을 합쳐서 갱신된 메모를 {max_chars}자 이내로 작성해줘.
+- 사용자가 말한 사건, 감정, 생각을 시간 순서대로 정리해.
+- 대화에 있는 내용만 쓰고, 새로운 정보는 추가하지 마.
+- 사용자 시점의 짧은 문장으로 작성해.
+
+기존 메모:
+{notes}
+
+새 대화:
+{conversation_text}
+갱신된 메모:"""
+
+_running_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="running-summary")
+_running_rooms = set()
+_running_lock = threading.Lock()
+
+
+def running_summary_pipeline(chatroom_id):
+    """메모 상태 확인에 필요한 값만 가져오는 aggregate 파이프라인 (대화는 가져오지 않음)"""
+    return [
+        {"$match": {"chatroom_id": chatroom_id}},
+        {
+            "$project": {
+                "_id": 0,
+                "count": MESSAGE_COUNT_EXPR,
+                "notes": {"$ifNull": ["$running_summary", ""]},
+                "upto": {"$ifNull": ["$running_summary_upto", 0]},
+                "digest": "$running_summary_digest",
+                "conversation_end": 1,
+                "cache_key": "$summary_cache.key",
+            }
+        },
+    ]
+
+
+def messages_digest(chats, previous=""):
+    """
+    대화 내용 해시 (대화마다 이전 해시에 이어서 계산)
+
+    messages_digest(chats[n:], messages_digest(chats[:n])) == messages_digest(chats)
+    → 메모에 새 대화를 합칠 때 이미 반영한 대화를 다시 읽지 않고 해시 갱신
+    """
+    digest = previous or ""
+    for chat in chats:
+        fingerprint = json.dumps(
+            [chat.get("seq"), chat.get("user_message"), chat.get("bot_response"), chat.get("timestamp")],
+            ensure_ascii=False,
+        )
+        digest = hashlib.sha256(f"{digest}{fingerprint}".encode("utf-8")).hexdigest()
+    return digest
+
+
+def applied_digest(state, chats):
+    """메모에 반영한 대화 [0, upto)의 현재 내용 해시"""
+    return messages_digest([chat for chat in chats if chat.get("seq", 0) < state["upto"]])
+
+
+def running_state_from_chatroom(chatroom, chats):
+    """이미 조회한 채팅방 문서와 전체 대화로 메모 상태 계산 (running_summary_pipeline과 같은 형식)"""
+    state = {
+        "count": chats[-1]["seq"] + 1 if chats else 0,
+        "notes": chatroom.get("running_summary", ""),
+        "upto": chatroom.get("running_summary_upto", 0),
+        "digest": chatroom.get("running_summary_digest"),
+    }
+    state["upto_digest"] = applied_digest(state, chats)
+    return state
+
+
+def is_running_summary_consistent(state):
+    """
+    메모가 현재 대화의 앞부분과 일치하는지 확인
+
+    반영했던 대화 [0, upto) 중 하나라도 삭제/수정되면 내용 해시가 달라지므로
+    처음부터 다시 만들어야 함 (해시가 없는 예전 메모도 다시 만듦)
+    """
+    if state["upto"] == 0:
+        return True
+    return state["upto"] <= state["count"] and state.get("upto_digest") == state.get("digest")
+
+
+def running_notes_if_current(chatroom, chats):
+    """메모가 모든 대화를 반영하고 있으면 메모 반환 (아니면 None)"""
+    state = running_state_from_chatroom(chatroom, chats)
+    if state["notes"] and state["upto"] == state["count"] and is_running_summary_consistent(state):
+        return state["notes"]
+    return None
+
+
+def fold_running_notes(client, notes, chats):
+    """
+    기존 메모에 새 대화를 합쳐 갱신된 메모 생성
+
+    :return: (메모, usage 목록)
+    """
+    texts = [build_conversation_text([chat]) for chat in chats]
+    usages = []
+    # 새 대화가 길면(처음부터 다시 만드는 경우) 조각 단위로 차례대로 합침
+    for chunk in split_by_tokens([text for text in texts if text], ActiveConfig.SUMMARY_CHUNK_TOKENS):
+        prompt = RUNNING_SUMMARY_PROMPT.format(
+            max_chars=ActiveConfig.RUNNING_SUMMARY_MAX_CHARS,
+            notes=notes or "없음",
+            conversation_text=chunk,
+        )
+        response = llm_gateway.call(
+            lambda: client.chat.completions.create(
+                messages=build_summary_messages(prompt), **CHUNK_SUMMARY_PARAMS
+            ),
+            key=("running_summary", hashlib.sha256(prompt.encode("utf-8")).hexdigest()),
+        )
+        notes = response.choices[0].message.content.strip()
+        usages.append(response.usage)
+    return notes, usages
+
+
+def running_notes_update(chatroom_id, previous_upto, notes, chats_upto, digest):
+    """
+    메모 저장 조건과 변경 내용 (다른 작업이 먼저 갱신했으면 덮어쓰지 않음)
+
+    :return: (조건, 변경 내용)
+    """
+    return (
+        {
+            "chatroom_id": chatroom_id,
+            "$or": [
+                {"running_summary_upto": previous_upto},
+                {"running_summary_upto": {"$exists": False}},
+            ],
+        },
+        {
+            "$set": {
+                "running_summary": notes,
+                "running_summary_upto": chats_upto,
+                "running_summary_digest": digest,
+            },
+            "$unset": {"running_summary_anchor": ""},
+        },
+    )
+
+
+def save_running_notes(chatroom_id, previous_upto, notes, chats_upto, digest):
+    """메모 저장 (다른 작업이 먼저 갱신했으면 덮어쓰지 않음)"""
+    result = mongo.db.chatrooms.update_one(
+        *running_notes_update(chatroom_id, previous_upto, notes, chats_upto, digest)
+    )
+    return result.modified_count > 0
+
+
+def plan_running_update(state):
+    """
+    메모 갱신 방식 결정
+
+    매 대화마다 전체 대화를 읽지 않도록 대화 수와 저장된 해시만 확인하고,
+    반영했던 대화 내용 확인(is_running_summary_consistent)은 일기 생성 시 resolve_running_notes에서 함
+    :return: "rebuild"(대화 수가 줄었거나 해시가 없는 예전 메모 → 처음부터), "fold"(새 대화 합치기) 또는 None
+    """
+    if state["upto"] > state["count"] or (state["upto"] > 0 and not state.get("digest")):
+        return "rebuild"
+    ended = state.get("conversation_end", False)
+    pending = state["count"] - state["upto"]
+    if pending >= ActiveConfig.RUNNING_SUMMARY_BATCH or (ended and pending > 0):
+        return "fold"
+    return None
+
+
+def should_pregenerate_diary(state):
+    """대화가 끝났고 메모가 모든 대화를 반영하면 일기를 미리 생성"""
+    return (
+        state.get("conversation_end", False)
+        and bool(state["notes"])
+        and state["upto"] == state["count"]
+        and ActiveConfig.SUMMARY_CACHE_ENABLED
+    )
+
+
+def schedule_running_summary(chatroom_id):
+    """
+    새 대화를 백그라운드에서 메모에 합침 (RUNNING_SUMMARY_ENABLED일 때만)
+
+    - 같은 채팅방 작업은 동시에 하나만 실행
+    - 실패해도 대화 응답에는 영향 없음 (다음 add_chat 또는 일기 생성 시 다시 반영)
+    """
+    if not ActiveConfig.RUNNING_SUMMARY_ENABLED:
+        return
+
+    with _running_lock:
+        if chatroom_id in _running_rooms:
+            return
+        _running_rooms.add(chatroom_id)
+
+    app = current_app._get_current_object()
+    _running_executor.submit(_run_running_summary, app, chatroom_id)
+
+
+def _run_running_summary(app, chatroom_id):
+    try:
+        with app.app_context():
+            update_running_summary(chatroom_id)
+    except Exception as e:
+        logging.error(f"[ERROR] 누적 메모 갱신 실패 - 대화방 ID: {chatroom_id}: {e}")
+    finally:
+        with _running_lock:
+            _running_rooms.discard(chatroom_id)
+
+
+def update_running_summary(chatroom_id):
+    """
+    아직 반영하지 않은 대화를 메모에 합치고, 대화가 끝났으면 일기까지 미리 생성
+
+    :return: 메모를 갱신했으면 True
+    """
+    result = list(mongo.db.chatrooms.aggregate(running_summary_pipeline(chatroom_id)))
+    if not result:
+        return False
+    state = result[0]
+
+    client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"), max_retries=0)
+    updated = False
+    plan = plan_running_update(state)
+
+    if plan == "rebuild":
+        # 반영했던 대화가 삭제됨 → 처음부터 다시 만듦
+        logging.info(f"[INFO] 대화방 ID: {chatroom_id} - 대화가 바뀌어 누적 메모 재생성")
+        chats = load_messages(chatroom_id)
+        notes, usages = fold_running_notes(client, "", chats)
+        upto = chats[-1]["seq"] + 1 if chats else 0
+        updated = save_running_notes(chatroom_id, state["upto"], notes, upto, messages_digest(chats))
+        state.update(notes=notes, upto=upto, count=upto)
+    elif plan == "fold":
+        # 새 대화가 있는 버킷만 읽고, 해시는 저장된 [0, upto) 해시에 이어서 계산
+        tail = load_messages(chatroom_id, state["upto"], state["count"])
+        if not tail:
+            return False
+        notes, usages = fold_running_notes(client, state["notes"], tail)
+        upto = tail[-1]["seq"] + 1
+        updated = save_running_notes(
+            chatroom_id, state["upto"], notes, upto, messages_digest(tail, state["digest"])
+        )
+        state.update(notes=notes, upto=upto)
+    else:
+        usages = []
+
+    for usage in usages:
+        record_openai_usage(usage)
+    if updated:
+        logging.info(f"[INFO] 누적 메모 갱신 - 대화방 ID: {chatroom_id}, {state['upto']}번째 대화까지")
+
+    # 대화가 끝났으면 메모로 일기를 만들어 요약 캐시에 저장 → /diary/summary가 바로 응답
+    if should_pregenerate_diary(state):
+        prompt = build_summary_prompt(state["notes"])
+        cache_key = summary_cache_key(prompt)
+        if cache_key != state.get("cache_key"):
+            response = llm_gateway.call(
+                lambda: client.chat.completions.create(
+                    messages=build_summary_messages(prompt), **SUMMARY_COMPLETION_PARAMS
+                ),
+                key=("summary", chatroom_id),
+            )
+            record_openai_usage(response.usage)
+            summary = clean_summary(response.choices[0].message.content)
+            mongo.db.chatrooms.update_one(
+                {"chatroom_id": chatroom_id}, summary_cache_update(cache_key, summary)
+            )
+            logging.info(f"[INFO] 대화방 ID: {chatroom_id} - 종료된 대화 일기 미리 생성")
+    return updated
+
+
+def resolve_running_notes(client, chatroom_id, chatroom, chats):
+    """
+    일기 생성 시 사용할 메모 (남은 대화가 RUNNING_SUMMARY_MAX_TAIL개 이하면 바로 합쳐서 사용)
+
+    :return: (메모 또는 None, usage 목록) - None이면 전체 대화로 요약
+    """
+    # 대화 중에는 해시를 이어서 계산만 하므로 반영했던 대화의 삭제/수정은 여기서 전체 대화로 확인
+    state = running_state_from_chatroom(chatroom, chats)
+    if not state["notes"] or not is_running_summary_consistent(state):
+        return None, []
+
+    tail = [chat for chat in chats if chat.get("seq", 0) >= state["upto"]]
+    if not tail:
+        return state["notes"], []
+    if len(tail) > ActiveConfig.RUNNING_SUMMARY_MAX_TAIL:
+        return None, []
+
+    notes, usages = fold_running_notes(client, state["notes"], tail)
+    save_running_notes(
+        chatroom_id, state["upto"], notes, tail[-1]["seq"] + 1, messages_digest(tail, state["digest"])
+    )
+    return notes, usages
+
+
 def generate_summary(chatroom_id):
     """
     대화방 ID에 따른 요약 생성
@@ -17,9 +520,17 @@ def generate_summary(chatroom_id):
     logging.info(f"[INFO] 대화방 ID: {chatroom_id} - 요약 요청 시작")
 
     try:
-        chatroom = mongo.db.chatrooms.find_one(
-            {"chatroom_id": chatroom_id}, {"chats": 1, "conversation_end": 1}
-        )
+        with span("summary_load"):
+            chatroom = mongo.db.chatrooms.find_one(
+                {"chatroom_id": chatroom_id},
+                {
+                    "conversation_end": 1,
+                    "summary_cache": 1,
+                    "running_summary": 1,
+                    "running_summary_upto": 1,
+                    "running_summary_digest": 1,
+                },
+            )
         if not chatroom:
             logging.warning(
                 f"[WARNING] 대화방 ID: {chatroom_id} - 해당 대화방을 찾을 수 없음"
@@ -32,13 +543,10 @@ def generate_summary(chatroom_id):
             )
             return {"error": "대화가 종료되지 않았습니다."}, 400
 
-        # 대화 내용 합치기
-        conversation_text = ""
-        for chat in chatroom.get("chats", []):
-            user_message = chat.get("user_message", "").strip()
-            bot_response = chat.get("bot_response", "").strip()
-            if user_message or bot_response:
-                conversation_text += f"User: {user_message}\nBot: {bot_response}\n"
+        # 대화 내용 합치기 (버킷을 이어 붙여 전체 대화 조회)
+        with span("summary_messages"):
+            chats = load_messages(chatroom_id)
+        conversation_text = build_conversation_text(chats)
 
         if not conversation_text.strip():
             logging.warning(f"[WARNING] 대화방 ID: {chatroom_id} - 대화 내용이 없음")
@@ -52,48 +560,67 @@ def generate_summary(chatroom_id):
         logging.error(f"[ERROR] MongoDB 쿼리 중 오류 발생: {e}")
         return {"error": "데이터베이스 오류"}, 500
 
-    # 요약 프롬프트 만들기
-    prompt = f"""
-    아래 내용을 바탕으로 감성적인 일기를 생성하세요.
-    - 일기는 개인적인 감정을 솔직하게 표현하며, 자연스러운 말투로 작성됩니다.
-    - 이모지를 적절히 사용하여 감정을 생생하게 표현하세요.
-    - 제공된 대화 내용만 기반으로 작성하고, 새로운 정보를 추가하지 마세요.
-    - 날짜나 시간 정보를 임의로 작성하지 마세요. 
-    - 문장을 자연스럽게 연결하여 완성된 글로 작성하세요.
-    - 문장이 끊기지 않도록 주의하며, 완결성있게 마무리지으세요.
-    - 8문장 내로 마무리 지어주세요.
+    # 재시도는 llm_gateway에서 처리
+    client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"), max_retries=0)
 
-    대화 내용:
-    {conversation_text}
-    일기 형식으로 요약:
-    """
+    # 대화 중에 쌓아 둔 메모가 있으면 전체 대화 대신 메모로 일기 생성
+    notes = None
+    if ActiveConfig.RUNNING_SUMMARY_ENABLED:
+        try:
+            with span("summary_running"):
+                notes, note_usages = resolve_running_notes(client, chatroom_id, chatroom, chats)
+            for usage in note_usages:
+                record_openai_usage(usage)
+        except Exception as e:
+            logging.error(f"[ERROR] 누적 메모 사용 실패, 전체 대화로 요약 - 대화방 ID: {chatroom_id}: {e}")
+            notes = None
 
-    client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+    # 요약 프롬프트 만들기
+    prompt = build_summary_prompt(notes or conversation_text)
+
+    # 같은 대화 내용으로 이미 만든 요약이 있으면 재사용 (/summary → /summary/save, 새로고침)
+    cache_key = summary_cache_key(prompt)
+    cached = get_cached_summary(chatroom, cache_key)
+    record_cache("summary", cached is not None)
+    if cached is not None:
+        logging.info(f"[INFO] 대화방 ID: {chatroom_id} - 저장된 요약 재사용")
+        return cached
 
     try:
+        # 긴 대화는 조각별 메모로 줄인 뒤 같은 일기 프롬프트로 요약
+        if notes is None and count_tokens(conversation_text) > ActiveConfig.SUMMARY_MAX_INPUT_TOKENS:
+            logging.info(f"[INFO] 대화방 ID: {chatroom_id} - 긴 대화 분할 요약")
+            with span("summary_map"):
+                prompt, chunk_usages = build_long_summary_prompt(client, chats)
+            for usage in chunk_usages:
+                record_openai_usage(usage)
+
         logging.info(f"[INFO] OpenAI API 호출 시작 - 대화방 ID: {chatroom_id}")
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",  
-            messages=[
-                {"role": "system", "content": "You are a helpful assistant."},
-                {"role": "user", "content": prompt},
-            ],
-            max_tokens=200,
-            temperature=0.7,
-            stop=["\n\n", "일기 끝"],
-        )
+        # 같은 대화방의 요약 요청이 동시에 들어오면 한 번만 호출
+        with span("llm"):
+            response = llm_gateway.call(
+                lambda: client.chat.completions.create(
+                    messages=build_summary_messages(prompt), **SUMMARY_COMPLETION_PARAMS
+                ),
+                key=("summary", chatroom_id),
+            )
 
-        summary = response.choices[0].message.content.strip()
+        record_openai_usage(response.usage)
 
-        summary = summary.replace("\n\n", " ").replace("\n", " ")
+        summary = clean_summary(response.choices[0].message.content)
 
         logging.info(f"[INFO] OpenAI API 호출 완료 - 요약 결과: {summary}")
-        return summary
 
-    except OpenAIError as e:
-        logging.error(f"[ERROR] OpenAI API 서버 오류: {e}")
-        return {"error": f"OpenAI API 서버 오류: {str(e)}"}, 500
+        if ActiveConfig.SUMMARY_CACHE_ENABLED:
+            try:
+                mongo.db.chatrooms.update_one(
+                    {"chatroom_id": chatroom_id}, summary_cache_update(cache_key, summary)
+                )
+            except Exception as e:
+                logging.error(f"[ERROR] 요약 캐시 저장 실패 - 대화방 ID: {chatroom_id}: {e}")
+        return summary
 
+    # AuthenticationError, RateLimitError는 OpenAIError의 하위 클래스이므로 먼저 처리
     except AuthenticationError as e:
         logging.error(f"[ERROR] OpenAI API 인증 오류: {e}")
         return {"error": "OpenAI API 인증 오류: API 키를 확인하세요."}, 500
@@ -102,6 +629,10 @@ def generate_summary(chatroom_id):
         logging.error(f"[ERROR] OpenAI API 요청 한도 초과: {e}")
         return {"error": "OpenAI API 요청 한도 초과: 잠시 후 다시 시도하세요."}, 429
 
+    except OpenAIError as e:
+        logging.error(f"[ERROR] OpenAI API 서버 오류: {e}")
+        return {"error": f"OpenAI API 서버 오류: {str(e)}"}, 500
+
     except Exception as e:
         logging.error(f"[ERROR] OpenAI API 호출 중 예기치 않은 오류: {e}")
         return {"error": "서버 내부 오류"}, 500
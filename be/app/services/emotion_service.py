@@ -48,6 +48,46 @@ def save_emotion_data(user_id, chatroom_id, emotion, confidence):
         raise RuntimeError(f"감정 데이터 저장 오류: {e}")
 
 
+def summarize_emotions(emotion_docs):
+    """
+    감정 분석 결과 문서 목록에서 가장 많이 나온 감정과 평균 신뢰도 계산
+    :param emotion_docs: emotions 컬렉션 문서 목록 (또는 커서)
+    :return: 감정 분석 결과 리스트 & 가장 많이 등장한 감정
+    """
+    emotions = []
+    emotion_counts = {}
+    total_confidence = {}
+    for emotion_data in emotion_docs:
+        emotion = emotion_data["emotion"]
+        confidence = emotion_data["confidence"]
+        timestamp = emotion_data["timestamp"]
+        emotions.append(
+            {"emotion": emotion, "confidence": confidence, "timestamp": timestamp}
+        )
+        if emotion in emotion_counts:
+            emotion_counts[emotion] += 1
+            total_confidence[emotion] += confidence
+        else:
+            emotion_counts[emotion] = 1
+            total_confidence[emotion] = confidence
+    if emotion_counts:
+        most_common_emotion = max(emotion_counts, key=emotion_counts.get)
+        avg_confidence = (
+            total_confidence[most_common_emotion]
+            / emotion_counts[most_common_emotion]
+        )
+    else:
+        most_common_emotion = "neutral"
+        avg_confidence = 0.5
+    return {
+        "emotions": emotions,
+        "most_common": {
+            "emotion": most_common_emotion,
+            "confidence": avg_confidence,
+        },
+    }
+
+
 def get_emotion_results(chatroom_id, user_id):
     """
     특정 채팅방에 대한 감정 분석 결과 조회 (가장 많이 나온 감정 반환)
@@ -70,38 +110,7 @@ def get_emotion_results(chatroom_id, user_id):
                 "most_common": {"emotion": "neutral", "confidence": 0.5},
             }
         emotions_cursor = mongo.db.emotions.find({"chatroom_id": chatroom_id})
-        emotions = []
-        emotion_counts = {}
-        total_confidence = {}
-        for emotion_data in emotions_cursor:
-            emotion = emotion_data["emotion"]
-            confidence = emotion_data["confidence"]
-            timestamp = emotion_data["timestamp"]
-            emotions.append(
-                {"emotion": emotion, "confidence": confidence, "timestamp": timestamp}
-            )
-            if emotion in emotion_counts:
-                emotion_counts[emotion] += 1
-                total_confidence[emotion] += confidence
-            else:
-                emotion_counts[emotion] = 1
-                total_confidence[emotion] = confidence
-        if emotion_counts:
-            most_common_emotion = max(emotion_counts, key=emotion_counts.get)
-            avg_confidence = (
-                total_confidence[most_common_emotion]
-                / emotion_counts[most_common_emotion]
-            )
-        else:
-            most_common_emotion = "neutral"
-            avg_confidence = 0.5
-        return {
-            "emotions": emotions,
-            "most_common": {
-                "emotion": most_common_emotion,
-                "confidence": avg_confidence,
-            },
-        }
+        return summarize_emotions(emotions_cursor)
     except Exception as e:
         logging.error(f"[ERROR] 감정 결과 조회 오류: {e}")
         return {
@@ -209,7 +218,7 @@ def is_authorized(user_id, chatroom_id):
     """
     try:
         chatroom = mongo.db.chatrooms.find_one(
-            {"chatroom_id": chatroom_id, "user_id": user_id}
+            {"chatroom_id": chatroom_id, "user_id": user_id}, {"_id": 1}
         )
         return chatroom is not None
     except Exception as e:
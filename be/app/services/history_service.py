@@ -0,0 +1,219 @@
+"""
+# 대화 이력 관리 (슬라이딩 윈도우 + 누적 요약)
+
+최근 N개 대화는 그대로, 그보다 오래된 대화는 누적 요약으로 프롬프트에 반영
+요약은 채팅방 문서(history_summary, history_summary_upto)에 저장하고
+add_chat 이후 백그라운드 스레드에서 점진적으로 갱신
+→ 대화가 길어져도 한 번의 프롬프트 크기는 일정하게 유지
+"""
+
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from flask import current_app
+from langchain_openai import ChatOpenAI
+
+from app.database import mongo
+from app.services.llm_gateway import llm_gateway
+from app.services.message_store import MESSAGE_COUNT_EXPR, load_messages
+from config.settings import ActiveConfig
+
+# 요약 전용 LLM (상담 응답용 llm보다 낮은 temperature)
+summary_llm = ChatOpenAI(
+    model_name="gpt-4o-mini", temperature=0.3, max_tokens=400, max_retries=0
+)
+
+_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="history-summary")
+_pending_rooms = set()
+_pending_lock = threading.Lock()
+
+SUMMARY_PROMPT = """아래는 청소년 사용자와 또래 상담 챗봇의 대화야.
+기존 요약에 새 대화 내용을 합쳐서 갱신된 요약을 {max_chars}자 이내로 작성해줘.
+- 사용자의 고민, 감정 변화, 챗봇이 했던 조언과 질문을 중심으로 정리
+- 대화에 없는 내용은 추가하지 말 것
+
+기존 요약:
+{summary}
+
+새 대화:
+{conversation}
+
+갱신된 요약:"""
+
+
+def format_turns(chats):
+    """대화 목록을 프롬프트용 텍스트로 변환"""
+    lines = []
+    for chat in chats:
+        user_message = (chat.get("user_message") or "").strip()
+        bot_response = (chat.get("bot_response") or "").strip()
+        if user_message:
+            lines.append(f"사용자: {user_message}")
+        if bot_response:
+            lines.append(f"상담가: {bot_response}")
+    return "\n".join(lines)
+
+
+def history_pipeline(chatroom_id):
+    """대화 수와 누적 요약만 가져오는 aggregate 파이프라인 (대화는 버킷에서 따로 조회)"""
+    project = {
+        "count": MESSAGE_COUNT_EXPR,
+        "summary": {"$ifNull": ["$history_summary", ""]},
+        "summary_upto": {"$ifNull": ["$history_summary_upto", 0]},
+    }
+    return [{"$match": {"chatroom_id": chatroom_id}}, {"$project": project}]
+
+
+def to_history_state(result, recent=None):
+    """aggregate 결과(리스트)와 최근 대화를 대화 이력 상태로 변환"""
+    if not result:
+        return {"count": 0, "recent": [], "summary": "", "summary_upto": 0}
+
+    state = result[0]
+    state["recent"] = recent or []
+    return state
+
+
+def recent_start(state, window):
+    """
+    프롬프트에 그대로 넣을 첫 대화 seq
+
+    최근 window개와 아직 요약에 합쳐지지 않은 대화를 함께 포함
+    (요약이 밀려 있어도 최대 window + CHAT_HISTORY_SUMMARY_BATCH개까지)
+    """
+    count = state["count"]
+    unsummarized = min(state["summary_upto"], count - window)
+    return max(unsummarized, count - window - ActiveConfig.CHAT_HISTORY_SUMMARY_BATCH, 0)
+
+
+def load_history_state(chatroom_id, window=None):
+    """
+    프롬프트에 필요한 대화 이력만 조회 (최근 대화가 들어 있는 버킷만 읽음)
+
+    :param chatroom_id: 채팅방 ID
+    :param window: 그대로 포함할 최근 대화 수 (기본값: CHAT_HISTORY_TURNS)
+    :return: {"count", "recent", "summary", "summary_upto"}
+    """
+    if window is None:
+        window = ActiveConfig.CHAT_HISTORY_TURNS
+
+    result = list(mongo.db.chatrooms.aggregate(history_pipeline(chatroom_id)))
+    recent = None
+    if result and window > 0:
+        recent = load_messages(chatroom_id, recent_start(result[0], window), result[0]["count"])
+    return to_history_state(result, recent)
+
+
+def build_history_text(state):
+    """
+    누적 요약 + 최근 대화를 프롬프트용 텍스트로 구성
+
+    최근 대화(state["recent"])에는 요약이 아직 따라오지 못한 구간(요약 시점 ~ 윈도우 시작)도
+    포함되어 있으므로 요약과 최근 대화 사이에 빠지는 대화가 없음
+    """
+    parts = []
+    if state.get("summary"):
+        parts.append(f"(이전 대화 요약) {state['summary']}")
+    recent_text = format_turns(state.get("recent", []))
+    if recent_text:
+        parts.append(recent_text)
+    return "\n".join(parts) if parts else "이전 대화 없음"
+
+
+def schedule_summary_update(chatroom_id):
+    """
+    윈도우 밖으로 밀려난 대화가 일정 수 이상 쌓이면 백그라운드에서 요약 갱신
+
+    - 같은 채팅방의 요약 작업은 동시에 하나만 실행
+    - 요약 실패는 대화 응답에 영향을 주지 않음 (다음 add_chat 때 다시 시도)
+    """
+    if not ActiveConfig.CHAT_HISTORY_SUMMARY_ENABLED:
+        return
+
+    with _pending_lock:
+        if chatroom_id in _pending_rooms:
+            return
+        _pending_rooms.add(chatroom_id)
+
+    app = current_app._get_current_object()
+    _executor.submit(_run_summary_update, app, chatroom_id)
+
+
+def _run_summary_update(app, chatroom_id):
+    try:
+        with app.app_context():
+            update_history_summary(chatroom_id)
+    except Exception as e:
+        logging.error(f"[ERROR] 대화 요약 갱신 실패 - 대화방 ID: {chatroom_id}: {e}")
+    finally:
+        with _pending_lock:
+            _pending_rooms.discard(chatroom_id)
+
+
+def plan_summary_update(state):
+    """
+    요약에 새로 합칠 대화 구간 계산
+
+    :param state: load_history_state 결과
+    :return: (기존 요약 끝, 새 요약 끝) 또는 요약할 대화가 부족하면 None
+    """
+    upto = state["summary_upto"]
+    target = state["count"] - ActiveConfig.CHAT_HISTORY_TURNS
+
+    # 요약할 대화가 충분히 쌓였을 때만 LLM 호출
+    if target - upto < ActiveConfig.CHAT_HISTORY_SUMMARY_BATCH:
+        return None
+    return upto, target
+
+
+def build_summary_prompt(summary, conversation):
+    return SUMMARY_PROMPT.format(
+        max_chars=ActiveConfig.CHAT_HISTORY_SUMMARY_MAX_CHARS,
+        summary=summary or "없음",
+        conversation=conversation,
+    )
+
+
+def summary_update_filter(chatroom_id, upto):
+    """요약 시점이 그대로인 경우에만 갱신하는 조건 (동시 갱신 방지)"""
+    return {
+        "chatroom_id": chatroom_id,
+        "$or": [
+            {"history_summary_upto": upto},
+            {"history_summary_upto": {"$exists": False}},
+        ],
+    }
+
+
+def update_history_summary(chatroom_id):
+    """
+    아직 요약되지 않은 오래된 대화를 기존 요약에 합쳐 저장
+
+    :return: 요약을 갱신했으면 True
+    """
+    state = load_history_state(chatroom_id, window=0)
+    plan = plan_summary_update(state)
+    if plan is None:
+        return False
+    upto, target = plan
+
+    conversation = format_turns(load_messages(chatroom_id, upto, target))
+    if not conversation:
+        return False
+
+    summary_prompt = build_summary_prompt(state["summary"], conversation)
+    response = llm_gateway.call(
+        lambda: summary_llm.invoke(summary_prompt), key=("history", chatroom_id, upto, target)
+    )
+    summary = response.content.strip().replace("\n\n", " ").replace("\n", " ")
+
+    # 다른 작업이 먼저 갱신했으면 덮어쓰지 않음
+    result = mongo.db.chatrooms.update_one(
+        summary_update_filter(chatroom_id, upto),
+        {"$set": {"history_summary": summary, "history_summary_upto": target}},
+    )
+    logging.info(
+        f"[INFO] 대화 요약 갱신 - 대화방 ID: {chatroom_id}, {upto} → {target}번째 대화까지"
+    )
+    return result.modified_count > 0
@@ -0,0 +1,246 @@
+"""
+# OpenAI 호출 게이트웨이
+
+generate_response, generate_summary 등 모든 LLM 호출이 공유
+- 동시 호출 수 제한 (LLM_MAX_IN_FLIGHT), 초과 요청은 사용자별 라운드로빈 대기열로 공정하게 처리
+- 같은 키로 이미 진행 중인 호출이 있으면 결과를 공유 (중복 요청 병합)
+- 요청 한도/일시적 오류는 retry-after를 따르거나 지수 백오프(+지터)로 재시도
+- 대기열 길이, 대기 시간 등 지표 제공
+"""
+
+import time
+import random
+import logging
+import threading
+from collections import OrderedDict, deque
+from concurrent.futures import Future
+from contextlib import contextmanager
+
+import openai
+from config.settings import ActiveConfig
+
+# 재시도할 일시적 오류
+RETRYABLE_ERRORS = (
+    openai.RateLimitError,
+    openai.APITimeoutError,
+    openai.APIConnectionError,
+    openai.InternalServerError,
+)
+
+
+def get_retry_after(error):
+    """오류 응답의 retry-after 헤더 값(초) 반환 (없으면 None)"""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    value = headers.get("retry-after-ms")
+    if value:
+        try:
+            return float(value) / 1000
+        except ValueError:
+            pass
+    value = headers.get("retry-after")
+    if value:
+        try:
+            return float(value)
+        except ValueError:
+            pass
+    return None
+
+
+def backoff_delay(attempt, error, base_delay, max_delay):
+    """
+    재시도 대기 시간: retry-after가 있으면 따르고, 없으면 지수 백오프 + 지터
+
+    :return: 대기 시간(초), retry-after가 max_delay보다 길면 None (더 일찍 재시도하지 않고 포기)
+    """
+    retry_after = get_retry_after(error)
+    if retry_after is not None:
+        return retry_after if retry_after <= max_delay else None
+    delay = min(max_delay, base_delay * (2**attempt))
+    return random.uniform(delay / 2, delay)
+
+
+class LLMGateway:
+    """
+    LLM 호출 동시성 제한 + 공정 대기열 + 요청 병합 + 백오프 재시도
+
+    :param max_in_flight: 동시에 실행할 최대 호출 수
+    :param max_retries: 일시적 오류 재시도 횟수
+    :param base_delay: 백오프 기본 대기 시간(초)
+    :param max_delay: 백오프 최대 대기 시간(초)
+    :param queue_timeout: 대기열 최대 대기 시간(초), 초과 시 RuntimeError
+    """
+
+    def __init__(
+        self, max_in_flight=8, max_retries=4, base_delay=0.5, max_delay=20.0, queue_timeout=60.0
+    ):
+        self.max_in_flight = max_in_flight
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.queue_timeout = queue_timeout
+
+        self._cond = threading.Condition()
+        self._in_flight = 0
+        self._queues = OrderedDict()  # user_id -> deque[ticket], 순서가 라운드로빈 순서
+        self._waiting = 0
+
+        self._coalesce_lock = threading.Lock()
+        self._pending = {}  # key -> Future
+
+        self._wait_times = deque(maxlen=1000)
+        self._counters = {"calls": 0, "coalesced": 0, "retries": 0, "failures": 0, "timeouts": 0}
+
+    # --- 동시성 제한 / 공정 대기열 ---
+
+    def _acquire(self, user_id):
+        start = time.perf_counter()
+        with self._cond:
+            if self._in_flight < self.max_in_flight and not self._waiting:
+                self._in_flight += 1
+                self._wait_times.append(0.0)
+                return
+
+            ticket = {"granted": False}
+            self._queues.setdefault(user_id, deque()).append(ticket)
+            self._waiting += 1
+
+            deadline = start + self.queue_timeout
+            while not ticket["granted"]:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    self._queues[user_id].remove(ticket)
+                    if not self._queues[user_id]:
+                        del self._queues[user_id]
+                    self._waiting -= 1
+                    self._counters["timeouts"] += 1
+                    raise RuntimeError("LLM 요청 대기 시간이 초과되었습니다.")
+                self._cond.wait(remaining)
+
+        self._wait_times.append(time.perf_counter() - start)
+
+    def _release(self):
+        with self._cond:
+            self._in_flight -= 1
+            if self._queues:
+                # 가장 오래 차례를 기다린 사용자의 첫 요청에 슬롯 할당 후 맨 뒤로 보냄
+                user_id, queue = next(iter(self._queues.items()))
+                ticket = queue.popleft()
+                del self._queues[user_id]
+                if queue:
+                    self._queues[user_id] = queue
+                ticket["granted"] = True
+                self._waiting -= 1
+                self._in_flight += 1
+                self._cond.notify_all()
+
+    @contextmanager
+    def slot(self, user_id=None):
+        """
+        실행 슬롯 하나를 점유 (스트리밍처럼 재시도할 수 없는 호출용)
+
+        :param user_id: 공정 대기열에서 사용할 사용자 ID
+        """
+        self._acquire(user_id)
+        try:
+            yield
+        finally:
+            self._release()
+
+    # --- 재시도 ---
+
+    def _run_with_retry(self, fn, user_id=None):
+        for attempt in range(self.max_retries + 1):
+            try:
+                with self.slot(user_id):
+                    return fn()
+            except RETRYABLE_ERRORS as e:
+                if attempt == self.max_retries:
+                    raise
+                delay = backoff_delay(attempt, e, self.base_delay, self.max_delay)
+                if delay is None:
+                    logging.warning(
+                        f"[WARNING] LLM 호출 재시도 포기 ({type(e).__name__}, "
+                        f"retry-after가 최대 대기 시간 {self.max_delay}초보다 김)"
+                    )
+                    raise
+                self._counters["retries"] += 1
+                logging.warning(
+                    f"[WARNING] LLM 호출 재시도 {attempt + 1}/{self.max_retries} "
+                    f"({type(e).__name__}, {delay:.2f}초 후)"
+                )
+                # 슬롯을 반납한 상태로 대기 → 요청 한도 오류가 몰려도 다른 요청이 슬롯을 사용
+                time.sleep(delay)
+
+    # --- 호출 ---
+
+    def call(self, fn, user_id=None, key=None):
+        """
+        LLM 호출 실행
+
+        :param fn: 인자 없이 호출할 함수 (예: lambda: llm.invoke(...))
+        :param user_id: 공정 대기열에서 사용할 사용자 ID
+        :param key: 병합 키 - 같은 키의 호출이 진행 중이면 그 결과를 함께 사용
+        :return: fn의 반환값
+        """
+        if key is not None:
+            with self._coalesce_lock:
+                future = self._pending.get(key)
+                owner = future is None
+                if owner:
+                    future = Future()
+                    self._pending[key] = future
+            if not owner:
+                self._counters["coalesced"] += 1
+                return future.result()
+
+        self._counters["calls"] += 1
+        try:
+            result = self._run_with_retry(fn, user_id)
+        except BaseException as e:
+            self._counters["failures"] += 1
+            if key is not None:
+                self._finish(key, future, error=e)
+            raise
+
+        if key is not None:
+            self._finish(key, future, result=result)
+        return result
+
+    def _finish(self, key, future, result=None, error=None):
+        with self._coalesce_lock:
+            self._pending.pop(key, None)
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+    # --- 지표 ---
+
+    def metrics(self):
+        """대기열 길이, 실행 중 호출 수, 대기 시간 통계"""
+        with self._cond:
+            waits = sorted(self._wait_times)
+            metrics = {
+                "max_in_flight": self.max_in_flight,
+                "in_flight": self._in_flight,
+                "queue_depth": self._waiting,
+                "queued_users": len(self._queues),
+                **self._counters,
+            }
+
+        if waits:
+            metrics["wait_ms_p50"] = waits[len(waits) // 2] * 1000
+            metrics["wait_ms_p95"] = waits[min(len(waits) - 1, int(len(waits) * 0.95))] * 1000
+            metrics["wait_ms_max"] = waits[-1] * 1000
+        return metrics
+
+
+# 프로세스 전체에서 공유하는 게이트웨이
+llm_gateway = LLMGateway(
+    max_in_flight=ActiveConfig.LLM_MAX_IN_FLIGHT,
+    max_retries=ActiveConfig.LLM_MAX_RETRIES,
+    base_delay=ActiveConfig.LLM_BACKOFF_BASE,
+    max_delay=ActiveConfig.LLM_BACKOFF_MAX,
+    queue_timeout=ActiveConfig.LLM_QUEUE_TIMEOUT,
+)
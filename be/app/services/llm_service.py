@@ -8,15 +8,22 @@ LLM 호출 및 응답 처리
 
 import os
 import logging
-from langchain.chains import ConversationalRetrievalChain
 from langchain_openai import ChatOpenAI
+from langchain_core.messages import HumanMessage, SystemMessage
 from langchain_core.prompts import PromptTemplate
 from dotenv import load_dotenv
 from flask import current_app
 
 # from flask_pymongo import PyMongo
 from app.services.rag_service import retriever
+from app.services.semantic_cache import create_semantic_cache, emotion_bucket
+from app.services.conversation_state import create_state_store
+from app.services.history_service import build_history_text, load_history_state
+from app.services.llm_gateway import llm_gateway
+from app.services.opener_service import opener_pool
+from app.utils.metrics import record_cache, record_usage_metadata, span
 from app.database import mongo
+from config.settings import ActiveConfig
 
 # mongo = PyMongo()
 
@@ -30,7 +37,11 @@ else:
     raise ValueError("OpenAI API Key가 없습니다. .env 파일을 확인하세요.")
 
 
-chatroom_memory = {}
+# 채팅방별 직전 감정 상태 (LRU + TTL, CHAT_STATE_BACKEND=redis면 워커 간 공유)
+chatroom_memory = create_state_store()
+
+# 첫 대화 시맨틱 응답 캐시 (SEMANTIC_CACHE_ENABLED=True일 때만 생성)
+semantic_cache = create_semantic_cache()
 
 
 # 감정 데이터를 DB에서 불러오는 함수
@@ -78,43 +89,84 @@ def manage_chat_memory(user_id, chatroom_id, emotion, confidence):
     새로운 대화에 대해 이전 감정 상태와 비교 후 응답을 결정
     """
     # chatroom_memory에 해당 채팅방 ID의 감정 상태가 없으면 초기화
-    if chatroom_id not in chatroom_memory:
-        chatroom_memory[chatroom_id] = {"emotion": emotion, "confidence": confidence}
+    previous_state = chatroom_memory.get(chatroom_id)
+    if previous_state is None:
+        state = {"emotion": emotion, "confidence": confidence}
+        chatroom_memory.set(chatroom_id, state)
         return {
             "botResponse": "",  # 첫 번째 응답이므로 초기화
-            "emotionData": chatroom_memory[chatroom_id],
+            "emotionData": state,
         }
 
-    previous_emotion = chatroom_memory[chatroom_id]["emotion"]
-
     # 감정 상태가 이전과 같다면, 이미 감정 인식이 끝났으므로 응답을 그대로 이어감
-    if emotion == previous_emotion:
+    if emotion == previous_state.get("emotion"):
         return {
             "botResponse": "",  # 감정 상태가 변하지 않았으므로 빈 응답
-            "emotionData": chatroom_memory[chatroom_id],  # 기존의 감정 상태 반환
+            "emotionData": previous_state,  # 기존의 감정 상태 반환
         }
 
     # 감정 상태가 변경되었을 경우
-    chatroom_memory[chatroom_id] = {"emotion": emotion, "confidence": confidence}
+    state = {"emotion": emotion, "confidence": confidence}
+    chatroom_memory.set(chatroom_id, state)
 
     return {
         "botResponse": "",  # 프롬프트에서 자연스럽게 응답을 처리하도록
-        "emotionData": chatroom_memory[chatroom_id],  # 업데이트된 감정 상태 반환
+        "emotionData": state,  # 업데이트된 감정 상태 반환
     }
 
 
-# 챗봇 응답 프롬프트 설정
-prompt = PromptTemplate.from_template(
-    """너는 고민을 들어주고 공감해주는 사춘기 청소년 전문 또래 상담가야!  
+def update_emotion_state(chatroom_id, emotion, confidence):
+    """
+    채팅방의 직전 감정과 비교 후 현재 감정으로 갱신
+
+    :return: 감정이 바뀌었거나 첫 감정이면 True
+    """
+    previous_state = chatroom_memory.get(chatroom_id)
+    if previous_state is not None and previous_state.get("emotion") == emotion:
+        return False
+    chatroom_memory.set(chatroom_id, {"emotion": emotion, "confidence": confidence})
+    return True
+
+
+def pick_emotion_opener(chatroom_id, user_message, emotion, confidence):
+    """
+    사용자 메시지 없이 감정만 바뀐 턴이면 미리 만든 첫마디 반환 (아니면 None → LLM 호출)
+
+    :param user_message: 감정 문구를 덧붙이기 전의 사용자 원문 메시지
+    """
+    if not ActiveConfig.OPENER_ENABLED or (user_message or "").strip():
+        return None
+    if not update_emotion_state(chatroom_id, emotion, confidence):
+        return None
+    return opener_pool.pick(emotion, confidence)
+
+
+def get_emotion_opener(user_id, chatroom_id, user_message):
+    """pick_emotion_opener + 최신 감정 조회"""
+    if not ActiveConfig.OPENER_ENABLED or (user_message or "").strip():
+        return None
+    with span("emotion_data"):
+        emotion, confidence = get_emotion_data(user_id, chatroom_id)
+    opener = pick_emotion_opener(chatroom_id, user_message, emotion, confidence)
+    record_cache("opener", opener is not None)
+    return opener
+
+
+# 시스템 프롬프트 버전 (SYSTEM_PROMPT를 바꿀 때마다 올림)
+# → 프롬프트 캐시 접두어가 바뀌는 시점을 토큰 지표/로그에서 구분
+PROMPT_VERSION = "2"
+
+# 챗봇 캐릭터 설정 (요청마다 바뀌는 값 없음)
+# 모든 요청이 같은 접두어로 시작해야 OpenAI 프롬프트 캐시가 적용되므로
+# 감정, 이전 대화, 검색 결과, 질문은 아래 prompt(사용자 메시지)에만 넣음
+SYSTEM_PROMPT = """너는 고민을 들어주고 공감해주는 사춘기 청소년 전문 또래 상담가야!  
 사람들이 힘들어할 땐 **따뜻하고 친근한 말투**로 먼저 공감해주고, 대화가 끊기지 않도록 자연스럽게 **열린 추가 질문**을 던져서 대화를 이어가줘.  
 상황에 맞는 적당한 추임새와 감탄사를 사용해주고, 신조어도 10대 청소년이 자주 쓰는 신조어도 적절히 넣어줘.  
 때로는 가벼운 농담도 하면서 분위기를 풀어주고 상황에 맞는 이모티콘도 넣어줘.  
 친구처럼 편하게 반말로 대화해 줘. 이전대화와 이어지게 대화를 이어가야 해. 
 
-**현재 사용자의 감정 상태:**  
-{emotion_description}
-
 **감정 인식 후 행동 지침:**  
+- 사용자의 감정 상태는 메시지의 '현재 사용자의 감정 상태'를 참고해.  
 - 사용자의 감정을 인식한 경우, 반드시 먼저 말을 걸어줘.  
 - 단, 이미 감정인식을 하고 그에 대한 말을 걸거나 응답을 한 상태에서 감정인식을 한 경우 이전과 같은 감정인식인 경우에는 사용자 응답을 디렉션하기만 해. (반복적인 감정 인식 피하기)
 - 대화 중간에도 감정 상태를 반영하여 자연스럽게 응답해줘.  
@@ -128,7 +180,7 @@ prompt = PromptTemplate.from_template(
 
 **중요 원칙**  
 - 사용자가 직접 언급한 내용만 바탕으로 대화를 진행해.  
-- 추가 정보가 필요할 경우에만 참고 사례({context})를 활용해.  
+- 추가 정보가 필요할 경우에만 메시지의 '참고할 상담 사례'를 활용해.  
 - 사용자가 언급하지 않은 내용은 절대 말하지 마.
 - 상대방의 감정을 먼저 알아주고 따뜻하게 반응하기.  
 - 절대 무리하게 해결책을 제시하지 않고, 스스로 답을 찾을 수 있도록 도와주기.  
@@ -153,19 +205,32 @@ prompt = PromptTemplate.from_template(
 사용자: "길 가다가 넘어졌어."  
 잘못된 응답: "아, 친구가 다쳐서 속상하시겠어요."  (잘못된 해석)  
 올바른 응답: "세상에나. 정말 창피했겠다! 너 괜찮아? 어디 다친 데 없어?"  
+"""
 
-**사용자의 고민:**  
-{question}  
+# 요청마다 바뀌는 부분 (시스템 프롬프트 뒤의 사용자 메시지)
+prompt = PromptTemplate.from_template(
+    """**현재 사용자의 감정 상태:**  
+{emotion_description}
+
+**이전 대화:**  
+{history}  
 
 **참고할 상담 사례:**  
 {context}  
 
+**사용자의 고민:**  
+{question}  
+
 **챗봇 응답:**  
 """
 )
 
 # OpenAI 기반 LLM 설정 (RAG를 위한 언어 모델)
-llm = ChatOpenAI(model_name="gpt-4o-mini", temperature=0.7)
+# (재시도는 llm_gateway에서 일괄 처리)
+# (stream_usage: 스트리밍 응답에서도 토큰 사용량 수신)
+llm = ChatOpenAI(
+    model_name="gpt-4o-mini", temperature=0.7, max_retries=0, stream_usage=True
+)
 
 
 # 감정 기반 챗봇 대화
@@ -178,7 +243,7 @@ def sendEmotionChatMessage(user_id, chatroom_id, userMessage):
         }
 
         # 이전 감정 상태가 메모리에 저장되어 있는지 확인
-        previous_emotion = chatroom_memory.get(chatroom_id, {}).get(
+        previous_emotion = (chatroom_memory.get(chatroom_id) or {}).get(
             "emotion", "neutral"
         )
 
@@ -199,7 +264,7 @@ def sendEmotionChatMessage(user_id, chatroom_id, userMessage):
 
         # 감정 상태가 바뀌었으면, 새로운 감정 상태로 응답
         # 새로운 감정 상태로 갱신
-        chatroom_memory[chatroom_id] = {"emotion": emotion, "confidence": confidence}
+        chatroom_memory.set(chatroom_id, {"emotion": emotion, "confidence": confidence})
 
         # botResponse는 빈 문자열로 둬서 화면에 응답이 출력되지 않게 처리
         return {
@@ -219,6 +284,86 @@ def sendEmotionChatMessage(user_id, chatroom_id, userMessage):
         }
 
 
+def build_emotion_description(emotion, confidence):
+    """
+    감정 상태에 따라 프롬프트에 추가할 설명 생성
+
+    :param emotion: 감정 ('sadness', 'angry', 'happy', 'panic' 등)
+    :param confidence: 감정 신뢰도
+    :return: 감정 설명 문자열
+    """
+    if emotion:
+        if emotion == "sadness":
+            return f"사용자는 현재 '슬픔({confidence:.2f})' 감정을 느끼고 있어. 공감해 주고, 이전 대화와 있다면 내용이 이어지도록 따뜻한 말을 먼저 건네줘."
+        elif emotion == "angry":
+            return f"사용자는 현재 '분노({confidence:.2f})' 감정을 느끼고 있어. 감정을 진정할 수 있도록 차분하고 부드럽게 반응해주고 이전 대화와 있다면 내용이 이어지도록 대화 해줘."
+        elif emotion == "happy":
+            return f"사용자는 현재 '행복({confidence:.2f})' 감정을 느끼고 있어. 함께 기뻐하면서 긍정적인 대화를 이어가 줘. 이전 대화와 있다면 내용이 이어지도록 대화 해줘."
+        elif emotion == "panic":
+            return f"사용자는 현재 '불안({confidence:.2f})' 상태야. 차분한 말투로 안심시켜줘. 이전 대화와 있다면 내용이 이어지도록 대화 해줘."
+        else:
+            return f"사용자의 감정 상태는 '{emotion}({confidence:.2f})'야. 이에 맞춰 반응해줘. 이전 대화와 있다면 내용이 이어지도록 대화 해줘."
+    return "사용자의 감정 상태를 파악할 수 없어. 평소처럼 친절하게 대화를 이어가 줘. 이전 대화와 있다면 내용이 이어지도록 대화 해줘."
+
+
+def build_prompt_messages(
+    user_id,
+    chatroom_id,
+    user_message,
+    retrieved_context,
+    emotion=None,
+    confidence=None,
+    history_state=None,
+):
+    """
+    고정 시스템 프롬프트 + 감정/이전 대화/검색 결과/질문을 담은 사용자 메시지 생성
+
+    :param user_id: 사용자 ID
+    :param chatroom_id: 채팅방 ID
+    :param user_message: 사용자의 입력 메시지 (question)
+    :param retrieved_context: RAG 검색을 통해 가져온 관련 상담 사례 (context)
+    :param emotion: 이미 조회한 감정 (없으면 DB에서 조회)
+    :param confidence: 이미 조회한 감정 신뢰도
+    :param history_state: 이미 조회한 대화 이력 (없으면 DB에서 조회)
+    :return: [SystemMessage, HumanMessage]
+    """
+    # RAG 검색된 데이터가 없거나 필요하지 않으면 제거
+    if not retrieved_context or retrieved_context == "상담 기록이 없습니다.":
+        retrieved_context = ""
+
+    # 감정 데이터 불러오기
+    if emotion is None:
+        emotion, confidence = get_emotion_data(user_id, chatroom_id)
+
+    # 최근 대화 + 이전 대화 요약 (프롬프트 크기를 일정하게 유지)
+    if history_state is None:
+        history_state = load_history_state(chatroom_id)
+
+    # 요청마다 바뀌는 값은 모두 시스템 프롬프트 뒤에 배치 (프롬프트 캐시 접두어 유지)
+    return [
+        SystemMessage(content=SYSTEM_PROMPT),
+        HumanMessage(
+            content=prompt.format(
+                history=build_history_text(history_state),
+                question=user_message,
+                context=retrieved_context,
+                emotion_description=build_emotion_description(emotion, confidence),
+            )
+        ),
+    ]
+
+
+def retrieve_context(user_message, retrieved_context=""):
+    """검색 결과가 전달되지 않으면 retriever로 관련 상담 사례 검색"""
+    if retrieved_context and retrieved_context != "상담 기록이 없습니다.":
+        return retrieved_context
+    if not user_message.strip():
+        return ""
+    with span("retrieval"):
+        docs = retriever.invoke(user_message)
+    return "\n".join(doc.page_content for doc in docs)
+
+
 def generate_response(
     user_id: str, chatroom_id: str, user_message: str, retrieved_context: str
 ) -> str:
@@ -232,54 +377,123 @@ def generate_response(
     :return: 챗봇의 최종 응답
     """
     try:
-        # RAG 검색된 데이터가 없거나 필요하지 않으면 제거
-        if not retrieved_context or retrieved_context == "상담 기록이 없습니다.":
-            retrieved_context = ""
-
-        # 감정 데이터 불러오기
-        emotion, confidence = get_emotion_data(user_id, chatroom_id)
-
-        # 감정에 따라 프롬프트에 추가할 내용 결정
-        if emotion:
-            if emotion == "sadness":
-                emotion_description = f"사용자는 현재 '슬픔({confidence:.2f})' 감정을 느끼고 있어. 공감해 주고, 이전 대화와 있다면 내용이 이어지도록 따뜻한 말을 먼저 건네줘."
-            elif emotion == "angry":
-                emotion_description = f"사용자는 현재 '분노({confidence:.2f})' 감정을 느끼고 있어. 감정을 진정할 수 있도록 차분하고 부드럽게 반응해주고 이전 대화와 있다면 내용이 이어지도록 대화 해줘."
-            elif emotion == "happy":
-                emotion_description = f"사용자는 현재 '행복({confidence:.2f})' 감정을 느끼고 있어. 함께 기뻐하면서 긍정적인 대화를 이어가 줘. 이전 대화와 있다면 내용이 이어지도록 대화 해줘."
-            elif emotion == "panic":
-                emotion_description = f"사용자는 현재 '불안({confidence:.2f})' 상태야. 차분한 말투로 안심시켜줘. 이전 대화와 있다면 내용이 이어지도록 대화 해줘."
-            else:
-                emotion_description = f"사용자의 감정 상태는 '{emotion}({confidence:.2f})'야. 이에 맞춰 반응해줘. 이전 대화와 있다면 내용이 이어지도록 대화 해줘."
-        else:
-            emotion_description = "사용자의 감정 상태를 파악할 수 없어. 평소처럼 친절하게 대화를 이어가 줘. 이전 대화와 있다면 내용이 이어지도록 대화 해줘."
-
-        # 프롬프트를 생성하여 입력 텍스트 준비
-        input_text = prompt.format(
-            question=user_message,
-            context=retrieved_context,
-            emotion_description=emotion_description,
-        )
-
-        # LLM을 활용한 응답 생성
-        conversation_rag = ConversationalRetrievalChain.from_llm(
-            llm=llm,
-            retriever=retriever,
-            return_source_documents=False,
-            output_key="answer",
-            verbose=False,
+        with span("emotion_data"):
+            emotion, confidence = get_emotion_data(user_id, chatroom_id)
+        with span("history"):
+            history_state = load_history_state(chatroom_id)
+
+        # 첫 대화는 감정이 같고 의미가 비슷한 이전 첫 대화의 응답을 재사용
+        # (이전 대화 맥락에 의존하는 응답은 재사용하지 않도록 첫 대화로 제한)
+        cache_key = None
+        if (
+            semantic_cache is not None
+            and user_message.strip()
+            and history_state["count"] < ActiveConfig.SEMANTIC_CACHE_MAX_TURNS
+        ):
+            bucket = emotion_bucket(emotion, confidence)
+            with span("semantic_cache"):
+                cached_response, vector = semantic_cache.lookup(bucket, user_message)
+            record_cache("semantic", cached_response is not None)
+            if cached_response:
+                return cached_response
+            cache_key = (bucket, vector)
+
+        # 관련 상담 사례는 사용자 메시지 원문으로 검색
+        retrieved_context = retrieve_context(user_message, retrieved_context)
+
+        messages = build_prompt_messages(
+            user_id,
+            chatroom_id,
+            user_message,
+            retrieved_context,
+            emotion=emotion,
+            confidence=confidence,
+            history_state=history_state,
         )
 
         # 챗봇 응답 생성
-        response = conversation_rag.invoke({"question": input_text, "chat_history": []})
+        # 동시 호출 수 제한 + 같은 채팅방의 동일 메시지 중복 요청은 한 번만 호출
+        with span("llm"):
+            response = llm_gateway.call(
+                lambda: llm.invoke(messages),
+                user_id=user_id,
+                key=("chat", chatroom_id, user_message),
+            )
+        record_usage_metadata(response.usage_metadata, prompt_version=PROMPT_VERSION)
 
         # 응답에서 필요한 데이터 추출
-        bot_response = response["answer"].strip()
+        bot_response = response.content.strip()
 
         # 불필요한 줄바꿈 제거
         bot_response = bot_response.replace("\n\n", " ").replace("\n", " ").strip()
 
+        if cache_key is not None:
+            bucket, vector = cache_key
+            semantic_cache.store(bucket, user_message, bot_response, vector)
+
         return bot_response
     except Exception as e:
         logging.error(f"LLM 응답 생성 중 오류 발생: {e}")
         return "챗봇 응답 생성 중 오류가 발생했습니다. 다시 시도해주세요."
+
+
+class StreamingResponseCleaner:
+    """
+    스트리밍 토큰에 generate_response와 같은 정리 규칙을 점진적으로 적용
+
+    - 줄바꿈 2개는 공백 1개, 남은 줄바꿈 1개도 공백 1개로 변환
+    - 앞쪽 공백은 버리고, 뒤쪽 공백은 다음 글자가 올 때까지 보류 (strip과 동일)
+    """
+
+    def __init__(self):
+        self._started = False
+        self._pending_space = ""
+        self._newlines = 0
+
+    def feed(self, text):
+        """토큰 조각을 받아 지금 내보낼 수 있는 정리된 텍스트 반환"""
+        out = []
+        for ch in text:
+            if ch == "\n":
+                self._newlines += 1
+                continue
+            if self._newlines:
+                self._pending_space += " " * ((self._newlines + 1) // 2)
+                self._newlines = 0
+            if ch.isspace():
+                self._pending_space += ch
+                continue
+            if self._started:
+                out.append(self._pending_space)
+            self._pending_space = ""
+            self._started = True
+            out.append(ch)
+        return "".join(out)
+
+
+def generate_response_stream(
+    user_id: str, chatroom_id: str, user_message: str, retrieved_context: str
+):
+    """
+    챗봇 응답을 토큰 단위로 생성하는 제너레이터 (정리 규칙은 점진적으로 적용)
+
+    :param user_id: 사용자 ID
+    :param chatroom_id: 채팅방 ID
+    :param user_message: 사용자의 입력 메시지 (question)
+    :param retrieved_context: RAG 검색을 통해 가져온 관련 상담 사례 (context)
+    :return: 정리된 응답 조각을 순서대로 반환
+    """
+    retrieved_context = retrieve_context(user_message, retrieved_context)
+    messages = build_prompt_messages(user_id, chatroom_id, user_message, retrieved_context)
+
+    cleaner = StreamingResponseCleaner()
+    # 스트리밍은 중간에 재시도할 수 없으므로 실행 슬롯만 점유
+    with llm_gateway.slot(user_id), span("llm_stream"):
+        for chunk in llm.stream(messages):
+            # 마지막 청크에 토큰 사용량 포함
+            usage = getattr(chunk, "usage_metadata", None)
+            if usage:
+                record_usage_metadata(usage, prompt_version=PROMPT_VERSION)
+            text = cleaner.feed(chunk.content or "")
+            if text:
+                yield text
@@ -0,0 +1,341 @@
+"""
+# 채팅 메시지 저장소 (chat_buckets 컬렉션)
+
+채팅방 문서의 chats 배열에 모든 대화를 $push하면 문서가 계속 커지고(최대 16MB),
+채팅방을 조회할 때마다 전체 대화를 읽게 됨 → 대화를 고정 크기 버킷으로 나눠 저장
+- 채팅방 문서: message_count (지금까지 저장한 대화 수, 다음 대화의 seq)
+- chat_buckets 문서: {chatroom_id, bucket, user_id, count, messages: [{seq, ...}]}
+  seq번째 대화는 seq // MESSAGE_BUCKET_SIZE 번 버킷에 저장
+- 조회는 필요한 seq 구간의 버킷만 읽어서 이어 붙임 → 채팅방이 커져도 읽기/쓰기 비용 일정
+
+기존 chats 배열은 flask --app app.py chat migrate-buckets 로 옮기고,
+옮기기 전 채팅방은 chats 배열에서 그대로 읽음 (새 대화를 저장할 때 자동으로 옮김)
+"""
+
+import logging
+from collections import defaultdict
+from datetime import datetime
+
+import pytz
+from pymongo import ASCENDING, ReplaceOne, ReturnDocument
+
+from app.database import mongo
+from config.settings import ActiveConfig
+
+KST = pytz.timezone("Asia/Seoul")
+
+# 채팅방 대화 수 (옮기기 전 채팅방은 chats 배열 길이)
+MESSAGE_COUNT_EXPR = {
+    "$ifNull": ["$message_count", {"$size": {"$ifNull": ["$chats", []]}}]
+}
+
+def bucket_of(seq):
+    return seq // ActiveConfig.MESSAGE_BUCKET_SIZE
+
+
+def bucket_range_query(chatroom_id, start, end=None):
+    """seq 구간 [start, end)를 포함하는 버킷 조회 조건 (end가 None이면 끝까지)"""
+    bucket_filter = {"$gte": bucket_of(start)}
+    if end is not None:
+        bucket_filter["$lte"] = bucket_of(max(end - 1, start))
+    return {"chatroom_id": chatroom_id, "bucket": bucket_filter}
+
+
+def stitch_messages(buckets, start=0, end=None):
+    """버킷들을 seq 순서로 이어 붙이고 [start, end) 구간만 반환"""
+    messages = [
+        message
+        for bucket in buckets
+        for message in bucket.get("messages", [])
+        if message.get("seq", 0) >= start and (end is None or message.get("seq", 0) < end)
+    ]
+    messages.sort(key=lambda message: message.get("seq", 0))
+    return messages
+
+
+def room_counter_update(room_updates, room_defaults):
+    """대화 수를 하나 늘리면서 채팅방 정보 갱신 (없으면 생성)"""
+    update = {"$inc": {"message_count": 1}, "$set": room_updates}
+    if room_defaults:
+        update["$setOnInsert"] = room_defaults
+    return update
+
+
+def bucket_append_update(user_id, seq, chat_data):
+    """버킷에 대화 하나 추가 (버킷이 없으면 생성)"""
+    return {
+        "$push": {"messages": {**chat_data, "seq": seq}},
+        "$inc": {"count": 1},
+        "$setOnInsert": {"user_id": user_id, "created_at": datetime.now(KST).isoformat()},
+    }
+
+
+def append_message(user_id, chatroom_id, chat_data, room_updates, room_defaults=None):
+    """
+    채팅방에 대화 하나 저장
+
+    1. 채팅방 문서의 message_count를 원자적으로 증가시켜 seq 할당 (없으면 채팅방 생성)
+    2. seq에 해당하는 버킷에 대화 추가
+
+    :param chat_data: 저장할 대화
+    :param room_updates: 채팅방 문서에 함께 $set할 필드 (updated_at 등)
+    :param room_defaults: 채팅방을 새로 만들 때만 넣을 필드 (user_id, created_at 등)
+    :return: 저장한 대화의 seq
+    """
+    migrate_chatroom(chatroom_id)
+
+    room = mongo.db.chatrooms.find_one_and_update(
+        {"chatroom_id": chatroom_id},
+        room_counter_update(room_updates, room_defaults),
+        projection={"message_count": 1},
+        upsert=True,
+        return_document=ReturnDocument.AFTER,
+    )
+    seq = room["message_count"] - 1
+
+    mongo.db.chat_buckets.update_one(
+        {"chatroom_id": chatroom_id, "bucket": bucket_of(seq)},
+        bucket_append_update(user_id, seq, chat_data),
+        upsert=True,
+    )
+    return seq
+
+
+def get_message_count(chatroom_id):
+    """채팅방 대화 수 (채팅방이 없으면 0)"""
+    result = list(
+        mongo.db.chatrooms.aggregate(
+            [
+                {"$match": {"chatroom_id": chatroom_id}},
+                {"$project": {"_id": 0, "count": MESSAGE_COUNT_EXPR}},
+            ]
+        )
+    )
+    return result[0]["count"] if result else 0
+
+
+def load_messages(chatroom_id, start=0, end=None):
+    """
+    seq 구간 [start, end)의 대화 조회 (필요한 버킷만 읽음)
+
+    :param start: 시작 seq (포함)
+    :param end: 끝 seq (제외), None이면 마지막 대화까지
+    :return: seq 순서의 대화 목록
+    """
+    start = max(start, 0)
+    if end is not None and end <= start:
+        return []
+
+    buckets = list(
+        mongo.db.chat_buckets.find(bucket_range_query(chatroom_id, start, end)).sort(
+            "bucket", ASCENDING
+        )
+    )
+    if buckets:
+        return stitch_messages(buckets, start, end)
+    return _load_legacy_messages(chatroom_id, start, end)
+
+
+def load_recent_messages(chatroom_id, limit, count=None):
+    """최근 limit개 대화 (count를 알고 있으면 대화 수 조회 생략)"""
+    if count is None:
+        count = get_message_count(chatroom_id)
+    return load_messages(chatroom_id, count - limit, count)
+
+
+def recent_messages_pipeline(match, limit, fields=()):
+    """
+    채팅방 정보와 최근 대화 조회용 aggregate 파이프라인 (필요한 필드만 반환)
+
+    옮기기 전 채팅방은 chats 배열에서 마지막 limit개만 잘라서 가져옴 ($slice)
+    :param match: 채팅방 조회 조건
+    :param fields: 함께 반환할 채팅방 필드
+    """
+    project = {
+        "_id": 0,
+        "chatroom_id": 1,
+        "count": MESSAGE_COUNT_EXPR,
+        "migrated": {"$ne": [{"$type": "$message_count"}, "missing"]},
+        "legacy_chats": {"$slice": [{"$ifNull": ["$chats", []]}, -max(limit, 1)]},
+    }
+    for field in fields:
+        project[field] = 1
+    return [{"$match": match}, {"$project": project}]
+
+
+def attach_recent_messages(rooms, limit):
+    """
+    recent_messages_pipeline 결과의 채팅방마다 최근 limit개 대화를 chats로 붙임
+    (버킷으로 옮긴 채팅방은 필요한 버킷만 한 번의 조회로 가져옴)
+    """
+    limit = max(limit, 1)
+    conditions = [
+        {
+            "chatroom_id": room["chatroom_id"],
+            "bucket": {"$gte": bucket_of(max(room["count"] - limit, 0))},
+        }
+        for room in rooms
+        if room["migrated"] and room["count"] > 0
+    ]
+    buckets_by_room = defaultdict(list)
+    if conditions:
+        for bucket in mongo.db.chat_buckets.find({"$or": conditions}).sort(
+            [("chatroom_id", ASCENDING), ("bucket", ASCENDING)]
+        ):
+            buckets_by_room[bucket["chatroom_id"]].append(bucket)
+
+    for room in rooms:
+        legacy_chats = room.pop("legacy_chats", [])
+        start = max(room["count"] - limit, 0)
+        if room.pop("migrated"):
+            room["chats"] = stitch_messages(buckets_by_room.get(room["chatroom_id"], []), start)
+        else:
+            room["chats"] = with_seq(legacy_chats, start)
+    return rooms
+
+
+def load_messages_for_rooms(chatroom_ids):
+    """여러 채팅방의 전체 대화를 한 번에 조회 (일괄 요약용)"""
+    buckets_by_room = defaultdict(list)
+    for bucket in mongo.db.chat_buckets.find({"chatroom_id": {"$in": chatroom_ids}}).sort(
+        [("chatroom_id", ASCENDING), ("bucket", ASCENDING)]
+    ):
+        buckets_by_room[bucket["chatroom_id"]].append(bucket)
+
+    messages = {
+        chatroom_id: stitch_messages(buckets) for chatroom_id, buckets in buckets_by_room.items()
+    }
+    legacy_ids = [chatroom_id for chatroom_id in chatroom_ids if chatroom_id not in messages]
+    if legacy_ids:
+        for room in mongo.db.chatrooms.find(
+            {"chatroom_id": {"$in": legacy_ids}, "chats": {"$exists": True}},
+            {"chatroom_id": 1, "chats": 1},
+        ):
+            messages[room["chatroom_id"]] = with_seq(room.get("chats", []))
+    return messages
+
+
+def delete_messages(chatroom_id):
+    """채팅방의 모든 버킷 삭제"""
+    return mongo.db.chat_buckets.delete_many({"chatroom_id": chatroom_id}).deleted_count
+
+
+def with_seq(chats, start=0):
+    """chats 배열 대화에 seq 부여"""
+    return [{**chat, "seq": start + i} for i, chat in enumerate(chats)]
+
+
+def _load_legacy_messages(chatroom_id, start, end):
+    """아직 버킷으로 옮기지 않은 채팅방의 chats 배열에서 조회"""
+    projection = (
+        {"chats": {"$slice": [start, end - start]}} if end is not None else {"chats": 1}
+    )
+    room = mongo.db.chatrooms.find_one(
+        {"chatroom_id": chatroom_id, "chats": {"$exists": True}}, projection
+    )
+    if not room:
+        return []
+    chats = room.get("chats", [])
+    if end is None:
+        chats = chats[start:]
+    return with_seq(chats, start)
+
+
+def build_bucket_documents(chatroom_id, user_id, chats):
+    """chats 배열을 버킷 문서 목록으로 변환"""
+    now = datetime.now(KST).isoformat()
+    buckets = defaultdict(list)
+    for message in with_seq(chats):
+        buckets[bucket_of(message["seq"])].append(message)
+    return [
+        {
+            "chatroom_id": chatroom_id,
+            "bucket": bucket,
+            "user_id": user_id,
+            "count": len(messages),
+            "messages": messages,
+            "created_at": now,
+        }
+        for bucket, messages in sorted(buckets.items())
+    ]
+
+
+def bucket_replace_requests(chatroom_id, documents):
+    """버킷 문서를 같은 내용으로 덮어쓰는 bulk_write 요청 (여러 번 실행해도 안전)"""
+    return [
+        ReplaceOne(
+            {"chatroom_id": chatroom_id, "bucket": document["bucket"]},
+            document,
+            upsert=True,
+        )
+        for document in documents
+    ]
+
+
+def migration_finish_update(chatroom_id, count):
+    """
+    이전을 마친 채팅방의 chats 배열 제거 조건과 변경 내용
+
+    옮기는 도중 chats 배열에 대화가 추가됐으면(길이가 다르면) 적용되지 않음
+    :return: (조건, 변경 내용)
+    """
+    return (
+        {"chatroom_id": chatroom_id, "chats": {"$size": count}},
+        {"$set": {"message_count": count}, "$unset": {"chats": ""}},
+    )
+
+
+def migrate_chatroom(chatroom_id):
+    """
+    채팅방의 chats 배열을 버킷으로 옮기고 배열 제거 (이미 옮겼으면 아무것도 하지 않음)
+
+    같은 내용으로 버킷을 덮어쓰므로 중간에 실패해도 다시 실행하면 됨
+    옮기는 도중 chats 배열에 대화가 추가되면 배열을 지우지 않고 다음 실행에서 다시 옮김
+    :return: 옮긴 대화 수 (옮길 것이 없으면 None)
+    """
+    room = mongo.db.chatrooms.find_one(
+        {"chatroom_id": chatroom_id, "chats": {"$exists": True}},
+        {"user_id": 1, "chats": 1},
+    )
+    if room is None:
+        return None
+
+    chats = room.get("chats", [])
+    documents = build_bucket_documents(chatroom_id, room.get("user_id"), chats)
+    if documents:
+        mongo.db.chat_buckets.bulk_write(
+            bucket_replace_requests(chatroom_id, documents), ordered=False
+        )
+
+    result = mongo.db.chatrooms.update_one(*migration_finish_update(chatroom_id, len(chats)))
+    if result.modified_count == 0:
+        logging.warning(f"[WARNING] 버킷 이전 중 대화가 추가됨 - 대화방 ID: {chatroom_id}")
+        return None
+    return len(chats)
+
+
+def migrate_all_chatrooms(limit=None):
+    """
+    chats 배열이 남아 있는 채팅방을 모두 버킷으로 옮김
+
+    :param limit: 최대 처리 채팅방 수
+    :return: 처리 결과 통계
+    """
+    cursor = mongo.db.chatrooms.find({"chats": {"$exists": True}}, {"chatroom_id": 1})
+    if limit:
+        cursor = cursor.limit(limit)
+
+    stats = {"chatrooms": 0, "messages": 0, "skipped": 0}
+    for room in cursor:
+        try:
+            moved = migrate_chatroom(room["chatroom_id"])
+        except Exception as e:
+            logging.error(f"[ERROR] 버킷 이전 실패 - 대화방 ID: {room['chatroom_id']}: {e}")
+            moved = None
+        if moved is None:
+            stats["skipped"] += 1
+            continue
+        stats["chatrooms"] += 1
+        stats["messages"] += moved
+    logging.info(f"[INFO] 버킷 이전 완료 - {stats}")
+    return stats
@@ -0,0 +1,181 @@
+"""
+# 감정 전환 첫마디(오프너) 풀
+
+사용자 메시지 없이 감정만 바뀐 턴은 LLM을 호출하지 않고 미리 만들어 둔 첫마디로 바로 응답
+- (감정, 신뢰도 구간) 버킷별로 첫마디 목록 보관 (프롬프트의 감정별 예시로 시작)
+- OPENER_REFRESH_SECONDS마다 백그라운드에서 LLM으로 새 첫마디를 만들어 교체
+- 갱신 실패 시 기존 목록을 그대로 사용
+"""
+
+import re
+import time
+import random
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from langchain_openai import ChatOpenAI
+
+from app.services.llm_gateway import llm_gateway
+from app.services.semantic_cache import emotion_bucket
+from config.settings import ActiveConfig
+
+# 첫마디 생성용 LLM (표현이 다양하도록 높은 temperature)
+opener_llm = ChatOpenAI(
+    model_name="gpt-4o-mini", temperature=0.9, max_tokens=600, max_retries=0
+)
+
+# 버킷별 초기 첫마디 (high: 프롬프트의 감정별 예시, low: 조심스럽게 묻는 표현)
+SEED_OPENERS = {
+    "sadness:high": [
+        "너 오늘 무슨 일 있었어어? 왠지 슬픔이 느껴져. 편하게 나한테 털어놔봐. 같이 이야기하면 조금은 나아질 거야 😊",
+        "친구야.. 슬퍼보인다... 어떤 일이 있었어? 나랑 얘기하면서 조금이라도 기분이 나아졌으면 좋겠어 😢",
+    ],
+    "sadness:low": [
+        "오늘 좀 기운이 없어 보이는데... 혹시 무슨 일 있었어? 편하게 얘기해줘 😊",
+    ],
+    "angry:high": [
+        "지금 화나 보이는데 무슨 일 있었어? 나랑 이야기하면서 마음 좀 풀어보자!",
+    ],
+    "angry:low": [
+        "뭔가 좀 언짢은 일 있었어? 나한테 편하게 털어놔도 돼!",
+    ],
+    "happy:high": [
+        "우와, 오늘 기분 좋네! 무슨 좋은 일이 있었어? 나랑도 그 기쁨을 나눠줘! 😄",
+    ],
+    "happy:low": [
+        "오 오늘 표정 좀 밝은데? 좋은 일 있었어? 😄",
+    ],
+    "panic:high": [
+        "오늘 뭔가 불안해 보여... 내가 도와줄 수 있을까? 고민이 있으면 털어놔 봐.",
+    ],
+    "panic:low": [
+        "혹시 신경 쓰이는 일 있어? 괜찮으면 나한테 얘기해줘. 같이 생각해보자!",
+    ],
+    "neutral:high": [
+        "안녕! 오늘 하루는 어땠어? 나한테 편하게 얘기해줘 😊",
+    ],
+    "neutral:low": [
+        "안녕! 오늘 하루는 어땠어? 나한테 편하게 얘기해줘 😊",
+    ],
+}
+
+EMOTION_NAMES = {
+    "sadness": "슬픔",
+    "angry": "분노",
+    "happy": "기쁨",
+    "panic": "불안",
+    "neutral": "평온",
+}
+
+OPENER_PROMPT = """너는 고민을 들어주고 공감해주는 사춘기 청소년 전문 또래 상담가야.
+사용자가 아직 아무 말도 하지 않았고, 표정에서 '{emotion}' 감정이 {level} 느껴졌어.
+먼저 말을 거는 첫마디를 {count}개 만들어줘.
+- 친구처럼 반말, 따뜻하고 친근한 말투, 상황에 맞는 이모티콘
+- 사용자가 말하지 않은 구체적인 사건은 추측하지 말 것
+- 마지막은 열린 질문으로 끝낼 것
+- 한 줄에 하나씩, 번호나 따옴표 없이 출력
+
+예시:
+{examples}
+
+첫마디:"""
+
+
+def parse_openers(text):
+    """LLM 출력에서 첫마디 목록 추출 (번호, 따옴표, 빈 줄 제거)"""
+    openers = []
+    for line in text.splitlines():
+        line = re.sub(r"^\s*(?:[-•*]|\d+[.)])\s*", "", line).strip().strip('"“”').strip()
+        if line:
+            openers.append(line)
+    return openers
+
+
+class OpenerPool:
+    """
+    (감정, 신뢰도 구간)별 첫마디 풀
+
+    :param seeds: 버킷별 초기 첫마디
+    :param pool_size: 갱신 시 버킷별로 만들 첫마디 수
+    :param refresh_interval: 갱신 주기(초), 0이면 갱신하지 않음
+    """
+
+    def __init__(self, seeds, pool_size=8, refresh_interval=86400):
+        self.seeds = seeds
+        self.pool_size = pool_size
+        self.refresh_interval = refresh_interval
+        self._pools = {bucket: list(openers) for bucket, openers in seeds.items()}
+        self._refreshed_at = {}
+        self._last_served = {}
+        self._refreshing = set()
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="opener-refresh")
+
+    def _bucket(self, emotion, confidence):
+        bucket = emotion_bucket(emotion, confidence)
+        return bucket if bucket in self._pools else emotion_bucket("neutral", confidence)
+
+    def pick(self, emotion, confidence):
+        """버킷의 첫마디 하나를 반환 (직전에 준 첫마디는 가능하면 피함)"""
+        bucket = self._bucket(emotion, confidence)
+        with self._lock:
+            openers = self._pools[bucket]
+            candidates = [o for o in openers if o != self._last_served.get(bucket)] or openers
+            opener = random.choice(candidates)
+            self._last_served[bucket] = opener
+        self._schedule_refresh(bucket)
+        return opener
+
+    def _schedule_refresh(self, bucket):
+        if not self.refresh_interval:
+            return
+        with self._lock:
+            if bucket in self._refreshing:
+                return
+            if time.time() - self._refreshed_at.get(bucket, 0) < self.refresh_interval:
+                return
+            self._refreshing.add(bucket)
+        self._executor.submit(self._run_refresh, bucket)
+
+    def _run_refresh(self, bucket):
+        try:
+            self.refresh(bucket)
+        except Exception as e:
+            logging.error(f"[ERROR] 첫마디 갱신 실패 - 버킷: {bucket}: {e}")
+        finally:
+            with self._lock:
+                # 실패해도 다음 주기까지는 다시 시도하지 않음
+                self._refreshed_at[bucket] = time.time()
+                self._refreshing.discard(bucket)
+
+    def refresh(self, bucket):
+        """LLM으로 버킷의 첫마디를 새로 만들어 교체"""
+        emotion, level = bucket.split(":")
+        opener_prompt = OPENER_PROMPT.format(
+            emotion=EMOTION_NAMES.get(emotion, emotion),
+            level="뚜렷하게" if level == "high" else "살짝",
+            count=self.pool_size,
+            examples="\n".join(self.seeds[bucket]),
+        )
+        response = llm_gateway.call(
+            lambda: opener_llm.invoke(opener_prompt), key=("opener", bucket)
+        )
+        openers = parse_openers(response.content)[: self.pool_size]
+        if not openers:
+            return
+
+        with self._lock:
+            self._pools[bucket] = openers
+        logging.info(f"[INFO] 첫마디 갱신 완료 - 버킷: {bucket}, {len(openers)}개")
+
+    def stats(self):
+        with self._lock:
+            return {bucket: len(openers) for bucket, openers in self._pools.items()}
+
+
+opener_pool = OpenerPool(
+    SEED_OPENERS,
+    pool_size=ActiveConfig.OPENER_POOL_SIZE,
+    refresh_interval=ActiveConfig.OPENER_REFRESH_SECONDS,
+)
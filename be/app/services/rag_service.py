@@ -6,28 +6,31 @@ FAISS 벡터 DB 로드 및 검색 기능 제공
 검색된 문서에서 output 추출
 """
 
-import os
-from langchain_community.vectorstores import FAISS
-from langchain_openai import OpenAIEmbeddings
 from dotenv import load_dotenv
 from config.settings import ActiveConfig
+from app.services.vector_store import load_vectorstore
+from app.services.retrieval_client import RetrievalClient, RemoteRetriever
 
 load_dotenv()
 
 VECTOR_DB_PATH = ActiveConfig.VECTOR_DB_PATH
+RETRIEVAL_SERVICE_ADDR = ActiveConfig.RETRIEVAL_SERVICE_ADDR
 
 try:
-    # FAISS 벡터 DB 로드
-    vectorstore = FAISS.load_local(
-        VECTOR_DB_PATH, OpenAIEmbeddings(), allow_dangerous_deserialization=True
-    )
-    retriever = vectorstore.as_retriever()
+    if RETRIEVAL_SERVICE_ADDR:
+        # 독립 검색 서비스 사용: 웹 워커는 인덱스/임베딩 모델을 메모리에 올리지 않음
+        retriever = RemoteRetriever(client=RetrievalClient(RETRIEVAL_SERVICE_ADDR))
+        print(f"검색 서비스 사용: {RETRIEVAL_SERVICE_ADDR}")
+    else:
+        # FAISS 벡터 DB 로드 (인덱스를 만든 임베딩 모델과 같은 모델로 질의 임베딩)
+        vectorstore, manifest = load_vectorstore(VECTOR_DB_PATH)
+        retriever = vectorstore.as_retriever()
+        print("FAISS 벡터 DB 로드 성공")
 
     if retriever is None:
         raise RuntimeError(
             "retriever가 None입니다. 벡터 DB 로드에 실패했을 가능성이 있습니다."
         )
-    print("FAISS 벡터 DB 로드 성공")
 except Exception as e:
     print(f"모델 로드 중 오류 발생: {e}")
     raise
@@ -0,0 +1,133 @@
+"""
+# 독립 검색 서비스(tools/retrieval_server.py) 클라이언트
+
+길이 프리픽스 JSON 프로토콜 (4바이트 길이 + UTF-8 JSON)
+여러 질의를 한 번에 보내는 배치 검색
+LangChain retriever 인터페이스(RemoteRetriever) 제공
+"""
+
+import json
+import socket
+import struct
+import threading
+from typing import Any, List
+
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+
+_HEADER = struct.Struct(">I")
+
+
+def send_message(sock, payload):
+    """JSON 메시지 전송"""
+    data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+    sock.sendall(_HEADER.pack(len(data)) + data)
+
+
+def _recv_exact(sock, size):
+    buf = bytearray()
+    while len(buf) < size:
+        chunk = sock.recv(size - len(buf))
+        if not chunk:
+            raise ConnectionError("검색 서비스 연결이 끊어졌습니다.")
+        buf.extend(chunk)
+    return bytes(buf)
+
+
+def recv_message(sock):
+    """JSON 메시지 수신"""
+    (size,) = _HEADER.unpack(_recv_exact(sock, _HEADER.size))
+    return json.loads(_recv_exact(sock, size).decode("utf-8"))
+
+
+def connect(address, timeout=None):
+    """
+    'host:port' 또는 'unix:/path/to.sock' 주소로 연결
+
+    :param address: 검색 서비스 주소
+    :param timeout: 소켓 타임아웃(초)
+    """
+    if address.startswith("unix:"):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(timeout)
+        sock.connect(address[len("unix:") :])
+        return sock
+
+    host, port = address.rsplit(":", 1)
+    return socket.create_connection((host, int(port)), timeout=timeout)
+
+
+class RetrievalClient:
+    """
+    검색 서비스 클라이언트 (스레드마다 연결 1개를 재사용)
+    """
+
+    def __init__(self, address, timeout=10.0):
+        self.address = address
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def _request(self, payload):
+        # 끊어진 연결이면 한 번만 다시 연결해서 재시도
+        for attempt in range(2):
+            sock = getattr(self._local, "sock", None)
+            try:
+                if sock is None:
+                    sock = connect(self.address, self.timeout)
+                    self._local.sock = sock
+                send_message(sock, payload)
+                response = recv_message(sock)
+                break
+            except (ConnectionError, OSError):
+                if sock is not None:
+                    sock.close()
+                self._local.sock = None
+                if attempt == 1:
+                    raise
+
+        if "error" in response:
+            raise RuntimeError(f"검색 서비스 오류: {response['error']}")
+        return response
+
+    def search(self, queries, k=4):
+        """
+        여러 질의를 한 번에 검색
+
+        :param queries: 질의 문자열 리스트
+        :param k: 질의당 결과 수
+        :return: 질의별 [(Document, 거리)] 리스트
+        """
+        response = self._request({"op": "search", "queries": list(queries), "k": k})
+        return [
+            [
+                (Document(page_content=hit["page_content"], metadata=hit["metadata"]), hit["score"])
+                for hit in hits
+            ]
+            for hits in response["results"]
+        ]
+
+    def search_vectors(self, vectors, k=4):
+        """
+        이미 임베딩된 질의 벡터로 검색 (라우터 → 샤드 scatter 용)
+
+        :return: 질의별 hit 딕셔너리 리스트 (page_content, metadata, score)
+        """
+        response = self._request({"op": "search_vectors", "vectors": vectors, "k": k})
+        return response["results"]
+
+    def info(self):
+        """검색 서비스 상태 (manifest, 벡터 수, 샤드 구성)"""
+        return self._request({"op": "info"})
+
+
+class RemoteRetriever(BaseRetriever):
+    """검색 서비스를 사용하는 LangChain retriever (vectorstore.as_retriever() 대체)"""
+
+    client: Any
+    k: int = 4
+
+    def _get_relevant_documents(
+        self, query: str, *, run_manager: CallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        return [doc for doc, _ in self.client.search([query], k=self.k)[0]]
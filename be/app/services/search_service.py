@@ -0,0 +1,240 @@
+"""
+# 대화 검색 (chat_search 컬렉션, n-gram 역색인)
+
+한국어는 띄어쓰기 단위 형태소 분석 없이도 찾을 수 있도록 글자 단위 n-gram으로 색인
+- chat_search 문서: {user_id, chatroom_id, seq, terms: [1-gram, 2-gram ...], text, norm_text, timestamp}
+  대화 하나(user_message)당 문서 하나, add_chat/save_chat에서 버킷 저장 후 함께 기록
+  norm_text: 원문을 n-gram과 같은 규칙(NFKC, 소문자)으로 정규화한 문자열
+- 검색: 검색어의 n-gram을 모두 가진 문서만 인덱스(user_id, terms)로 추린 뒤
+  이스케이프한 검색어로 norm_text 확인 → 채팅방별 일치 대화 수로 순위, 최근 일치 대화로 스니펫 생성
+
+기존 대화 색인 (여러 번 실행해도 안전): flask --app app.py chat reindex-search
+"""
+
+import re
+import logging
+import unicodedata
+
+from pymongo import ReplaceOne
+
+from app.database import mongo
+from app.services.message_store import load_messages
+from config.settings import ActiveConfig
+
+# 검색어 하나에서 사용할 최대 n-gram 수 (나머지는 원문 확인 단계에서 걸러짐)
+MAX_QUERY_TERMS = 16
+
+
+def normalize_text(text):
+    """전각/반각, 대소문자 차이를 없앤 검색용 문자열"""
+    return unicodedata.normalize("NFKC", text or "").lower()
+
+
+def split_words(text):
+    return re.findall(r"\w+", normalize_text(text))
+
+
+def tokenize_terms(text):
+    """
+    색인용 n-gram (단어마다 글자 1-gram + 2-gram)
+
+    "학교에서" → 학, 교, 에, 서, 학교, 교에, 에서
+    """
+    terms = set()
+    for word in split_words(text):
+        terms.update(word)
+        terms.update(word[i : i + 2] for i in range(len(word) - 1))
+    return sorted(terms)
+
+
+def query_terms(query):
+    """
+    검색용 n-gram (한 글자 단어는 1-gram, 나머지는 2-gram)
+
+    :return: (검색어 단어 목록, n-gram 목록)
+    """
+    words = split_words(query)
+    terms = []
+    for word in words:
+        grams = [word] if len(word) == 1 else [word[i : i + 2] for i in range(len(word) - 1)]
+        terms.extend(gram for gram in grams if gram not in terms)
+    return words, terms[:MAX_QUERY_TERMS]
+
+
+def search_entry(user_id, chatroom_id, seq, chat_data):
+    """대화 하나의 검색 문서 (색인할 내용이 없으면 None)"""
+    text = chat_data.get("user_message") or ""
+    terms = tokenize_terms(text)
+    if not terms:
+        return None
+    return {
+        "user_id": user_id,
+        "chatroom_id": chatroom_id,
+        "seq": seq,
+        "terms": terms,
+        "text": text,
+        "norm_text": normalize_text(text),
+        "timestamp": chat_data.get("timestamp"),
+    }
+
+
+def search_filter(user_id, words, terms):
+    """
+    n-gram으로 후보를 추리고 단어별 포함 여부 확인 (검색어는 정규식으로 해석하지 않음)
+
+    words는 split_words로 정규화한 단어이므로 같은 규칙으로 정규화한 norm_text와 비교
+    (원문 text와 비교하면 전각 문자 등 n-gram으로는 찾은 대화가 빠짐)
+    """
+    return {
+        "user_id": user_id,
+        "terms": {"$all": terms},
+        "$and": [{"norm_text": {"$regex": re.escape(word)}} for word in words],
+    }
+
+
+def search_pipeline(user_id, words, terms, limit):
+    """채팅방별 일치 대화 수 순위 (최근 일치 대화 seq 포함)"""
+    return [
+        {"$match": search_filter(user_id, words, terms)},
+        {"$sort": {"seq": -1}},
+        {"$group": {"_id": "$chatroom_id", "hits": {"$sum": 1}, "seqs": {"$push": "$seq"}}},
+        {
+            "$project": {
+                "hits": 1,
+                "seqs": {"$slice": ["$seqs", ActiveConfig.SEARCH_SNIPPETS_PER_ROOM]},
+            }
+        },
+        {"$sort": {"hits": -1, "_id": -1}},
+        {"$limit": limit},
+    ]
+
+
+def make_snippet(text, words, width=None):
+    """
+    처음 일치한 단어 앞뒤 width자씩 잘라낸 스니펫
+
+    :return: {"text": 스니펫, "highlights": [[시작, 끝], ...]} (스니펫 문자열 기준 위치)
+    """
+    width = width or ActiveConfig.SEARCH_SNIPPET_CHARS
+    lowered = normalize_text(text)
+    if len(lowered) != len(text):
+        # NFKC 변환으로 길이가 바뀌면 위치가 어긋나므로 소문자 변환만 적용
+        lowered = text.lower()
+
+    positions = [lowered.find(word) for word in words]
+    first = min((pos for pos in positions if pos >= 0), default=0)
+    start = max(first - width, 0)
+    end = min(first + width, len(text))
+    prefix = "…" if start > 0 else ""
+
+    highlights = [
+        [len(prefix) + match.start(), len(prefix) + match.end()]
+        for word in words
+        for match in re.finditer(re.escape(word), lowered[start:end])
+    ]
+    return {
+        "text": prefix + text[start:end] + ("…" if end < len(text) else ""),
+        "highlights": sorted(highlights),
+    }
+
+
+# --- 색인 ---
+
+
+def index_message(user_id, chatroom_id, seq, chat_data):
+    """저장한 대화 하나 색인 (실패해도 대화 저장은 유지, reindex-search로 복구)"""
+    entry = search_entry(user_id, chatroom_id, seq, chat_data)
+    if entry is None:
+        return
+    try:
+        mongo.db.chat_search.replace_one(
+            {"chatroom_id": chatroom_id, "seq": seq}, entry, upsert=True
+        )
+    except Exception as e:
+        logging.error(f"[ERROR] 대화 검색 색인 실패 (chatroom_id={chatroom_id}, seq={seq}): {e}")
+
+
+def delete_search_entries(chatroom_id):
+    """채팅방의 검색 문서 삭제"""
+    return mongo.db.chat_search.delete_many({"chatroom_id": chatroom_id}).deleted_count
+
+
+def reindex_chatroom(user_id, chatroom_id):
+    """채팅방의 모든 대화 다시 색인 (버킷으로 옮기기 전 채팅방 포함)"""
+    entries = [
+        search_entry(user_id, chatroom_id, message["seq"], message)
+        for message in load_messages(chatroom_id)
+    ]
+    requests = [
+        ReplaceOne({"chatroom_id": chatroom_id, "seq": entry["seq"]}, entry, upsert=True)
+        for entry in entries
+        if entry is not None
+    ]
+    if requests:
+        mongo.db.chat_search.bulk_write(requests, ordered=False)
+    return len(requests)
+
+
+def reindex_all_chatrooms(limit=None):
+    """
+    모든 채팅방 다시 색인
+
+    :param limit: 최대 처리 채팅방 수
+    :return: 처리 결과 통계
+    """
+    cursor = mongo.db.chatrooms.find({}, {"_id": 0, "user_id": 1, "chatroom_id": 1})
+    if limit:
+        cursor = cursor.limit(limit)
+
+    stats = {"chatrooms": 0, "messages": 0, "failed": 0}
+    for room in cursor:
+        try:
+            stats["messages"] += reindex_chatroom(room.get("user_id"), room["chatroom_id"])
+            stats["chatrooms"] += 1
+        except Exception as e:
+            logging.error(f"[ERROR] 채팅방 색인 실패 ({room['chatroom_id']}): {e}")
+            stats["failed"] += 1
+    return stats
+
+
+# --- 검색 ---
+
+
+def search_messages(user_id, query, limit):
+    """
+    사용자의 대화 검색
+
+    :param query: 검색어 (공백으로 나눈 단어를 모두 포함한 대화)
+    :param limit: 최대 채팅방 수
+    :return: [{"chatroom_id", "hits": 일치 대화 수, "snippets": [{seq, text, highlights, timestamp}]}]
+    """
+    words, terms = query_terms(query)
+    if not terms:
+        return []
+
+    ranked = list(mongo.db.chat_search.aggregate(search_pipeline(user_id, words, terms, limit)))
+    if not ranked:
+        return []
+
+    # 스니펫용 대화 원문은 순위가 정해진 대화만 조회
+    keys = [{"chatroom_id": room["_id"], "seq": {"$in": room["seqs"]}} for room in ranked]
+    entries = {
+        (entry["chatroom_id"], entry["seq"]): entry
+        for entry in mongo.db.chat_search.find(
+            {"user_id": user_id, "$or": keys},
+            {"_id": 0, "chatroom_id": 1, "seq": 1, "text": 1, "timestamp": 1},
+        )
+    }
+
+    results = []
+    for room in ranked:
+        snippets = []
+        for seq in room["seqs"]:
+            entry = entries.get((room["_id"], seq))
+            if entry is None:
+                continue
+            snippets.append(
+                {"seq": seq, **make_snippet(entry["text"], words), "timestamp": entry.get("timestamp")}
+            )
+        results.append({"chatroom_id": room["_id"], "hits": room["hits"], "snippets": snippets})
+    return results
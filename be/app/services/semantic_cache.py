@@ -0,0 +1,131 @@
+"""
+# 첫 대화용 시맨틱 응답 캐시
+
+(감정 버킷, 메시지 임베딩) 기준으로 이전 첫 대화 응답 재사용
+유사도가 임계값 이상인 경우에만 저장된 응답 중 하나를 반환
+항목별 TTL, 전체 항목 수 제한(LRU)
+"""
+
+import time
+import random
+import logging
+import threading
+from collections import OrderedDict
+
+import numpy as np
+from config.settings import ActiveConfig
+
+
+def emotion_bucket(emotion, confidence):
+    """감정과 신뢰도 구간으로 캐시 버킷 키 생성 (예: 'sadness:high')"""
+    level = "high" if (confidence or 0) >= 0.7 else "low"
+    return f"{emotion or 'neutral'}:{level}"
+
+
+class SemanticResponseCache:
+    """
+    프로세스 내 시맨틱 응답 캐시
+
+    :param embeddings: LangChain 임베딩 객체 (embed_query 사용)
+    :param threshold: 코사인 유사도 임계값
+    :param ttl: 항목 유지 시간(초)
+    :param max_entries: 최대 항목 수 (초과 시 가장 오래 사용하지 않은 항목 제거)
+    :param responses_per_entry: 항목당 저장할 응답 수 (여러 응답 중 무작위 반환)
+    """
+
+    def __init__(
+        self, embeddings, threshold=0.92, ttl=3600, max_entries=1000, responses_per_entry=3
+    ):
+        self.embeddings = embeddings
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.responses_per_entry = responses_per_entry
+        self._entries = OrderedDict()
+        self._next_id = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def embed(self, message):
+        vector = np.asarray(self.embeddings.embed_query(message), dtype="float32")
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _find(self, bucket, vector, now):
+        """버킷 안에서 가장 유사한 항목 찾기 (만료된 항목은 제거)"""
+        best_id, best_score = None, -1.0
+        for entry_id, entry in list(self._entries.items()):
+            if entry["expires_at"] <= now:
+                del self._entries[entry_id]
+                continue
+            if entry["bucket"] != bucket:
+                continue
+            score = float(np.dot(entry["vector"], vector))
+            if score > best_score:
+                best_id, best_score = entry_id, score
+        return best_id, best_score
+
+    def lookup(self, bucket, message):
+        """
+        유사한 이전 메시지가 있으면 저장된 응답 반환
+
+        :return: (응답 또는 None, 메시지 벡터) - 벡터는 store에서 재사용
+        """
+        vector = self.embed(message)
+        with self._lock:
+            entry_id, score = self._find(bucket, vector, time.time())
+            if entry_id is not None and score >= self.threshold:
+                self._entries.move_to_end(entry_id)
+                self.hits += 1
+                logging.info(f"[INFO] 시맨틱 캐시 적중 (bucket={bucket}, 유사도={score:.3f})")
+                return random.choice(self._entries[entry_id]["responses"]), vector
+            self.misses += 1
+        return None, vector
+
+    def store(self, bucket, message, response, vector=None):
+        """응답 저장 (유사한 항목이 있으면 응답 목록에 추가)"""
+        if vector is None:
+            vector = self.embed(message)
+        now = time.time()
+
+        with self._lock:
+            entry_id, score = self._find(bucket, vector, now)
+            if entry_id is not None and score >= self.threshold:
+                responses = self._entries[entry_id]["responses"]
+                if len(responses) < self.responses_per_entry and response not in responses:
+                    responses.append(response)
+                self._entries.move_to_end(entry_id)
+                return
+
+            self._entries[self._next_id] = {
+                "bucket": bucket,
+                "vector": vector,
+                "responses": [response],
+                "expires_at": now + self.ttl,
+            }
+            self._next_id += 1
+
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self):
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+def create_semantic_cache():
+    """설정(SEMANTIC_CACHE_ENABLED)이 켜져 있을 때만 캐시 생성"""
+    if not ActiveConfig.SEMANTIC_CACHE_ENABLED:
+        return None
+
+    from langchain_openai import OpenAIEmbeddings
+
+    print("시맨틱 응답 캐시 사용")
+    return SemanticResponseCache(
+        OpenAIEmbeddings(),
+        threshold=ActiveConfig.SEMANTIC_CACHE_THRESHOLD,
+        ttl=ActiveConfig.SEMANTIC_CACHE_TTL,
+        max_entries=ActiveConfig.SEMANTIC_CACHE_MAX_ENTRIES,
+        responses_per_entry=ActiveConfig.SEMANTIC_CACHE_RESPONSES,
+    )
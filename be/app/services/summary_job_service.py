@@ -0,0 +1,308 @@
+"""
+# 일기 요약 작업 큐 (MongoDB summary_jobs 컬렉션)
+
+/diary/summary/jobs 요청은 작업만 등록하고 바로 job_id 반환, 요약/일기 저장은 워커가 처리
+- 같은 채팅방의 대기/실행 중 작업이 있으면 새로 만들지 않고 그 작업을 반환 (중복 병합)
+- 워커는 작업을 임대(lease)해서 실행, 워커가 죽어 임대가 만료되면 다른 워커가 다시 가져감
+- 일시적 오류(DB/OpenAI 5xx, 429)는 지수 백오프 후 재시도, 최대 시도 횟수 초과 시 failed
+
+워커 실행: python tools/summary_worker.py
+"""
+
+import os
+import socket
+import logging
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+
+from bson import ObjectId
+from bson.errors import InvalidId
+from pymongo import ASCENDING, ReturnDocument
+from pymongo.errors import DuplicateKeyError
+from flask import current_app
+
+from app.database import mongo
+from app.services.diary_service import create_diary_once
+from app.services.diary_summary_service import generate_summary
+from app.services.emotion_service import get_emotion_results
+from config.settings import ActiveConfig
+
+JOB_TYPE_DIARY_SUMMARY = "diary_summary"
+
+# 작업 상태
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+
+def _now():
+    return datetime.now(timezone.utc)
+
+
+def serialize_job(job):
+    """API 응답용 작업 정보"""
+    data = {
+        "job_id": str(job["_id"]),
+        "chatroom_id": job["chatroom_id"],
+        "status": job["status"],
+        "attempts": job.get("attempts", 0),
+        "created_at": job["created_at"].isoformat(),
+        "updated_at": job["updated_at"].isoformat(),
+    }
+    if job.get("result") is not None:
+        data["result"] = job["result"]
+    if job.get("error"):
+        data["error"] = job["error"]
+    return data
+
+
+def enqueue_summary_job(user_id, chatroom_id, date=None):
+    """
+    일기 요약 작업 등록
+
+    :param user_id: 사용자 ID
+    :param chatroom_id: 채팅방 ID
+    :param date: 요청에서 받은 일기 날짜 (보관용, 일기 날짜는 저장 시점의 KST 날짜)
+    :return: (작업 문서, 새로 만들었는지 여부)
+    """
+    now = _now()
+    new_id = ObjectId()
+    job_filter = {"type": JOB_TYPE_DIARY_SUMMARY, "chatroom_id": chatroom_id, "active": True}
+
+    for _ in range(2):
+        try:
+            job = mongo.db.summary_jobs.find_one_and_update(
+                job_filter,
+                {
+                    "$setOnInsert": {
+                        "_id": new_id,
+                        "user_id": user_id,
+                        "date": date,
+                        "status": QUEUED,
+                        "attempts": 0,
+                        "max_attempts": ActiveConfig.SUMMARY_JOB_MAX_ATTEMPTS,
+                        "run_after": now,
+                        "lease_until": None,
+                        "worker_id": None,
+                        "result": None,
+                        "error": None,
+                        "created_at": now,
+                        "updated_at": now,
+                    }
+                },
+                upsert=True,
+                return_document=ReturnDocument.AFTER,
+            )
+            return job, job["_id"] == new_id
+        except DuplicateKeyError:
+            # 다른 요청이 같은 채팅방 작업을 동시에 만든 경우 → 그 작업을 다시 조회
+            continue
+    raise RuntimeError("요약 작업 등록 실패")
+
+
+def get_summary_job(job_id, user_id):
+    """사용자의 작업 조회 (없거나 다른 사용자 작업이면 None)"""
+    try:
+        object_id = ObjectId(job_id)
+    except (InvalidId, TypeError):
+        return None
+    return mongo.db.summary_jobs.find_one({"_id": object_id, "user_id": user_id})
+
+
+def claim_summary_job(worker_id):
+    """
+    실행할 작업 하나를 임대
+
+    대기 중이면서 실행 시각이 된 작업, 또는 임대가 만료된 실행 중 작업을 가져옴
+    :return: 작업 문서 (없으면 None)
+    """
+    now = _now()
+    return mongo.db.summary_jobs.find_one_and_update(
+        {
+            "$or": [
+                {"status": QUEUED, "run_after": {"$lte": now}},
+                {"status": RUNNING, "lease_until": {"$lt": now}},
+            ]
+        },
+        {
+            "$set": {
+                "status": RUNNING,
+                "worker_id": worker_id,
+                "lease_until": now + timedelta(seconds=ActiveConfig.SUMMARY_JOB_LEASE_SECONDS),
+                "updated_at": now,
+            },
+            "$inc": {"attempts": 1},
+        },
+        sort=[("run_after", ASCENDING)],
+        return_document=ReturnDocument.AFTER,
+    )
+
+
+def renew_summary_lease(job):
+    """
+    작업 임대 연장 (이 워커가 아직 임대 중인 경우만)
+
+    :return: 연장했으면 True, 임대가 만료되어 다른 워커가 가져갔으면 False
+    """
+    now = _now()
+    result = mongo.db.summary_jobs.update_one(
+        {"_id": job["_id"], "worker_id": job["worker_id"], "status": RUNNING},
+        {
+            "$set": {
+                "lease_until": now + timedelta(seconds=ActiveConfig.SUMMARY_JOB_LEASE_SECONDS),
+                "updated_at": now,
+            }
+        },
+    )
+    return result.modified_count > 0
+
+
+@contextmanager
+def lease_heartbeat(job):
+    """
+    작업 실행 중 임대 시간의 1/3마다 임대 연장
+
+    긴 대화 분할 요약처럼 임대 시간보다 오래 걸리는 작업을 다른 워커가 다시 가져가지 않도록 함
+    """
+    app = current_app._get_current_object()
+    stop_event = threading.Event()
+    interval = max(1.0, ActiveConfig.SUMMARY_JOB_LEASE_SECONDS / 3)
+
+    def beat():
+        with app.app_context():
+            while not stop_event.wait(interval):
+                try:
+                    if not renew_summary_lease(job):
+                        logging.warning(f"[WARNING] 작업 임대를 잃음 - job_id: {job['_id']}")
+                        return
+                except Exception as e:
+                    logging.error(f"[ERROR] 작업 임대 연장 실패 - job_id: {job['_id']}: {e}")
+
+    thread = threading.Thread(target=beat, name=f"summary-lease-{job['_id']}", daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        stop_event.set()
+        thread.join()
+
+
+def complete_summary_job(job, result):
+    """작업 성공 처리 (임대한 워커만 반영)"""
+    mongo.db.summary_jobs.update_one(
+        {"_id": job["_id"], "worker_id": job["worker_id"], "status": RUNNING},
+        {
+            "$set": {
+                "status": DONE,
+                "active": False,
+                "result": result,
+                "error": None,
+                "lease_until": None,
+                "updated_at": _now(),
+            }
+        },
+    )
+
+
+def fail_summary_job(job, error, retryable=True):
+    """
+    작업 실패 처리
+
+    :param retryable: True이고 시도 횟수가 남았으면 백오프 후 다시 대기열로
+    """
+    now = _now()
+    if retryable and job["attempts"] < job.get("max_attempts", 1):
+        delay = ActiveConfig.SUMMARY_JOB_RETRY_DELAY * (2 ** (job["attempts"] - 1))
+        update = {
+            "status": QUEUED,
+            "run_after": now + timedelta(seconds=delay),
+            "lease_until": None,
+            "error": error,
+            "updated_at": now,
+        }
+    else:
+        update = {
+            "status": FAILED,
+            "active": False,
+            "lease_until": None,
+            "error": error,
+            "updated_at": now,
+        }
+    mongo.db.summary_jobs.update_one(
+        {"_id": job["_id"], "worker_id": job["worker_id"], "status": RUNNING},
+        {"$set": update},
+    )
+
+
+def run_summary_job(job):
+    """
+    요약 생성 + 감정 조회 + 일기 저장 (/diary/summary/save와 같은 처리)
+
+    :return: (결과 딕셔너리, None) 또는 (None, (오류 메시지, 재시도 여부))
+    """
+    user_id, chatroom_id = job["user_id"], job["chatroom_id"]
+
+    summary = generate_summary(chatroom_id)
+    if isinstance(summary, tuple):
+        error, status_code = summary
+        # 대화방 없음/종료 안 됨/내용 없음 같은 4xx는 재시도해도 같은 결과
+        retryable = status_code >= 500 or status_code == 429
+        return None, (error.get("error", str(error)), retryable)
+
+    emotion_data = get_emotion_results(chatroom_id, user_id)
+    emotion_info = emotion_data.get("most_common", {"emotion": "neutral", "confidence": 0.5})
+    emotion = emotion_info.get("emotion")
+
+    # 요약하는 동안 임대가 만료되어 다른 워커가 가져갔으면 저장하지 않음
+    if not renew_summary_lease(job):
+        return None, ("작업 임대 만료", False)
+
+    # 같은 채팅방 일기는 하나만 저장 (작업이 중복 실행되어도 기존 일기 반환)
+    diary_id, _ = create_diary_once(user_id, chatroom_id, summary, emotion, summary)
+    if not diary_id:
+        return None, ("일기 저장 실패", True)
+    return {"diary_id": str(diary_id), "summary": summary}, None
+
+
+def process_next_job(worker_id):
+    """
+    작업 하나를 가져와 실행
+
+    :return: 실행한 작업이 있으면 True
+    """
+    job = claim_summary_job(worker_id)
+    if job is None:
+        return False
+
+    job_id, chatroom_id = job["_id"], job["chatroom_id"]
+    if job["attempts"] > job.get("max_attempts", 1):
+        # 임대 만료로 회수된 작업이 시도 횟수를 넘긴 경우
+        fail_summary_job(job, "최대 시도 횟수 초과", retryable=False)
+        return True
+
+    logging.info(
+        f"[INFO] 요약 작업 시작 - job_id: {job_id}, 대화방 ID: {chatroom_id}, "
+        f"시도: {job['attempts']}/{job.get('max_attempts', 1)}"
+    )
+    try:
+        with lease_heartbeat(job):
+            result, failure = run_summary_job(job)
+    except Exception as e:
+        logging.error(f"[ERROR] 요약 작업 오류 - job_id: {job_id}: {e}")
+        fail_summary_job(job, f"서버 내부 오류: {e}")
+        return True
+
+    if failure is not None:
+        error, retryable = failure
+        logging.warning(f"[WARNING] 요약 작업 실패 - job_id: {job_id}: {error}")
+        fail_summary_job(job, error, retryable=retryable)
+    else:
+        logging.info(f"[INFO] 요약 작업 완료 - job_id: {job_id}")
+        complete_summary_job(job, result)
+    return True
+
+
+def default_worker_id():
+    return f"{socket.gethostname()}:{os.getpid()}"
@@ -0,0 +1,85 @@
+"""
+# FAISS 벡터 DB 로드 담당
+
+manifest.json에 기록된 임베딩 모델로 질의 임베딩 생성
+FAISS 벡터 DB 로드 및 차원 검사
+(웹 서버의 rag_service와 독립 검색 서비스가 함께 사용)
+"""
+
+import os
+import json
+from langchain_community.vectorstores import FAISS
+from langchain_openai import OpenAIEmbeddings
+
+
+def read_manifest(vector_db_path):
+    """벡터 DB 폴더의 manifest.json 로드 (없으면 None)"""
+    manifest_path = os.path.join(vector_db_path, "manifest.json")
+    if not os.path.exists(manifest_path):
+        return None
+
+    with open(manifest_path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def make_embeddings_from_manifest(manifest):
+    """
+    manifest에 기록된 임베딩 모델로 질의 임베딩 객체 생성
+
+    - manifest가 없으면 기존 인덱스(faiss_v2)와 같은 OpenAIEmbeddings 기본 모델 사용
+    - 기록된 모델을 사용할 수 없으면 다른 모델로 대체하지 않고 로드를 거부
+
+    :param manifest: manifest 딕셔너리 또는 None
+    :return: 임베딩 객체
+    """
+    if manifest is None:
+        return OpenAIEmbeddings()
+
+    provider = manifest.get("embedding_provider", "huggingface")
+    model_name = manifest["embedding_model"]
+
+    if provider == "openai":
+        return OpenAIEmbeddings(model=model_name)
+
+    try:
+        from langchain_huggingface import HuggingFaceEmbeddings
+    except ImportError:
+        raise RuntimeError(
+            f"벡터 DB가 '{model_name}' 임베딩으로 생성되었지만 langchain_huggingface가 설치되어 있지 않습니다."
+        )
+
+    return HuggingFaceEmbeddings(
+        model_name=model_name,
+        model_kwargs={"device": "cpu"},
+        encode_kwargs={"normalize_embeddings": manifest.get("normalize", True)},
+    )
+
+
+def load_embeddings_for_index(vector_db_path):
+    """
+    벡터 DB의 manifest.json에 기록된 임베딩 모델로 질의 임베딩 객체 생성
+
+    :param vector_db_path: 벡터 DB 폴더
+    :return: (임베딩 객체, manifest 또는 None)
+    """
+    manifest = read_manifest(vector_db_path)
+    return make_embeddings_from_manifest(manifest), manifest
+
+
+def load_vectorstore(vector_db_path):
+    """
+    FAISS 벡터 DB 로드 (인덱스를 만든 임베딩 모델과 같은 모델로 질의 임베딩)
+
+    :param vector_db_path: 벡터 DB 폴더
+    :return: (FAISS 벡터스토어, manifest 또는 None)
+    """
+    embeddings, manifest = load_embeddings_for_index(vector_db_path)
+    vectorstore = FAISS.load_local(
+        vector_db_path, embeddings, allow_dangerous_deserialization=True
+    )
+
+    if manifest and vectorstore.index.d != manifest["dimension"]:
+        raise RuntimeError(
+            f"벡터 DB 차원({vectorstore.index.d})이 manifest({manifest['dimension']})와 다릅니다."
+        )
+    return vectorstore, manifest
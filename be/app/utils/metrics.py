@@ -0,0 +1,266 @@
+"""
+# 요청 단위 구간(span) 측정 및 Prometheus 형식 지표
+
+- 요청마다 구간별 소요 시간, LLM 토큰 수, 캐시 적중 여부를 flask.g에 기록
+- 누적 지표는 Prometheus 텍스트 형식으로 /metrics에서 제공 (워커 프로세스별 값)
+- SLOW_REQUEST_MS 이상 걸린 요청은 구간 정보와 함께 로그로 남김
+"""
+
+import json
+import time
+import logging
+import threading
+from contextlib import contextmanager
+
+from flask import g, has_request_context, request
+
+from config.settings import ActiveConfig
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(label_names, values, extra=None):
+    pairs = list(zip(label_names, values)) + (extra or [])
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+def _add_span(trace, stage, start, elapsed):
+    STAGE_SECONDS.observe(elapsed, stage=stage)
+    if trace is not None:
+        trace["spans"].append(
+            {
+                "stage": stage,
+                "ms": round(elapsed * 1000, 1),
+                "at_ms": round((start - trace["start"]) * 1000, 1),
+            }
+        )
+
+
+class Counter:
+    def __init__(self, name, help_text, label_names=()):
+        self.name, self.help, self.label_names = name, help_text, tuple(label_names)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(labels.get(name, "") for name in self.label_names)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(self.label_names, key)} {value}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, help_text, label_names=(), buckets=DEFAULT_BUCKETS):
+        self.name, self.help, self.label_names = name, help_text, tuple(label_names)
+        self.buckets = tuple(buckets)
+        self._series = {}  # labels -> [버킷별 개수, 합계, 개수]
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(labels.get(name, "") for name in self.label_names)
+        with self._lock:
+            series = self._series.setdefault(key, [[0] * len(self.buckets), 0.0, 0])
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][i] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, (counts, total, count) in sorted(self._series.items()):
+                for bound, bucket_count in zip(self.buckets, counts):
+                    labels = _format_labels(self.label_names, key, [("le", bound)])
+                    lines.append(f"{self.name}_bucket{labels} {bucket_count}")
+                labels = _format_labels(self.label_names, key, [("le", "+Inf")])
+                lines.append(f"{self.name}_bucket{labels} {count}")
+                labels = _format_labels(self.label_names, key)
+                lines.append(f"{self.name}_sum{labels} {total}")
+                lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+REQUEST_SECONDS = Histogram(
+    "robotpet_http_request_duration_seconds",
+    "HTTP 요청 처리 시간",
+    ("method", "endpoint", "status"),
+)
+STAGE_SECONDS = Histogram(
+    "robotpet_stage_duration_seconds", "요청 내 구간별 처리 시간", ("stage",)
+)
+LLM_TOKENS = Counter("robotpet_llm_tokens_total", "LLM 토큰 수", ("kind",))
+CACHE_REQUESTS = Counter(
+    "robotpet_cache_requests_total", "캐시 조회 수", ("cache", "result")
+)
+SLOW_REQUESTS = Counter("robotpet_slow_requests_total", "느린 요청 수", ("endpoint",))
+PROMPT_TOKENS = Counter(
+    "robotpet_prompt_tokens_total",
+    "상담 프롬프트 입력 토큰 수 (프롬프트 캐시 적중/미적중)",
+    ("prompt_version", "cache"),
+)
+
+REGISTRY = [
+    REQUEST_SECONDS,
+    STAGE_SECONDS,
+    LLM_TOKENS,
+    CACHE_REQUESTS,
+    SLOW_REQUESTS,
+    PROMPT_TOKENS,
+]
+
+
+def current_trace():
+    """현재 요청의 trace (요청 밖이면 None)"""
+    if has_request_context():
+        return g.get("trace")
+    return None
+
+
+@contextmanager
+def span(name):
+    """
+    구간 소요 시간 측정
+
+    with span("llm"):
+        ...
+    """
+    trace = current_trace()
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        _add_span(trace, name, start, time.perf_counter() - start)
+
+
+def record_tokens(prompt_tokens=0, completion_tokens=0, cached_tokens=0, trace=None):
+    """LLM 토큰 사용량 기록"""
+    LLM_TOKENS.inc(prompt_tokens or 0, kind="prompt")
+    LLM_TOKENS.inc(completion_tokens or 0, kind="completion")
+    LLM_TOKENS.inc(cached_tokens or 0, kind="cached_prompt")
+
+    trace = trace if trace is not None else current_trace()
+    if trace is not None:
+        tokens = trace["tokens"]
+        tokens["prompt"] += prompt_tokens or 0
+        tokens["completion"] += completion_tokens or 0
+        tokens["cached_prompt"] += cached_tokens or 0
+
+
+def record_cache(cache, hit):
+    """캐시 적중 여부 기록"""
+    result = "hit" if hit else "miss"
+    CACHE_REQUESTS.inc(cache=cache, result=result)
+    trace = current_trace()
+    if trace is not None:
+        trace["cache"][cache] = result
+
+
+def record_openai_usage(usage, trace=None):
+    """OpenAI 응답의 usage 객체/딕셔너리로 토큰 수 기록"""
+    if usage is None:
+        return
+    if not isinstance(usage, dict):
+        usage = usage.model_dump() if hasattr(usage, "model_dump") else vars(usage)
+    details = usage.get("prompt_tokens_details") or {}
+    record_tokens(
+        usage.get("prompt_tokens", 0),
+        usage.get("completion_tokens", 0),
+        details.get("cached_tokens", 0) or 0,
+        trace=trace,
+    )
+
+
+def record_usage_metadata(usage, prompt_version=None, trace=None):
+    """
+    LangChain 응답의 usage_metadata로 토큰 수 기록
+
+    :param usage: {"input_tokens", "output_tokens", "input_token_details": {"cache_read"}}
+    :param prompt_version: 지정하면 입력 토큰을 캐시 적중/미적중으로 나눠 버전별로 기록하고 로그
+    """
+    if not usage:
+        return
+    input_tokens = usage.get("input_tokens", 0) or 0
+    cached_tokens = (usage.get("input_token_details") or {}).get("cache_read", 0) or 0
+    record_tokens(input_tokens, usage.get("output_tokens", 0), cached_tokens, trace=trace)
+
+    if prompt_version is not None:
+        uncached_tokens = max(0, input_tokens - cached_tokens)
+        PROMPT_TOKENS.inc(cached_tokens, prompt_version=prompt_version, cache="hit")
+        PROMPT_TOKENS.inc(uncached_tokens, prompt_version=prompt_version, cache="miss")
+        logging.info(
+            f"[INFO] 프롬프트 v{prompt_version} 입력 토큰: {input_tokens} "
+            f"(캐시 {cached_tokens}, 미캐시 {uncached_tokens})"
+        )
+
+
+def render_metrics(extra_gauges=None):
+    """
+    Prometheus 텍스트 형식 지표
+
+    :param extra_gauges: {이름: (설명, 값)} 추가 게이지
+    """
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    for name, (help_text, value) in (extra_gauges or {}).items():
+        lines.extend([f"# HELP {name} {help_text}", f"# TYPE {name} gauge", f"{name} {value}"])
+    return "\n".join(lines) + "\n"
+
+
+def init_metrics(app):
+    """요청 시작/종료 훅 등록"""
+
+    @app.before_request
+    def _start_trace():
+        g.trace = {
+            "start": time.perf_counter(),
+            "spans": [],
+            "tokens": {"prompt": 0, "completion": 0, "cached_prompt": 0},
+            "cache": {},
+        }
+
+    @app.after_request
+    def _finish_trace(response):
+        trace = g.get("trace")
+        if trace is None:
+            return response
+
+        elapsed = time.perf_counter() - trace["start"]
+        endpoint = request.url_rule.rule if request.url_rule else "unmatched"
+        REQUEST_SECONDS.observe(
+            elapsed, method=request.method, endpoint=endpoint, status=response.status_code
+        )
+
+        # 스트리밍 응답은 본문 전송 전에 여기까지 오므로 첫 응답까지의 시간만 기록됨
+        slow_ms = ActiveConfig.SLOW_REQUEST_MS
+        if slow_ms and elapsed * 1000 >= slow_ms:
+            SLOW_REQUESTS.inc(endpoint=endpoint)
+            logging.warning(
+                "[SLOW] "
+                + json.dumps(
+                    {
+                        "method": request.method,
+                        "endpoint": endpoint,
+                        "status": response.status_code,
+                        "ms": round(elapsed * 1000, 1),
+                        "spans": trace["spans"],
+                        "tokens": trace["tokens"],
+                        "cache": trace["cache"],
+                    },
+                    ensure_ascii=False,
+                )
+            )
+        return response
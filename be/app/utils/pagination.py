@@ -0,0 +1,57 @@
+"""
+# 커서 기반 페이지네이션 (keyset)
+
+마지막으로 받은 항목의 정렬 키를 불투명한 커서 문자열로 인코딩해서 다음 페이지 조회에 사용
+→ 앞 페이지를 건너뛰지(skip) 않으므로 몇 번째 페이지든 조회 비용이 일정
+"""
+
+import base64
+import binascii
+import json
+
+from bson import json_util
+from werkzeug.exceptions import BadRequest
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+
+def encode_cursor(kind, values):
+    """
+    정렬 키를 커서 문자열로 변환
+
+    :param kind: 커서 종류 (다른 목록의 커서를 잘못 넘긴 경우 구분)
+    :param values: 정렬 키 (datetime 등 BSON 타입도 그대로 보존)
+    """
+    payload = json_util.dumps({"k": kind, "v": values}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(kind, cursor):
+    """
+    커서 문자열을 정렬 키로 변환
+
+    :return: 정렬 키 (cursor가 비어 있으면 None)
+    :raises BadRequest: 형식이 잘못됐거나 다른 종류의 커서인 경우
+    """
+    if not cursor:
+        return None
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data = json_util.loads(base64.urlsafe_b64decode(padded.encode("ascii")).decode("utf-8"))
+    except (ValueError, binascii.Error, UnicodeError, json.JSONDecodeError):
+        raise BadRequest("유효하지 않은 cursor입니다.")
+    if not isinstance(data, dict) or data.get("k") != kind:
+        raise BadRequest("유효하지 않은 cursor입니다.")
+    return data.get("v")
+
+
+def parse_page_size(value, default=DEFAULT_PAGE_SIZE):
+    """요청 파라미터의 페이지 크기 (1 ~ MAX_PAGE_SIZE)"""
+    if value in (None, ""):
+        return default
+    try:
+        size = int(value)
+    except (TypeError, ValueError):
+        raise BadRequest("limit은 정수여야 합니다.")
+    return min(max(size, 1), MAX_PAGE_SIZE)
@@ -0,0 +1,5 @@
+# 비동기 채팅/일기 요약 경로 (Starlette)
+# 실행: uvicorn asgi:app --host 0.0.0.0 --port 5001 --workers 4
+from app.async_app import create_async_app
+
+app = create_async_app()
@@ -31,6 +31,8 @@ class Config:
     MONGO_URI = os.getenv("MONGO_URI")
     if not MONGO_URI:
         raise ValueError("MongoDB 환경 변수(MONGO_URI)가 설정되지 않았습니다.")
+    # 앱 시작 시 app/database/indexes.py의 인덱스 생성 (끄면 flask mongo ensure-indexes로 직접 생성)
+    MONGO_ENSURE_INDEXES = os.getenv("MONGO_ENSURE_INDEXES", "true").lower() == "true"
 
     # 이메일 설정
     MAIL_SERVER = "smtp.gmail.com"
@@ -60,6 +62,77 @@ class Config:
     if not VECTOR_DB_PATH:
         raise ValueError("환경 변수 VECTOR_DB_PATH가 설정되지 않았습니다. .env 파일을 확인하세요.")
 
+    # 독립 검색 서비스 주소 ('host:port' 또는 'unix:/path'), 비워두면 프로세스 내 FAISS 사용
+    RETRIEVAL_SERVICE_ADDR = os.getenv("RETRIEVAL_SERVICE_ADDR", "")
+
+    # 첫 대화 시맨틱 응답 캐시 (기본 비활성화)
+    SEMANTIC_CACHE_ENABLED = os.getenv("SEMANTIC_CACHE_ENABLED", "False") == "True"
+    SEMANTIC_CACHE_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", 0.92))
+    SEMANTIC_CACHE_TTL = int(os.getenv("SEMANTIC_CACHE_TTL", 3600))  # 초
+    SEMANTIC_CACHE_MAX_ENTRIES = int(os.getenv("SEMANTIC_CACHE_MAX_ENTRIES", 1000))
+    SEMANTIC_CACHE_RESPONSES = int(os.getenv("SEMANTIC_CACHE_RESPONSES", 3))
+    SEMANTIC_CACHE_MAX_TURNS = int(os.getenv("SEMANTIC_CACHE_MAX_TURNS", 1))  # 캐시를 적용할 첫 대화 수
+
+    # 채팅방별 대화 상태 저장소 ('memory': 프로세스 내 LRU+TTL, 'redis': 워커 간 공유)
+    CHAT_STATE_BACKEND = os.getenv("CHAT_STATE_BACKEND", "memory")
+    CHAT_STATE_MAX_ROOMS = int(os.getenv("CHAT_STATE_MAX_ROOMS", 10000))
+    CHAT_STATE_TTL = int(os.getenv("CHAT_STATE_TTL", 86400))  # 초
+
+    # 대화 저장: 채팅방별로 N개씩 chat_buckets 문서에 나눠 저장
+    MESSAGE_BUCKET_SIZE = int(os.getenv("MESSAGE_BUCKET_SIZE", 50))
+
+    # 대화 검색: 채팅방마다 최근 일치 대화 N개를 앞뒤 M자 스니펫으로 반환
+    SEARCH_SNIPPETS_PER_ROOM = int(os.getenv("SEARCH_SNIPPETS_PER_ROOM", 3))
+    SEARCH_SNIPPET_CHARS = int(os.getenv("SEARCH_SNIPPET_CHARS", 30))
+
+    # 대화 이력: 최근 N개 대화는 그대로, 오래된 대화는 누적 요약으로 프롬프트에 반영
+    CHAT_HISTORY_TURNS = int(os.getenv("CHAT_HISTORY_TURNS", 6))
+    CHAT_HISTORY_SUMMARY_ENABLED = os.getenv("CHAT_HISTORY_SUMMARY_ENABLED", "True") == "True"
+    CHAT_HISTORY_SUMMARY_BATCH = int(os.getenv("CHAT_HISTORY_SUMMARY_BATCH", 4))  # 요약 갱신 단위
+    CHAT_HISTORY_SUMMARY_MAX_CHARS = int(os.getenv("CHAT_HISTORY_SUMMARY_MAX_CHARS", 600))
+
+    # OpenAI 호출 게이트웨이 (동시 호출 수 제한, 재시도)
+    LLM_MAX_IN_FLIGHT = int(os.getenv("LLM_MAX_IN_FLIGHT", 8))
+    LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", 4))
+    LLM_BACKOFF_BASE = float(os.getenv("LLM_BACKOFF_BASE", 0.5))  # 초
+    LLM_BACKOFF_MAX = float(os.getenv("LLM_BACKOFF_MAX", 20))  # 초
+    LLM_QUEUE_TIMEOUT = float(os.getenv("LLM_QUEUE_TIMEOUT", 60))  # 초
+
+    # 감정만 바뀐 빈 메시지 턴은 미리 만든 첫마디로 바로 응답 (LLM 호출 생략)
+    OPENER_ENABLED = os.getenv("OPENER_ENABLED", "True") == "True"
+    OPENER_POOL_SIZE = int(os.getenv("OPENER_POOL_SIZE", 8))  # 버킷별 첫마디 수
+    OPENER_REFRESH_SECONDS = int(os.getenv("OPENER_REFRESH_SECONDS", 86400))  # 0이면 갱신 안 함
+
+    # 일기 요약 캐시 (대화 내용 + 호출 파라미터 해시가 같으면 저장된 요약 재사용)
+    SUMMARY_CACHE_ENABLED = os.getenv("SUMMARY_CACHE_ENABLED", "True") == "True"
+
+    # 긴 대화 요약: 대화가 이 토큰 수를 넘으면 조각별 요약 후 합쳐서 일기 생성
+    SUMMARY_MAX_INPUT_TOKENS = int(os.getenv("SUMMARY_MAX_INPUT_TOKENS", 6000))
+    SUMMARY_CHUNK_TOKENS = int(os.getenv("SUMMARY_CHUNK_TOKENS", 2500))  # 조각당 토큰 수
+    SUMMARY_CHUNK_CONCURRENCY = int(os.getenv("SUMMARY_CHUNK_CONCURRENCY", 4))
+
+    # 누적 일기 메모: 대화 중 백그라운드에서 새 대화를 메모에 합쳐 두고 종료 시 메모로 일기 생성
+    RUNNING_SUMMARY_ENABLED = os.getenv("RUNNING_SUMMARY_ENABLED", "False") == "True"
+    RUNNING_SUMMARY_BATCH = int(os.getenv("RUNNING_SUMMARY_BATCH", 1))  # 메모 갱신 단위 (대화 수)
+    RUNNING_SUMMARY_MAX_CHARS = int(os.getenv("RUNNING_SUMMARY_MAX_CHARS", 800))
+    RUNNING_SUMMARY_MAX_TAIL = int(os.getenv("RUNNING_SUMMARY_MAX_TAIL", 4))  # 일기 생성 시 바로 합칠 최대 대화 수
+
+    # 일기 요약 작업 큐 (tools/summary_worker.py)
+    SUMMARY_JOB_LEASE_SECONDS = int(os.getenv("SUMMARY_JOB_LEASE_SECONDS", 120))  # 작업 임대 시간
+    SUMMARY_JOB_MAX_ATTEMPTS = int(os.getenv("SUMMARY_JOB_MAX_ATTEMPTS", 3))
+    SUMMARY_JOB_RETRY_DELAY = float(os.getenv("SUMMARY_JOB_RETRY_DELAY", 10))  # 초, 시도마다 2배
+    SUMMARY_JOB_POLL_INTERVAL = float(os.getenv("SUMMARY_JOB_POLL_INTERVAL", 1.0))  # 초
+
+    # 종료된 채팅방 일기 일괄 생성 (flask diary batch-summarize)
+    DIARY_BATCH_SIZE = int(os.getenv("DIARY_BATCH_SIZE", 500))  # 한 번에 처리할 채팅방 수
+    DIARY_BATCH_CONCURRENCY = int(os.getenv("DIARY_BATCH_CONCURRENCY", 4))
+    DIARY_BATCH_MODE = os.getenv("DIARY_BATCH_MODE", "parallel")  # 'parallel' 또는 'openai_batch'
+    DIARY_BATCH_POLL_SECONDS = int(os.getenv("DIARY_BATCH_POLL_SECONDS", 60))
+    DIARY_BATCH_TIMEOUT = int(os.getenv("DIARY_BATCH_TIMEOUT", 86400))  # openai_batch 최대 대기(초)
+
+    # 이 시간(ms) 이상 걸린 요청은 구간별 소요 시간과 함께 로그 (0이면 비활성화)
+    SLOW_REQUEST_MS = int(os.getenv("SLOW_REQUEST_MS", 0))
+
     # SECRET_KEY = os.getenv("SECRET_KEY", "your_jwt_secret_key")
 
 class ProductionConfig(Config):
@@ -0,0 +1,273 @@
+"""
+# OpenAI API 대체 서버 (오프라인 부하 테스트용)
+
+chat.completions(스트리밍 포함), embeddings API를 흉내내는 로컬 서버
+- 응답 지연 분포 (fixed / uniform / lognormal), 스트리밍 토큰 속도 설정
+- 오류 주입 (429는 retry-after 헤더 포함)
+- 임베딩은 텍스트 n-gram 해싱으로 결정적으로 생성 (비슷한 문장 → 비슷한 벡터)
+
+사용법 (be/ 디렉토리에서 실행):
+    python tools/fake_openai_server.py --port 8089 --latency lognormal:600,0.5 --tokens-per-sec 60 --error-rate 0.02
+
+    # 웹 서버 .env (ChatOpenAI, OpenAIEmbeddings, OpenAI 클라이언트 모두 적용)
+    OPENAI_BASE_URL=http://127.0.0.1:8089/v1
+    OPENAI_API_KEY=fake-key
+"""
+
+import json
+import math
+import time
+import uuid
+import base64
+import random
+import struct
+import zlib
+import argparse
+import logging
+
+from flask import Flask, Response, jsonify, request
+
+logging.basicConfig(level=logging.INFO)
+
+app = Flask(__name__)
+
+# 상담 챗봇/일기 요약 응답 예시 (프롬프트 해시로 선택)
+CANNED_RESPONSES = [
+    "헐 진짜? 그런 일이 있었구나 ㅠㅠ 많이 속상했겠다. 그때 어떤 기분이 제일 컸어?",
+    "와 대박! 그거 완전 잘한 거잖아 👍 요즘 그런 일 자주 있어? 더 얘기해줘!",
+    "에구, 많이 불안했겠다... 괜찮아, 천천히 말해도 돼. 지금은 좀 어때?",
+    "아 진짜 화날 만했네 😤 나라도 그랬을 듯. 그 친구한테 뭐라고 말했어?",
+    "오늘은 친구와 이야기하며 마음이 조금 가벼워졌다. 속상했던 일도 털어놓으니 괜찮아졌다 😊",
+]
+
+settings = {
+    "latency": ("fixed", [0.0]),
+    "first_token_ms": 200.0,
+    "tokens_per_sec": 50.0,
+    "error_rate": 0.0,
+    "error_codes": [429, 500],
+    "retry_after": 1.0,
+    "dimensions": 1536,
+}
+
+
+def parse_latency(spec):
+    """'fixed:300', 'uniform:200,800', 'lognormal:600,0.5'(중앙값 ms, sigma) 파싱"""
+    kind, _, values = spec.partition(":")
+    params = [float(v) for v in values.split(",") if v]
+    if kind not in ("fixed", "uniform", "lognormal"):
+        raise ValueError(f"지원하지 않는 지연 분포: {kind}")
+    return kind, params
+
+
+def sample_latency():
+    """설정된 분포에서 지연 시간(초) 샘플링"""
+    kind, params = settings["latency"]
+    if kind == "fixed":
+        ms = params[0]
+    elif kind == "uniform":
+        ms = random.uniform(params[0], params[1])
+    else:
+        ms = random.lognormvariate(math.log(max(params[0], 1e-3)), params[1])
+    return ms / 1000
+
+
+def count_tokens(text):
+    """토큰 수 근사 (한글 기준 약 2자당 1토큰)"""
+    return max(1, len(text) // 2)
+
+
+def maybe_inject_error():
+    """error_rate 확률로 OpenAI 형식의 오류 응답 반환"""
+    if random.random() >= settings["error_rate"]:
+        return None
+
+    code = random.choice(settings["error_codes"])
+    error_type = "rate_limit_exceeded" if code == 429 else "server_error"
+    response = jsonify(
+        {"error": {"message": f"주입된 오류 ({code})", "type": error_type, "code": error_type}}
+    )
+    response.status_code = code
+    if code == 429:
+        response.headers["retry-after"] = str(settings["retry_after"])
+    return response
+
+
+def pick_response(messages, max_tokens):
+    """프롬프트 해시로 응답 선택 후 max_tokens에 맞춰 자르기"""
+    prompt = "\n".join(str(m.get("content", "")) for m in messages)
+    text = CANNED_RESPONSES[zlib.crc32(prompt.encode("utf-8")) % len(CANNED_RESPONSES)]
+    if max_tokens:
+        text = text[: max_tokens * 2]
+    return prompt, text
+
+
+@app.route("/v1/models", methods=["GET"])
+def list_models():
+    return jsonify({"object": "list", "data": [{"id": "gpt-4o-mini", "object": "model"}]})
+
+
+@app.route("/v1/chat/completions", methods=["POST"])
+def chat_completions():
+    body = request.get_json(force=True)
+    error = maybe_inject_error()
+    if error is not None:
+        return error
+
+    model = body.get("model", "gpt-4o-mini")
+    prompt, text = pick_response(body.get("messages", []), body.get("max_tokens"))
+    prompt_tokens, completion_tokens = count_tokens(prompt), count_tokens(text)
+    completion_id = f"chatcmpl-{uuid.uuid4().hex[:24]}"
+    created = int(time.time())
+    usage = {
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+        "total_tokens": prompt_tokens + completion_tokens,
+        "prompt_tokens_details": {"cached_tokens": 0},
+    }
+
+    if not body.get("stream"):
+        time.sleep(sample_latency() + completion_tokens / settings["tokens_per_sec"])
+        return jsonify(
+            {
+                "id": completion_id,
+                "object": "chat.completion",
+                "created": created,
+                "model": model,
+                "choices": [
+                    {
+                        "index": 0,
+                        "message": {"role": "assistant", "content": text},
+                        "finish_reason": "stop",
+                    }
+                ],
+                "usage": usage,
+            }
+        )
+
+    include_usage = (body.get("stream_options") or {}).get("include_usage", False)
+
+    def chunk(delta, finish_reason=None, **extra):
+        payload = {
+            "id": completion_id,
+            "object": "chat.completion.chunk",
+            "created": created,
+            "model": model,
+            "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+            **extra,
+        }
+        return f"data: {json.dumps(payload, ensure_ascii=False)}\n\n"
+
+    def generate():
+        time.sleep(sample_latency() + settings["first_token_ms"] / 1000)
+        yield chunk({"role": "assistant", "content": ""})
+
+        # 약 2자 단위로 토큰 속도에 맞춰 전송
+        interval = 1.0 / settings["tokens_per_sec"]
+        for i in range(0, len(text), 2):
+            yield chunk({"content": text[i : i + 2]})
+            time.sleep(interval)
+
+        yield chunk({}, finish_reason="stop")
+        if include_usage:
+            payload = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": model,
+                "choices": [],
+                "usage": usage,
+            }
+            yield f"data: {json.dumps(payload)}\n\n"
+        yield "data: [DONE]\n\n"
+
+    return Response(generate(), mimetype="text/event-stream")
+
+
+def embed_text(text, dimensions):
+    """문자 2~3-gram 해싱으로 정규화된 벡터 생성 (결정적)"""
+    vector = [0.0] * dimensions
+    text = text.strip()
+    for n in (2, 3):
+        for i in range(max(1, len(text) - n + 1)):
+            gram = text[i : i + n].encode("utf-8")
+            h = zlib.crc32(gram)
+            vector[h % dimensions] += 1.0 if (h >> 31) & 1 else -1.0
+
+    norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+    return [v / norm for v in vector]
+
+
+@app.route("/v1/embeddings", methods=["POST"])
+def embeddings():
+    body = request.get_json(force=True)
+    error = maybe_inject_error()
+    if error is not None:
+        return error
+
+    inputs = body.get("input", [])
+    if isinstance(inputs, str) or (inputs and isinstance(inputs[0], int)):
+        inputs = [inputs]
+
+    dimensions = body.get("dimensions") or settings["dimensions"]
+    encoding_format = body.get("encoding_format", "float")
+
+    data = []
+    total_tokens = 0
+    for i, item in enumerate(inputs):
+        # 토큰 ID 배열로 들어온 경우(tiktoken 사용 시)도 결정적으로 처리
+        text = item if isinstance(item, str) else " ".join(str(t) for t in item)
+        total_tokens += count_tokens(text)
+        vector = embed_text(text, dimensions)
+        if encoding_format == "base64":
+            vector = base64.b64encode(struct.pack(f"<{dimensions}f", *vector)).decode("ascii")
+        data.append({"object": "embedding", "index": i, "embedding": vector})
+
+    time.sleep(sample_latency() / 4)
+    return jsonify(
+        {
+            "object": "list",
+            "data": data,
+            "model": body.get("model", "text-embedding-ada-002"),
+            "usage": {"prompt_tokens": total_tokens, "total_tokens": total_tokens},
+        }
+    )
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="OpenAI API 대체 서버 (부하 테스트용)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument(
+        "--latency",
+        default="lognormal:600,0.5",
+        help="응답 지연 분포: fixed:ms | uniform:min,max | lognormal:중앙값ms,sigma",
+    )
+    parser.add_argument("--first-token-ms", type=float, default=200.0, help="스트리밍 첫 토큰 추가 지연")
+    parser.add_argument("--tokens-per-sec", type=float, default=50.0, help="완성 토큰 생성 속도")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="오류 주입 확률 (0~1)")
+    parser.add_argument("--error-codes", default="429,500", help="주입할 HTTP 오류 코드")
+    parser.add_argument("--retry-after", type=float, default=1.0, help="429 응답의 retry-after(초)")
+    parser.add_argument("--dimensions", type=int, default=1536, help="임베딩 차원")
+    parser.add_argument("--seed", type=int, default=None, help="지연/오류 샘플링 seed")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    if args.seed is not None:
+        random.seed(args.seed)
+
+    settings.update(
+        {
+            "latency": parse_latency(args.latency),
+            "first_token_ms": args.first_token_ms,
+            "tokens_per_sec": args.tokens_per_sec,
+            "error_rate": args.error_rate,
+            "error_codes": [int(code) for code in args.error_codes.split(",")],
+            "retry_after": args.retry_after,
+            "dimensions": args.dimensions,
+        }
+    )
+    logging.info(f"OpenAI 대체 서버 시작: http://{args.host}:{args.port}/v1 ({settings})")
+    app.run(host=args.host, port=args.port, threaded=True)
@@ -0,0 +1,218 @@
+"""
+# 대화 기록 조회 벤치마크 (전체 문서 조회 vs 프로젝션/$slice + 버킷)
+
+긴 채팅방을 많이 가진 사용자를 별도 DB에 만들어 두고, 조회 방식별 전송 바이트와 지연 시간 비교
+- list: 채팅방 목록 (/chat/history/<user_id>)
+- room: 채팅방 최근 대화 limit개 (/chat/chatroom/<chatroom_id>/history)
+
+방식
+- full: 채팅방 문서 전체를 가져와 파이썬에서 자름 (기존 방식, chats 배열 저장)
+- slice: 프로젝션 + $slice (chats 배열 저장, 버킷으로 옮기기 전 채팅방)
+- bucket: 프로젝션 + 필요한 버킷만 조회 (chat_buckets 저장)
+
+사용법 (be/ 디렉토리에서 실행, 지정한 DB는 실행 후 삭제됨):
+    python tools/history_read_bench.py --rooms 300 --turns 200 --limit 20
+    python tools/history_read_bench.py --mongo-uri mongodb://127.0.0.1:27017 --db-name history_bench --keep
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+import statistics
+
+import bson
+from pymongo import ASCENDING, MongoClient
+
+# be/ 디렉토리를 import 경로에 추가
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.services.message_store import (  # noqa: E402
+    bucket_of,
+    build_bucket_documents,
+    recent_messages_pipeline,
+    stitch_messages,
+    with_seq,
+)
+
+USER_MESSAGES = [
+    "오늘 학교에서 친구랑 싸웠어. 내가 먼저 말을 심하게 한 것 같기도 하고...",
+    "시험이 다음 주인데 공부가 하나도 안 돼서 너무 불안해",
+    "엄마가 내 얘기를 끝까지 안 듣고 혼내기만 해서 속상했어",
+    "동아리 발표를 잘해서 선생님한테 칭찬받았어! 진짜 뿌듯했어",
+]
+BOT_RESPONSES = [
+    "진짜? 그런 일이 있었구나... 그때 기분이 어땠어? 조금 더 자세히 얘기해줄 수 있어?",
+    "그거 완전 속상했겠다 😢 나라도 그랬을 것 같아. 지금은 마음이 좀 어때?",
+    "우와 대박! 나도 같이 기분 좋아진다 😄 어떤 발표였는지 궁금해!",
+]
+
+
+def make_chats(rng, turns):
+    return [
+        {
+            "user_message": rng.choice(USER_MESSAGES),
+            "bot_response": rng.choice(BOT_RESPONSES),
+            "emotion_id": None,
+            "confidence": round(rng.random(), 2),
+            "conversation_end": False,
+            "timestamp": f"2025-01-01T00:{i // 60 % 60:02d}:{i % 60:02d}+09:00",
+        }
+        for i in range(turns)
+    ]
+
+
+def seed(db, user_id, rooms, turns, seed_value):
+    """같은 대화를 chats 배열 저장(legacy_rooms)과 버킷 저장(chatrooms + chat_buckets)으로 생성"""
+    rng = random.Random(seed_value)
+    db.legacy_rooms.drop()
+    db.chatrooms.drop()
+    db.chat_buckets.drop()
+
+    for i in range(rooms):
+        chatroom_id = f"bench-{i:05d}"
+        chats = make_chats(rng, turns)
+        room = {
+            "user_id": user_id,
+            "chatroom_id": chatroom_id,
+            "timestamp": "20250101000000",
+            "conversation_end": True,
+            "updated_at": "2025-01-01T00:00:00+09:00",
+        }
+        db.legacy_rooms.insert_one({**room, "chats": chats})
+        db.chatrooms.insert_one({**room, "message_count": len(chats)})
+        db.chat_buckets.insert_many(build_bucket_documents(chatroom_id, user_id, chats))
+
+    for collection in (db.legacy_rooms, db.chatrooms):
+        collection.create_index([("user_id", ASCENDING)])
+        collection.create_index([("chatroom_id", ASCENDING)])
+    db.chat_buckets.create_index(
+        [("chatroom_id", ASCENDING), ("bucket", ASCENDING)], unique=True
+    )
+
+
+def doc_bytes(docs):
+    return sum(len(bson.encode(doc)) for doc in docs)
+
+
+# --- 채팅방 목록 ---
+
+
+def list_full(db, user_id, limit):
+    docs = list(db.legacy_rooms.find({"user_id": user_id}))
+    return docs, [{"chatroom_id": d["chatroom_id"], "timestamp": d.get("timestamp")} for d in docs]
+
+
+def list_projection(collection):
+    def run(db, user_id, limit):
+        docs = list(
+            db[collection].find(
+                {"user_id": user_id},
+                {"_id": 0, "chatroom_id": 1, "timestamp": 1, "conversation_end": 1, "updated_at": 1},
+            )
+        )
+        return docs, docs
+
+    return run
+
+
+# --- 채팅방 최근 대화 ---
+
+
+def room_full(db, user_id, chatroom_id, limit):
+    doc = db.legacy_rooms.find_one({"user_id": user_id, "chatroom_id": chatroom_id})
+    return [doc], doc.get("chats", [])[-limit:]
+
+
+def room_slice(db, user_id, chatroom_id, limit):
+    rooms = list(
+        db.legacy_rooms.aggregate(
+            recent_messages_pipeline(
+                {"user_id": user_id, "chatroom_id": chatroom_id}, limit, fields=("conversation_end",)
+            )
+        )
+    )
+    room = rooms[0]
+    return rooms, with_seq(room["legacy_chats"], max(room["count"] - limit, 0))
+
+
+def room_bucket(db, user_id, chatroom_id, limit):
+    rooms = list(
+        db.chatrooms.aggregate(
+            recent_messages_pipeline(
+                {"user_id": user_id, "chatroom_id": chatroom_id}, limit, fields=("conversation_end",)
+            )
+        )
+    )
+    start = max(rooms[0]["count"] - limit, 0)
+    buckets = list(
+        db.chat_buckets.find({"chatroom_id": chatroom_id, "bucket": {"$gte": bucket_of(start)}}).sort(
+            "bucket", ASCENDING
+        )
+    )
+    return rooms + buckets, stitch_messages(buckets, start)
+
+
+def measure(name, fn, args_list, repeat):
+    latencies, transferred, returned = [], 0, 0
+    for _ in range(repeat):
+        for args in args_list:
+            start = time.perf_counter()
+            docs, result = fn(*args)
+            latencies.append(time.perf_counter() - start)
+            transferred += doc_bytes(docs)
+            returned += len(result)
+
+    calls = len(latencies)
+    latencies.sort()
+    print(
+        f"{name:<14} 평균 {statistics.mean(latencies) * 1000:8.2f}ms  "
+        f"p95 {latencies[min(calls - 1, int(calls * 0.95))] * 1000:8.2f}ms  "
+        f"호출당 {transferred / calls / 1024:10.1f} KiB  결과 {returned // calls}건"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="대화 기록 조회 벤치마크")
+    parser.add_argument("--mongo-uri", default=os.getenv("MONGO_URI", "mongodb://127.0.0.1:27017"))
+    parser.add_argument("--db-name", default="history_read_bench")
+    parser.add_argument("--rooms", type=int, default=300, help="사용자당 채팅방 수")
+    parser.add_argument("--turns", type=int, default=200, help="채팅방당 대화 수")
+    parser.add_argument("--limit", type=int, default=20, help="채팅방 조회 시 최근 대화 수")
+    parser.add_argument("--samples", type=int, default=50, help="채팅방 조회 측정 대상 수")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--keep", action="store_true", help="측정 후 DB를 삭제하지 않음")
+    args = parser.parse_args()
+
+    client = MongoClient(args.mongo_uri)
+    db = client[args.db_name]
+    user_id = "bench_user"
+
+    print(f"데이터 생성: 채팅방 {args.rooms}개 x 대화 {args.turns}개 ({args.db_name})")
+    seed(db, user_id, args.rooms, args.turns, args.seed)
+
+    try:
+        print(f"\n[채팅방 목록] 사용자 채팅방 {args.rooms}개")
+        list_args = [(db, user_id, args.limit)]
+        measure("full", list_full, list_args, args.repeat)
+        measure("slice", list_projection("legacy_rooms"), list_args, args.repeat)
+        measure("bucket", list_projection("chatrooms"), list_args, args.repeat)
+
+        rng = random.Random(args.seed)
+        sample_ids = [
+            f"bench-{rng.randrange(args.rooms):05d}" for _ in range(min(args.samples, args.rooms))
+        ]
+        room_args = [(db, user_id, chatroom_id, args.limit) for chatroom_id in sample_ids]
+        print(f"\n[채팅방 최근 대화] limit {args.limit}, 채팅방 {len(sample_ids)}개")
+        measure("full", room_full, room_args, args.repeat)
+        measure("slice", room_slice, room_args, args.repeat)
+        measure("bucket", room_bucket, room_args, args.repeat)
+    finally:
+        if not args.keep:
+            client.drop_database(args.db_name)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""
+# 채팅/일기 요약 경로 부하 테스트
+
+가상 사용자마다 채팅방 생성 → /chat/emotion-chat N회 → 채팅방 종료 → /diary/summary/save
+요청별 지연 시간 p50/p95/p99, 처리량, 상태 코드 분포 출력
+
+오프라인 측정 시 웹 서버를 tools/fake_openai_server.py에 연결해서 실행
+(.env: OPENAI_BASE_URL=http://127.0.0.1:8089/v1)
+
+사용법 (be/ 디렉토리에서 실행):
+    python tools/load_test.py --base-url http://127.0.0.1:5000 --token <JWT> --users 20 --turns 5
+"""
+
+import time
+import random
+import argparse
+import threading
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+USER_MESSAGES = [
+    "오늘 학교에서 친구랑 싸웠어",
+    "시험 망친 것 같아서 너무 불안해",
+    "엄마가 내 얘기를 안 들어줘",
+    "요즘 아무것도 하기 싫어",
+    "동아리에서 발표 잘해서 칭찬받았어!",
+    "단톡방에서 나만 빼고 얘기하는 것 같아",
+]
+
+
+class Stats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = defaultdict(list)
+        self.statuses = defaultdict(Counter)
+
+    def record(self, name, seconds, status):
+        with self.lock:
+            self.latencies[name].append(seconds)
+            self.statuses[name][status] += 1
+
+    def report(self, elapsed):
+        print(f"\n총 소요 시간: {elapsed:.1f}s")
+        for name, values in self.latencies.items():
+            values = sorted(values)
+
+            def pct(p):
+                return values[min(len(values) - 1, int(len(values) * p))] * 1000
+
+            print(
+                f"{name:<22} {len(values):>5}건  {len(values) / elapsed:6.2f} req/s  "
+                f"p50 {pct(0.5):7.0f}ms  p95 {pct(0.95):7.0f}ms  p99 {pct(0.99):7.0f}ms  "
+                f"상태 {dict(self.statuses[name])}"
+            )
+
+
+def timed_request(session, stats, name, method, url, **kwargs):
+    start = time.perf_counter()
+    try:
+        response = session.request(method, url, timeout=120, **kwargs)
+        status = response.status_code
+    except requests.RequestException as e:
+        response, status = None, type(e).__name__
+    stats.record(name, time.perf_counter() - start, status)
+    return response
+
+
+def run_user(args, stats, user_no):
+    session = requests.Session()
+    session.headers["Authorization"] = args.token
+    rng = random.Random(args.seed + user_no)
+    base = args.base_url.rstrip("/")
+
+    response = timed_request(session, stats, "POST /chat/chatroom", "POST", f"{base}/chat/chatroom")
+    if response is None or response.status_code != 201:
+        return
+    chatroom_id = response.json()["chatroom_id"]
+
+    chat_path = "/chat/emotion-chat/stream" if args.stream else "/chat/emotion-chat"
+    for _ in range(args.turns):
+        timed_request(
+            session,
+            stats,
+            f"POST {chat_path}",
+            "POST",
+            f"{base}{chat_path}",
+            json={"chatroom_id": chatroom_id, "user_message": rng.choice(USER_MESSAGES)},
+        )
+        time.sleep(args.think_time)
+
+    if args.skip_summary:
+        return
+
+    timed_request(session, stats, "PUT /chat/<id>/end", "PUT", f"{base}/chat/{chatroom_id}/end")
+    timed_request(
+        session,
+        stats,
+        "POST /diary/summary/save",
+        "POST",
+        f"{base}/diary/summary/save",
+        json={"chatroom_id": chatroom_id},
+    )
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="채팅/일기 요약 부하 테스트")
+    parser.add_argument("--base-url", default="http://127.0.0.1:5000")
+    parser.add_argument("--token", required=True, help="로그인으로 발급받은 JWT access token")
+    parser.add_argument("--users", type=int, default=10, help="동시 가상 사용자 수")
+    parser.add_argument("--turns", type=int, default=5, help="사용자당 대화 수")
+    parser.add_argument("--think-time", type=float, default=0.0, help="대화 사이 대기 시간(초)")
+    parser.add_argument("--stream", action="store_true", help="스트리밍 엔드포인트 사용")
+    parser.add_argument("--skip-summary", action="store_true", help="종료/일기 요약 단계 생략")
+    parser.add_argument("--seed", type=int, default=42)
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    stats = Stats()
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.users) as pool:
+        for future in [pool.submit(run_user, args, stats, i) for i in range(args.users)]:
+            future.result()
+    stats.report(time.perf_counter() - start)
@@ -0,0 +1,257 @@
+"""
+# 독립 검색 서비스
+
+웹 워커마다 FAISS 인덱스와 임베딩 모델을 올리지 않도록 인덱스를 한 프로세스가 소유
+여러 질의를 한 번에 받아 배치 임베딩 + 배치 검색
+인덱스를 여러 샤드 프로세스/노드로 나누고, 라우터가 scatter-gather로 top-k 병합
+
+사용법 (be/ 디렉토리에서 실행):
+    # 단일 인덱스
+    python tools/retrieval_server.py serve --index ./data/faiss_v2 --listen 127.0.0.1:7010
+
+    # 인덱스를 4개 샤드로 분할 후, 샤드 서버 4개 + 라우터 1개 실행
+    python tools/retrieval_server.py split --index ./data/faiss_v2 --num-shards 4 --out ./data/faiss_shards
+    python tools/retrieval_server.py serve --index ./data/faiss_shards/shard_0 --listen 127.0.0.1:7011
+    ...
+    python tools/retrieval_server.py router --shard 127.0.0.1:7011 --shard 127.0.0.1:7012 ... --listen 127.0.0.1:7010
+
+    # 웹 서버 .env
+    RETRIEVAL_SERVICE_ADDR=127.0.0.1:7010
+"""
+
+import os
+import sys
+import json
+import heapq
+import pickle
+import argparse
+import logging
+import socketserver
+from concurrent.futures import ThreadPoolExecutor
+
+import faiss
+import numpy as np
+
+# be/ 디렉토리를 import 경로에 추가
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.services.vector_store import (  # noqa: E402
+    load_vectorstore,
+    make_embeddings_from_manifest,
+    read_manifest,
+)
+from app.services.retrieval_client import (  # noqa: E402
+    RetrievalClient,
+    recv_message,
+    send_message,
+)
+
+logging.basicConfig(level=logging.INFO)
+
+
+class ShardSearcher:
+    """인덱스 하나(또는 샤드 하나)를 소유하고 검색하는 노드"""
+
+    def __init__(self, vector_db_path):
+        self.vectorstore, self.manifest = load_vectorstore(vector_db_path)
+        self.index = self.vectorstore.index
+        logging.info(f"인덱스 로드 완료: {vector_db_path} (벡터 {self.index.ntotal}개)")
+
+    def embed(self, queries):
+        vectors = self.vectorstore.embedding_function.embed_documents(queries)
+        return np.asarray(vectors, dtype="float32")
+
+    def search_vectors(self, vectors, k):
+        vectors = np.asarray(vectors, dtype="float32")
+        distances, ids = self.index.search(vectors, k)
+
+        results = []
+        for row_distances, row_ids in zip(distances, ids):
+            hits = []
+            for distance, idx in zip(row_distances, row_ids):
+                if idx < 0:
+                    continue
+                doc_id = self.vectorstore.index_to_docstore_id[int(idx)]
+                doc = self.vectorstore.docstore.search(doc_id)
+                hits.append(
+                    {
+                        "page_content": doc.page_content,
+                        "metadata": doc.metadata,
+                        "score": float(distance),
+                    }
+                )
+            results.append(hits)
+        return results
+
+    def search(self, queries, k):
+        return self.search_vectors(self.embed(queries), k)
+
+    def info(self):
+        return {"manifest": self.manifest, "num_vectors": int(self.index.ntotal), "shards": 1}
+
+
+class ShardRouter:
+    """질의를 한 번만 임베딩해서 모든 샤드에 보내고(scatter), 결과를 거리 기준으로 병합(gather)"""
+
+    def __init__(self, shard_addresses):
+        self.clients = [RetrievalClient(address) for address in shard_addresses]
+        infos = [client.info() for client in self.clients]
+
+        # 모든 샤드가 같은 임베딩 모델/차원으로 만들어졌는지 확인
+        manifests = [info.get("manifest") for info in infos]
+        keys = {
+            (m or {}).get("embedding_model", "openai-default")
+            + f"/{(m or {}).get('dimension')}"
+            for m in manifests
+        }
+        if len(keys) > 1:
+            raise RuntimeError(f"샤드 간 임베딩 모델이 다릅니다: {sorted(keys)}")
+
+        self.manifest = manifests[0]
+        self.num_vectors = sum(info["num_vectors"] for info in infos)
+        self.embeddings = make_embeddings_from_manifest(self.manifest)
+        self.pool = ThreadPoolExecutor(max_workers=len(self.clients))
+        logging.info(f"샤드 {len(self.clients)}개 연결 완료 (벡터 {self.num_vectors}개)")
+
+    def search_vectors(self, vectors, k):
+        futures = [
+            self.pool.submit(client.search_vectors, vectors, k) for client in self.clients
+        ]
+        shard_results = [future.result() for future in futures]
+
+        # 질의별로 각 샤드의 top-k를 모아 거리(L2)가 작은 순서로 k개 선택
+        return [
+            heapq.nsmallest(
+                k,
+                (hit for shard in shard_results for hit in shard[i]),
+                key=lambda hit: hit["score"],
+            )
+            for i in range(len(vectors))
+        ]
+
+    def search(self, queries, k):
+        vectors = self.embeddings.embed_documents(queries)
+        return self.search_vectors(vectors, k)
+
+    def info(self):
+        return {
+            "manifest": self.manifest,
+            "num_vectors": self.num_vectors,
+            "shards": len(self.clients),
+        }
+
+
+def make_handler(backend):
+    class RetrievalHandler(socketserver.BaseRequestHandler):
+        def handle(self):
+            while True:
+                try:
+                    request = recv_message(self.request)
+                except (ConnectionError, OSError):
+                    return
+
+                try:
+                    op = request.get("op")
+                    k = request.get("k", 4)
+                    if op == "search":
+                        response = {"results": backend.search(request["queries"], k)}
+                    elif op == "search_vectors":
+                        response = {"results": backend.search_vectors(request["vectors"], k)}
+                    elif op == "info":
+                        response = backend.info()
+                    else:
+                        response = {"error": f"알 수 없는 요청: {op}"}
+                except Exception as e:
+                    logging.error(f"검색 처리 중 오류 발생: {e}")
+                    response = {"error": str(e)}
+
+                send_message(self.request, response)
+
+    return RetrievalHandler
+
+
+def serve(backend, listen):
+    """'host:port' 또는 'unix:/path' 주소로 검색 서비스 실행"""
+    handler = make_handler(backend)
+
+    if listen.startswith("unix:"):
+        path = listen[len("unix:") :]
+        if os.path.exists(path):
+            os.remove(path)
+        server = socketserver.ThreadingUnixStreamServer(path, handler)
+    else:
+        host, port = listen.rsplit(":", 1)
+        socketserver.ThreadingTCPServer.allow_reuse_address = True
+        server = socketserver.ThreadingTCPServer((host, int(port)), handler)
+
+    server.daemon_threads = True
+    logging.info(f"검색 서비스 시작: {listen}")
+    server.serve_forever()
+
+
+def split_index(vector_db_path, num_shards, out_dir):
+    """
+    LangChain FAISS 인덱스를 num_shards개 샤드로 분할 저장 (샤드마다 manifest 복사)
+    """
+    index = faiss.read_index(os.path.join(vector_db_path, "index.faiss"))
+    with open(os.path.join(vector_db_path, "index.pkl"), "rb") as f:
+        docstore, index_to_docstore_id = pickle.load(f)
+    manifest = read_manifest(vector_db_path)
+
+    total = index.ntotal
+    vectors = index.reconstruct_n(0, total)
+    bounds = np.linspace(0, total, num_shards + 1, dtype=int)
+
+    for shard_no in range(num_shards):
+        start, end = int(bounds[shard_no]), int(bounds[shard_no + 1])
+        shard_path = os.path.join(out_dir, f"shard_{shard_no}")
+        os.makedirs(shard_path, exist_ok=True)
+
+        shard_index = faiss.IndexFlatL2(index.d)
+        shard_index.add(vectors[start:end])
+
+        doc_ids = [index_to_docstore_id[i] for i in range(start, end)]
+        shard_docstore = type(docstore)({doc_id: docstore.search(doc_id) for doc_id in doc_ids})
+        shard_mapping = dict(enumerate(doc_ids))
+
+        faiss.write_index(shard_index, os.path.join(shard_path, "index.faiss"))
+        with open(os.path.join(shard_path, "index.pkl"), "wb") as f:
+            pickle.dump((shard_docstore, shard_mapping), f)
+
+        if manifest is not None:
+            shard_manifest = {**manifest, "num_vectors": end - start, "shard": f"{shard_no}/{num_shards}"}
+            with open(os.path.join(shard_path, "manifest.json"), "w", encoding="utf-8") as f:
+                json.dump(shard_manifest, f, ensure_ascii=False, indent=2)
+
+        logging.info(f"샤드 {shard_no} 저장 완료: {shard_path} (벡터 {end - start}개)")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="독립 검색 서비스")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    serve_parser = sub.add_parser("serve", help="인덱스(샤드) 하나를 소유하는 검색 서버")
+    serve_parser.add_argument("--index", required=True, help="벡터 DB 폴더")
+    serve_parser.add_argument("--listen", default="127.0.0.1:7010", help="'host:port' 또는 'unix:/path'")
+
+    router_parser = sub.add_parser("router", help="샤드 서버 scatter-gather 라우터")
+    router_parser.add_argument("--shard", action="append", required=True, help="샤드 서버 주소")
+    router_parser.add_argument("--listen", default="127.0.0.1:7010", help="'host:port' 또는 'unix:/path'")
+
+    split_parser = sub.add_parser("split", help="인덱스를 샤드로 분할")
+    split_parser.add_argument("--index", required=True, help="원본 벡터 DB 폴더")
+    split_parser.add_argument("--num-shards", type=int, required=True, help="샤드 수")
+    split_parser.add_argument("--out", required=True, help="샤드 저장 폴더")
+
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+
+    if args.command == "serve":
+        serve(ShardSearcher(args.index), args.listen)
+    elif args.command == "router":
+        serve(ShardRouter(args.shard), args.listen)
+    elif args.command == "split":
+        split_index(args.index, args.num_shards, args.out)
@@ -0,0 +1,154 @@
+"""
+# 긴 대화 일기 요약 벤치마크 (단일 프롬프트 vs 분할 요약)
+
+같은 대화를 두 방식으로 요약해서 지연 시간과 토큰 수 비교
+- single: 전체 대화를 한 프롬프트로 요약 (기존 방식)
+- map-reduce: SUMMARY_CHUNK_TOKENS 단위로 나눠 병렬 요약 후 메모를 합쳐 일기 생성
+
+사용법 (be/ 디렉토리에서 실행):
+    python tools/summary_bench.py --synthetic-turns 400 --repeat 3
+    python tools/summary_bench.py --chatroom-id <채팅방 ID>
+    # 오프라인: OPENAI_BASE_URL=http://127.0.0.1:8089/v1 (tools/fake_openai_server.py)
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+import statistics
+
+from openai import OpenAI
+
+# be/ 디렉토리를 import 경로에 추가
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.services.diary_summary_service import (  # noqa: E402
+    SUMMARY_COMPLETION_PARAMS,
+    build_conversation_text,
+    build_long_summary_prompt,
+    build_summary_messages,
+    build_summary_prompt,
+    count_tokens,
+)
+
+USER_LINES = [
+    "오늘 학교에서 친구랑 싸웠어. 내가 먼저 말을 심하게 한 것 같기도 하고...",
+    "시험이 다음 주인데 공부가 하나도 안 돼서 너무 불안해",
+    "엄마가 내 얘기를 끝까지 안 듣고 혼내기만 해서 속상했어",
+    "동아리 발표를 잘해서 선생님한테 칭찬받았어! 진짜 뿌듯했어",
+    "단톡방에서 나만 빼고 얘기하는 것 같아서 신경 쓰여",
+    "요즘 잠을 잘 못 자서 하루 종일 피곤해",
+]
+BOT_LINES = [
+    "진짜? 그런 일이 있었구나... 그때 기분이 어땠어?",
+    "그거 완전 속상했겠다 😢 조금 더 얘기해줄 수 있어?",
+    "우와 대박! 나도 같이 기분 좋아진다 😄 어떤 발표였어?",
+    "그런 생각이 들면 마음이 복잡하지... 요즘 제일 신경 쓰이는 건 뭐야?",
+]
+
+
+def synthetic_chats(turns, seed):
+    rng = random.Random(seed)
+    return [
+        {"user_message": rng.choice(USER_LINES), "bot_response": rng.choice(BOT_LINES)}
+        for _ in range(turns)
+    ]
+
+
+def load_chats(chatroom_id):
+    from app import create_app
+    from app.services.message_store import load_messages
+
+    app = create_app()
+    with app.app_context():
+        chats = load_messages(chatroom_id)
+    if not chats:
+        raise SystemExit(f"채팅방을 찾을 수 없습니다: {chatroom_id}")
+    return chats
+
+
+def add_usage(totals, usage):
+    if usage is None:
+        return
+    totals["prompt"] += usage.prompt_tokens or 0
+    totals["completion"] += usage.completion_tokens or 0
+
+
+def run_single(client, chats):
+    totals = {"prompt": 0, "completion": 0, "calls": 1}
+    prompt = build_summary_prompt(build_conversation_text(chats))
+    response = client.chat.completions.create(
+        messages=build_summary_messages(prompt), **SUMMARY_COMPLETION_PARAMS
+    )
+    add_usage(totals, response.usage)
+    return totals
+
+
+def run_map_reduce(client, chats):
+    prompt, usages = build_long_summary_prompt(client, chats)
+    totals = {"prompt": 0, "completion": 0, "calls": len(usages) + 1}
+    for usage in usages:
+        add_usage(totals, usage)
+    response = client.chat.completions.create(
+        messages=build_summary_messages(prompt), **SUMMARY_COMPLETION_PARAMS
+    )
+    add_usage(totals, response.usage)
+    totals["final_prompt"] = response.usage.prompt_tokens if response.usage else 0
+    return totals
+
+
+def measure(name, fn, client, chats, repeat):
+    latencies, totals = [], None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        try:
+            totals = fn(client, chats)
+        except Exception as e:
+            print(f"{name}: 실패 ({type(e).__name__}: {e})")
+            return None
+        latencies.append(time.perf_counter() - start)
+
+    result = {
+        "latency_mean": statistics.mean(latencies),
+        "latency_max": max(latencies),
+        **totals,
+    }
+    print(
+        f"{name:<11} 평균 {result['latency_mean']:6.2f}s  최대 {result['latency_max']:6.2f}s  "
+        f"호출 {result['calls']:>3}회  입력 {result['prompt']:>7} tok  출력 {result['completion']:>5} tok"
+        + (f"  최종 프롬프트 {result['final_prompt']} tok" if "final_prompt" in result else "")
+    )
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="긴 대화 일기 요약 벤치마크")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--synthetic-turns", type=int, help="가상 대화 턴 수")
+    source.add_argument("--chatroom-id", help="MongoDB 채팅방 ID")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    chats = (
+        synthetic_chats(args.synthetic_turns, args.seed)
+        if args.synthetic_turns
+        else load_chats(args.chatroom_id)
+    )
+    print(f"대화 {len(chats)}턴, {count_tokens(build_conversation_text(chats))} 토큰\n")
+
+    client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"), max_retries=2)
+    single = measure("single", run_single, client, chats, args.repeat)
+    chunked = measure("map-reduce", run_map_reduce, client, chats, args.repeat)
+
+    if single and chunked:
+        print(
+            f"\n지연 시간 감소율 {1 - chunked['latency_mean'] / single['latency_mean']:.1%}, "
+            f"최종 요약 입력 토큰 {single['prompt']} → {chunked['final_prompt']}, "
+            f"전체 입력 토큰 {single['prompt']} → {chunked['prompt']}"
+        )
+
+
+if __name__ == "__main__":
+    main()
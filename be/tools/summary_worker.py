@@ -0,0 +1,80 @@
+"""
+# 일기 요약 작업 워커
+
+summary_jobs 컬렉션에서 작업을 임대해 요약 생성 + 일기 저장
+웹 서버와 같은 .env를 사용하고, 여러 프로세스/노드에서 동시에 실행해도 됨
+
+사용법 (be/ 디렉토리에서 실행):
+    python tools/summary_worker.py --concurrency 4
+    python tools/summary_worker.py --once   # 대기 중인 작업만 처리하고 종료
+"""
+
+import os
+import sys
+import time
+import signal
+import argparse
+import logging
+import threading
+
+# be/ 디렉토리를 import 경로에 추가
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app import create_app  # noqa: E402
+from app.database import mongo  # noqa: E402
+from app.database.indexes import ensure_indexes  # noqa: E402
+from app.services.summary_job_service import default_worker_id, process_next_job  # noqa: E402
+from config.settings import ActiveConfig  # noqa: E402
+
+
+def run_worker(app, worker_id, stop_event, once=False):
+    with app.app_context():
+        while not stop_event.is_set():
+            try:
+                processed = process_next_job(worker_id)
+            except Exception as e:
+                logging.error(f"[ERROR] 작업 가져오기 실패 ({worker_id}): {e}")
+                processed = False
+
+            if not processed:
+                if once:
+                    return
+                stop_event.wait(ActiveConfig.SUMMARY_JOB_POLL_INTERVAL)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="일기 요약 작업 워커")
+    parser.add_argument("--concurrency", type=int, default=2, help="동시에 처리할 작업 수")
+    parser.add_argument("--once", action="store_true", help="대기 중인 작업이 없으면 종료")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    app = create_app()
+    with app.app_context():
+        ensure_indexes(mongo.db, ["summary_jobs"])
+
+    stop_event = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stop_event.set())
+    signal.signal(signal.SIGINT, lambda *_: stop_event.set())
+
+    base_id = default_worker_id()
+    threads = [
+        threading.Thread(
+            target=run_worker,
+            args=(app, f"{base_id}:{i}", stop_event, args.once),
+            name=f"summary-worker-{i}",
+        )
+        for i in range(args.concurrency)
+    ]
+    for thread in threads:
+        thread.start()
+    print(f"요약 작업 워커 시작: {base_id} (동시 처리 {args.concurrency}개)")
+
+    # 메인 스레드는 신호를 받을 수 있도록 대기
+    while any(thread.is_alive() for thread in threads):
+        time.sleep(0.5)
+    print("요약 작업 워커 종료")
+
+
+if __name__ == "__main__":
+    main()
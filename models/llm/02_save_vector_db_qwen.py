@@ -1,11 +1,18 @@
 import os
+import json
 import faiss
 import pickle
 import time
 from langchain_community.document_loaders.csv_loader import CSVLoader
 from langchain_community.vectorstores import FAISS
 from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain_huggingface import HuggingFaceEmbeddings
+from vector_db_builder import (
+    DEFAULT_EMBEDDING_MODEL,
+    make_embeddings,
+    save_langchain_index,
+    splits_digest,
+    write_manifest,
+)
 
 # 현재 스크립트 파일 기준으로 BASE_DIR 설정
 BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
@@ -13,8 +20,10 @@ BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
 # 파일 경로 설정
 csv_file_path = os.path.normpath(os.path.join(BASE_DIR, "data", "total_kor_counsel_bot_clean.csv"))
 vector_db_path = os.path.normpath(os.path.join(BASE_DIR, "data", "db", "faiss"))
-index_qwen_faiss = os.path.join(vector_db_path, "index_qwen.faiss")
-index_qwen_pkl = os.path.join(vector_db_path, "index_qwen.pkl")
+index_build_faiss = os.path.join(vector_db_path, "index_build.faiss")
+index_build_pkl = os.path.join(vector_db_path, "index_build.pkl")
+# 중간 저장 파일을 만든 빌드 설정 (같을 때만 이어서 진행)
+index_build_info = os.path.join(vector_db_path, "index_build.json")
 
 # CSV 파일 로드
 loader = CSVLoader(file_path=csv_file_path, encoding="utf-8")
@@ -26,19 +35,36 @@ text_splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=10
 splits = text_splitter.split_documents(data)
 print(f"데이터 분할 완료: 총 {len(splits)}개의 청크 생성됨.")
 
-# Qwen2.5-3B 모델에 맞는 임베딩 (768차원)
-qwen_embeddings = HuggingFaceEmbeddings(model_name="Qwen/Qwen2.5-3B-Instruct")
+# 전용 문장 임베딩 모델 사용 (3B 생성 모델 대신, manifest에 모델/차원 기록)
+embeddings = make_embeddings(DEFAULT_EMBEDDING_MODEL)
 
 # 배치 설정
 batch_size = 2000  
 num_batches = len(splits) // batch_size + (1 if len(splits) % batch_size != 0 else 0)
 
-# 기존 벡터 DB가 있으면 로드
-if os.path.exists(index_qwen_faiss) and os.path.exists(index_qwen_pkl):
+build_info = {
+    "embedding_model": DEFAULT_EMBEDDING_MODEL,
+    "batch_size": batch_size,
+    "chunk_size": 1000,
+    "chunk_overlap": 100,
+    "splits_sha256": splits_digest(splits),
+}
+
+
+def can_resume():
+    """중간 저장 파일이 같은 모델/데이터/설정으로 만들어졌는지 확인"""
+    if not all(os.path.exists(path) for path in (index_build_faiss, index_build_pkl, index_build_info)):
+        return False
+    with open(index_build_info, encoding="utf-8") as f:
+        return json.load(f) == build_info
+
+
+# 같은 설정으로 빌드하던 중간 파일이 있으면 로드 (다른 모델로 만든 인덱스는 이어 쓰지 않음)
+if can_resume():
     print("기존 벡터 DB 발견, 로드 중...")
-    index = faiss.read_index(index_qwen_faiss)
+    index = faiss.read_index(index_build_faiss)
     
-    with open(index_qwen_pkl, "rb") as f:
+    with open(index_build_pkl, "rb") as f:
         stored_metadata = pickle.load(f)
 
     # 진행한 배치 개수 확인
@@ -46,6 +72,9 @@ if os.path.exists(index_qwen_faiss) and os.path.exists(index_qwen_pkl):
     print(f"이전 진행 상태 감지: {completed_batches}/{num_batches} 배치 완료됨.")
 else:
     print("새로운 벡터 DB 생성 시작...")
+    os.makedirs(vector_db_path, exist_ok=True)
+    with open(index_build_info, "w", encoding="utf-8") as f:
+        json.dump(build_info, f, ensure_ascii=False, indent=2)
     index = None
     stored_metadata = []
     completed_batches = 0
@@ -56,7 +85,7 @@ for i in range(completed_batches, num_batches):
     print(f"\n배치 {i+1}/{num_batches} - {len(batch)}개 청크 벡터화 중...")
 
     start_time = time.time()  
-    vectorstore = FAISS.from_documents(documents=batch, embedding=qwen_embeddings)
+    vectorstore = FAISS.from_documents(documents=batch, embedding=embeddings)
     end_time = time.time()
     print(f"벡터화 완료 (소요 시간: {end_time - start_time:.2f}초)")
 
@@ -70,22 +99,33 @@ for i in range(completed_batches, num_batches):
     stored_metadata.extend([doc.metadata for doc in batch])
 
     # 중간 저장 (중단 후 이어서 진행 가능)
-    faiss.write_index(index, index_qwen_faiss)
-    with open(index_qwen_pkl, "wb") as f:
+    faiss.write_index(index, index_build_faiss)
+    with open(index_build_pkl, "wb") as f:
         pickle.dump(stored_metadata, f)
 
-    print(f"중간 저장 완료: {index_qwen_faiss}, {index_qwen_pkl}")
+    print(f"중간 저장 완료: {index_build_faiss}, {index_build_pkl}")
 
 # 최종 벡터 DB 저장
-faiss.write_index(index, index_qwen_faiss)
-with open(index_qwen_pkl, "wb") as f:
+faiss.write_index(index, index_build_faiss)
+with open(index_build_pkl, "wb") as f:
     pickle.dump(stored_metadata, f)
 
-print(f"\n최종 벡터 DB 저장 완료: {index_qwen_faiss}, {index_qwen_pkl}")
+# 로더(FAISS.load_local)가 읽는 형식으로 저장 + 임베딩 모델/차원 manifest 기록
+save_langchain_index(index, splits, vector_db_path)
+write_manifest(
+    vector_db_path,
+    DEFAULT_EMBEDDING_MODEL,
+    index.d,
+    index.ntotal,
+    chunk_size=1000,
+    chunk_overlap=100,
+)
+
+print(f"\n최종 벡터 DB 저장 완료: {index_build_faiss}, {index_build_pkl}")
 
 # 저장된 벡터 DB의 차원 확인
-if os.path.exists(index_qwen_faiss):
-    index = faiss.read_index(index_qwen_faiss)
+if os.path.exists(index_build_faiss):
+    index = faiss.read_index(index_build_faiss)
     print(f"FAISS 벡터 차원: {index.d}")  
 else:
-    print(f"FAISS 인덱스 파일을 찾을 수 없습니다: {index_qwen_faiss}")
+    print(f"FAISS 인덱스 파일을 찾을 수 없습니다: {index_build_faiss}")
@@ -0,0 +1,37 @@
+# python models/llm/02_save_vector_db_streaming.py --workers 4
+# 대용량 상담 CSV를 행 단위로 읽어 분할/임베딩/기록하는 스트리밍 빌드 모드 (메모리 사용량 일정)
+
+import argparse
+
+from vector_db_builder import (
+    DEFAULT_CSV_PATH,
+    DEFAULT_EMBEDDING_MODEL,
+    DEFAULT_VECTOR_DB_PATH,
+    build_index_streaming,
+)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="FAISS 벡터 DB 스트리밍 빌드")
+    parser.add_argument("--csv", default=DEFAULT_CSV_PATH, help="상담 데이터 CSV 경로")
+    parser.add_argument("--out", default=DEFAULT_VECTOR_DB_PATH, help="벡터 DB 저장 폴더")
+    parser.add_argument("--model", default=DEFAULT_EMBEDDING_MODEL, help="임베딩 모델")
+    parser.add_argument("--workers", type=int, default=1, help="워커 프로세스 수")
+    parser.add_argument("--batch-size", type=int, default=2000, help="배치당 청크 수")
+    parser.add_argument("--chunk-size", type=int, default=1000, help="청크 크기")
+    parser.add_argument("--chunk-overlap", type=int, default=100, help="청크 간 중첩 크기")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+
+    build_index_streaming(
+        csv_file_path=args.csv,
+        model_name=args.model,
+        vector_db_path=args.out,
+        batch_size=args.batch_size,
+        workers=args.workers,
+        chunk_size=args.chunk_size,
+        chunk_overlap=args.chunk_overlap,
+    )
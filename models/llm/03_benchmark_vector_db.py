@@ -0,0 +1,232 @@
+# python models/llm/03_benchmark_vector_db.py --rows 2000 --queries 200
+# 임베딩 모델 / 청크 크기 / FAISS 인덱스 종류별 검색 품질·지연시간 벤치마크 (오프라인)
+#
+# - 상담 CSV 앞부분 고정 구간으로 작은 인덱스를 구성
+# - 질의는 인덱스에 넣지 않은 행에서 만듦 (held-out, seed 고정)
+#   여러 턴으로 이어진 상담(input 첫 줄이 같은 행)의 마지막 턴을 인덱스에서 빼고,
+#   그 턴의 마지막 사용자 발화를 질의로, 같은 상담의 나머지 턴을 정답 사례로 사용
+# - --query-file로 직접 만든 질의 세트를 쓰면 CSV 구간 전체를 인덱스에 넣음
+# - 설정별 recall@k, MRR, 검색 지연시간 p50/p99, 인덱스 크기, 빌드 시간 출력
+
+import argparse
+import json
+import math
+import random
+import time
+from itertools import islice
+
+import faiss
+import numpy as np
+from langchain.text_splitter import RecursiveCharacterTextSplitter
+
+from vector_db_builder import DEFAULT_CSV_PATH, iter_csv_documents, make_embeddings
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="벡터 DB 검색 벤치마크")
+    parser.add_argument("--csv", default=DEFAULT_CSV_PATH, help="상담 데이터 CSV 경로")
+    parser.add_argument("--rows", type=int, default=2000, help="인덱스에 넣을 CSV 행 수")
+    parser.add_argument("--queries", type=int, default=200, help="질의 수")
+    parser.add_argument(
+        "--query-file",
+        default=None,
+        help='직접 만든 질의 세트 (JSONL: {"query": ..., "relevant_rows": [...]})',
+    )
+    parser.add_argument("--k", type=int, default=5, help="recall@k의 k")
+    parser.add_argument(
+        "--embeddings",
+        default="hashing:512",
+        help="provider:model 목록 (쉼표 구분, 예: hashing:512,huggingface:jhgan/ko-sroberta-multitask)",
+    )
+    parser.add_argument(
+        "--chunks", default="1000/100,500/50", help="chunk_size/overlap 목록 (쉼표 구분)"
+    )
+    parser.add_argument("--index-types", default="flat,hnsw,ivf", help="FAISS 인덱스 종류")
+    parser.add_argument("--seed", type=int, default=42, help="질의 샘플링 seed")
+    parser.add_argument("--out", default=None, help="결과 JSON 저장 경로")
+    return parser.parse_args()
+
+
+def load_rows(csv_file_path, rows):
+    """CSV 앞부분 rows개 행을 Document로 로드"""
+    return list(islice(iter_csv_documents(csv_file_path), rows))
+
+
+def input_text(doc):
+    """Document의 input 컬럼 내용 (여러 줄일 수 있음)"""
+    text = doc.page_content.split("\noutput:", 1)[0]
+    return text[len("input:") :].strip() if text.startswith("input:") else text.strip()
+
+
+def split_held_out(docs, num_queries, seed):
+    """
+    인덱스용 행과 held-out 질의 세트로 분리
+
+    :return: (인덱스에 넣을 Document 리스트, [{"query", "relevant_rows"}])
+    """
+    # input 첫 줄이 같은 행 = 같은 상담의 턴 (이후 턴의 input에 이전 대화가 누적됨)
+    conversations = {}
+    for doc in docs:
+        lines = [line.strip() for line in input_text(doc).split("\n") if line.strip()]
+        if lines:
+            conversations.setdefault(lines[0], []).append(doc)
+
+    candidates = [turns for turns in conversations.values() if len(turns) >= 2]
+    rng = random.Random(seed)
+    sampled = rng.sample(candidates, min(num_queries, len(candidates)))
+
+    # 마지막 턴은 이후 턴이 없으므로 그 발화가 다른 행에 포함되지 않음
+    held_out = {max(turns, key=lambda d: d.metadata["row"]).metadata["row"]: turns for turns in sampled}
+    index_docs = [doc for doc in docs if doc.metadata["row"] not in held_out]
+
+    query_set = []
+    for row, turns in held_out.items():
+        source = next(doc for doc in turns if doc.metadata["row"] == row)
+        query = input_text(source).split("\n")[-1].strip()
+        # 질의 문장이 인덱스 문서에 그대로 들어 있으면 held-out이 아니므로 제외
+        if not query or any(query in doc.page_content for doc in index_docs):
+            continue
+        query_set.append(
+            {
+                "query": query,
+                "relevant_rows": [doc.metadata["row"] for doc in turns if doc.metadata["row"] != row],
+            }
+        )
+
+    if len(query_set) < num_queries:
+        print(
+            f"여러 턴 상담이 부족해 질의 {len(query_set)}개만 생성했습니다. "
+            "(--rows를 늘리거나 --query-file 사용)"
+        )
+    return index_docs, query_set
+
+
+def load_query_set(args, docs):
+    """
+    질의 세트 로드 (파일이 없으면 고정 seed로 held-out 질의 생성)
+
+    :return: (인덱스에 넣을 Document 리스트, 질의 세트)
+    """
+    if args.query_file:
+        with open(args.query_file, encoding="utf-8") as f:
+            return docs, [json.loads(line) for line in f if line.strip()]
+    return split_held_out(docs, args.queries, args.seed)
+
+
+def build_faiss_index(index_type, vectors):
+    """인덱스 종류별 FAISS 인덱스 생성"""
+    d = vectors.shape[1]
+    if index_type == "flat":
+        index = faiss.IndexFlatL2(d)
+    elif index_type == "hnsw":
+        index = faiss.IndexHNSWFlat(d, 32)
+    elif index_type == "ivf":
+        nlist = max(1, min(100, int(math.sqrt(len(vectors)))))
+        index = faiss.IndexIVFFlat(faiss.IndexFlatL2(d), d, nlist, faiss.METRIC_L2)
+        index.train(vectors)
+        index.nprobe = min(8, nlist)
+    else:
+        raise ValueError(f"지원하지 않는 인덱스 종류: {index_type}")
+    index.add(vectors)
+    return index
+
+
+def evaluate(index, chunk_rows, query_vectors, query_set, k):
+    """recall@k, MRR, 검색 지연시간 측정 (질의 1건씩 검색)"""
+    hits, reciprocal_ranks, latencies = 0, 0.0, []
+
+    for vector, item in zip(query_vectors, query_set):
+        start = time.perf_counter()
+        _, ids = index.search(vector.reshape(1, -1), k * 3)
+        latencies.append((time.perf_counter() - start) * 1000)
+
+        # 같은 행의 청크가 여러 개 검색될 수 있으므로 행 단위로 중복 제거
+        ranked_rows = []
+        for idx in ids[0]:
+            if idx < 0:
+                continue
+            row = chunk_rows[idx]
+            if row not in ranked_rows:
+                ranked_rows.append(row)
+            if len(ranked_rows) == k:
+                break
+
+        relevant = set(item["relevant_rows"])
+        for rank, row in enumerate(ranked_rows, start=1):
+            if row in relevant:
+                hits += 1
+                reciprocal_ranks += 1.0 / rank
+                break
+
+    n = len(query_set)
+    return {
+        f"recall@{k}": hits / n,
+        "mrr": reciprocal_ranks / n,
+        "p50_ms": float(np.percentile(latencies, 50)),
+        "p99_ms": float(np.percentile(latencies, 99)),
+    }
+
+
+def run_benchmark(args):
+    docs, query_set = load_query_set(args, load_rows(args.csv, args.rows))
+    if not query_set:
+        raise SystemExit("질의 세트가 비어 있습니다.")
+    print(f"{len(docs)}개 행, {len(query_set)}개 질의로 벤치마크 시작")
+
+    results = []
+    for spec in args.embeddings.split(","):
+        provider, model_name = spec.split(":", 1)
+        embeddings = make_embeddings(model_name, provider)
+        query_vectors = np.asarray(
+            embeddings.embed_documents([item["query"] for item in query_set]),
+            dtype="float32",
+        )
+
+        for chunk_spec in args.chunks.split(","):
+            chunk_size, chunk_overlap = (int(v) for v in chunk_spec.split("/"))
+            splitter = RecursiveCharacterTextSplitter(
+                chunk_size=chunk_size, chunk_overlap=chunk_overlap
+            )
+            splits = splitter.split_documents(docs)
+            chunk_rows = [doc.metadata["row"] for doc in splits]
+
+            embed_start = time.perf_counter()
+            vectors = np.asarray(
+                embeddings.embed_documents([doc.page_content for doc in splits]),
+                dtype="float32",
+            )
+            embed_seconds = time.perf_counter() - embed_start
+
+            for index_type in args.index_types.split(","):
+                build_start = time.perf_counter()
+                index = build_faiss_index(index_type, vectors)
+                build_seconds = time.perf_counter() - build_start
+
+                result = {
+                    "embedding": spec,
+                    "chunk": chunk_spec,
+                    "index": index_type,
+                    "chunks": len(splits),
+                    "embed_s": embed_seconds,
+                    "build_s": build_seconds,
+                    "index_mb": faiss.serialize_index(index).nbytes / 1024 / 1024,
+                    **evaluate(index, chunk_rows, query_vectors, query_set, args.k),
+                }
+                results.append(result)
+                print(
+                    f"{spec:<40} {chunk_spec:>9} {index_type:>5} | "
+                    f"recall@{args.k} {result[f'recall@{args.k}']:.3f}  MRR {result['mrr']:.3f}  "
+                    f"p50 {result['p50_ms']:.3f}ms  p99 {result['p99_ms']:.3f}ms  "
+                    f"size {result['index_mb']:.2f}MB  "
+                    f"build {result['embed_s'] + result['build_s']:.2f}s"
+                )
+
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"결과 저장 완료: {args.out}")
+    return results
+
+
+if __name__ == "__main__":
+    run_benchmark(parse_args())
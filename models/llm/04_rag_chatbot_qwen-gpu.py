@@ -4,11 +4,10 @@ import torch
 import faiss
 from langchain.chains import ConversationalRetrievalChain
 from langchain.memory import ConversationBufferMemory
-from langchain_community.vectorstores import FAISS
 from langchain_core.prompts import PromptTemplate
 from transformers import AutoModelForCausalLM, AutoTokenizer, pipeline
 from langchain_huggingface import HuggingFacePipeline
-from langchain_huggingface import HuggingFaceEmbeddings  # ✅ OpenAIEmbeddings() 대신 사용
+from vector_db_builder import load_vectorstore  # manifest에 기록된 임베딩 모델로 로드
 
 # 현재 스크립트 파일이 있는 디렉토리를 기준으로 BASE_DIR 설정
 BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
@@ -55,8 +54,10 @@ hf_pipeline = pipeline(
 # LangChain의 HuggingFacePipeline으로 감싸기
 llm = HuggingFacePipeline(pipeline=hf_pipeline)
 
-# FAISS 벡터 DB 로드 (HuggingFaceEmbeddings 사용)
-vectorstore = FAISS.load_local(vector_db_path, HuggingFaceEmbeddings(), allow_dangerous_deserialization=True)
+# 인덱스를 만든 임베딩 모델과 같은 모델로 질의를 임베딩 (불일치 시 로드 거부)
+vectorstore = load_vectorstore(
+    vector_db_path, device="cuda" if torch.cuda.is_available() else "cpu"
+)
 
 # cpu 사용 시 아래 코드 주석
 # FAISS 벡터 DB를 GPU로 변환 (GPU 사용 가능할 경우)
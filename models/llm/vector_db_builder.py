@@ -0,0 +1,643 @@
+"""
+# 벡터 DB 빌드 공통 모듈
+
+CSV 상담 데이터 로드 및 청크 분할
+프로세스 풀 기반 병렬 임베딩 (워커당 임베딩 모델 1개)
+.npy 샤드 병합 후 LangChain 형식(index.faiss / index.pkl)으로 저장
+임베딩 모델/차원을 manifest.json에 기록하고, 로드 시 불일치 검사
+대용량 CSV 스트리밍 수집 (행 단위로 읽고 분할/임베딩하여 샤드로 바로 기록)
+"""
+
+import os
+import csv
+import json
+import time
+import uuid
+import zlib
+import pickle
+import shutil
+import hashlib
+from datetime import datetime
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, as_completed, wait
+
+import faiss
+import numpy as np
+from langchain_community.document_loaders.csv_loader import CSVLoader
+from langchain_community.docstore.in_memory import InMemoryDocstore
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain.text_splitter import RecursiveCharacterTextSplitter
+
+# 현재 스크립트 파일 기준으로 BASE_DIR 설정
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+
+DEFAULT_CSV_PATH = os.path.normpath(
+    os.path.join(BASE_DIR, "data", "total_kor_counsel_bot_clean.csv")
+)
+DEFAULT_VECTOR_DB_PATH = os.path.normpath(os.path.join(BASE_DIR, "data", "db", "faiss"))
+
+# 문서/질의 임베딩 전용 경량 문장 임베딩 모델 (768차원, 한국어 지원)
+# 3B 생성 모델(Qwen2.5-3B-Instruct)로 임베딩하는 것보다 훨씬 빠르고 메모리가 적음
+DEFAULT_EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "jhgan/ko-sroberta-multitask")
+DEFAULT_EMBEDDING_PROVIDER = os.getenv("EMBEDDING_PROVIDER", "huggingface")
+
+MANIFEST_FILE = "manifest.json"
+# 샤드를 만든 빌드 설정 (다른 설정으로 만든 샤드는 재사용하지 않음)
+SHARD_MANIFEST_FILE = "shards.json"
+
+# 워커 프로세스마다 한 번만 로드되는 임베딩 모델
+_worker_embeddings = None
+
+
+def load_splits(csv_file_path=DEFAULT_CSV_PATH, chunk_size=1000, chunk_overlap=100):
+    """
+    CSV 상담 데이터를 로드하고 청크 단위로 분할
+
+    :param csv_file_path: 상담 데이터 CSV 경로
+    :param chunk_size: 청크 크기
+    :param chunk_overlap: 청크 간 중첩 크기
+    :return: 분할된 Document 리스트
+    """
+    loader = CSVLoader(file_path=csv_file_path, encoding="utf-8")
+    data = loader.load()
+    print(f"{len(data)}개의 상담 데이터 로드 완료.")
+
+    text_splitter = RecursiveCharacterTextSplitter(
+        chunk_size=chunk_size, chunk_overlap=chunk_overlap
+    )
+    splits = text_splitter.split_documents(data)
+    print(f"데이터 분할 완료: 총 {len(splits)}개의 청크 생성됨.")
+    return splits
+
+
+class HashingEmbeddings(Embeddings):
+    """
+    문자 n-gram 해싱 기반 결정적 로컬 임베딩 (네트워크/모델 다운로드 없음)
+
+    벤치마크·테스트용. 같은 입력이면 항상 같은 벡터를 반환
+    """
+
+    def __init__(self, dimension=512, ngram_range=(2, 3)):
+        self.dimension = dimension
+        self.ngram_range = ngram_range
+
+    def _embed(self, text):
+        vector = np.zeros(self.dimension, dtype="float32")
+        normalized = " ".join(text.lower().split())
+        for n in range(self.ngram_range[0], self.ngram_range[1] + 1):
+            for i in range(len(normalized) - n + 1):
+                h = zlib.crc32(normalized[i : i + n].encode("utf-8"))
+                vector[h % self.dimension] += 1.0 if (h >> 31) & 1 else -1.0
+        norm = np.linalg.norm(vector)
+        return (vector / norm if norm else vector).tolist()
+
+    def embed_documents(self, texts):
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text):
+        return self._embed(text)
+
+
+def make_embeddings(
+    model_name=DEFAULT_EMBEDDING_MODEL, provider=DEFAULT_EMBEDDING_PROVIDER, device="cpu"
+):
+    """
+    임베딩 모델 생성
+
+    :param model_name: 임베딩 모델 이름 (hashing이면 차원, 예: '512')
+    :param provider: 'huggingface' (로컬 문장 임베딩 모델), 'openai' 또는 'hashing'
+    :param device: HuggingFace 모델 실행 장치 ('cpu', 'cuda')
+    """
+    if provider == "hashing":
+        return HashingEmbeddings(dimension=int(model_name))
+
+    if provider == "openai":
+        from langchain_openai import OpenAIEmbeddings
+
+        return OpenAIEmbeddings(model=model_name)
+
+    from langchain_huggingface import HuggingFaceEmbeddings
+
+    # 정규화된 벡터의 L2 거리 순위 = 코사인 유사도 순위
+    return HuggingFaceEmbeddings(
+        model_name=model_name,
+        model_kwargs={"device": device},
+        encode_kwargs={"normalize_embeddings": True},
+    )
+
+
+def write_manifest(
+    vector_db_path,
+    model_name,
+    dimension,
+    num_vectors,
+    provider=DEFAULT_EMBEDDING_PROVIDER,
+    **extra,
+):
+    """
+    인덱스를 만든 임베딩 모델과 차원을 manifest.json에 기록
+
+    :param vector_db_path: 벡터 DB 폴더
+    :param model_name: 임베딩 모델 이름
+    :param dimension: 벡터 차원
+    :param num_vectors: 저장된 벡터 수
+    :param provider: 임베딩 제공자
+    :param extra: 청크 크기 등 추가 빌드 정보
+    """
+    manifest = {
+        "embedding_provider": provider,
+        "embedding_model": model_name,
+        "dimension": int(dimension),
+        "normalize": provider == "huggingface",
+        "num_vectors": int(num_vectors),
+        "created_at": datetime.now().isoformat(),
+        **extra,
+    }
+    with open(os.path.join(vector_db_path, MANIFEST_FILE), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    return manifest
+
+
+def read_manifest(vector_db_path):
+    """manifest.json 로드 (없으면 None)"""
+    manifest_path = os.path.join(vector_db_path, MANIFEST_FILE)
+    if not os.path.exists(manifest_path):
+        return None
+    with open(manifest_path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def load_vectorstore(
+    vector_db_path=DEFAULT_VECTOR_DB_PATH, embeddings=None, model_name=None, device="cpu"
+):
+    """
+    manifest를 확인한 뒤 FAISS 벡터 DB 로드
+
+    - embeddings/model_name을 지정하지 않으면 manifest에 기록된 모델로 임베딩을 생성 (자동 맞춤)
+    - model_name이 manifest와 다르거나, 임베딩 차원이 인덱스와 다르면 로드 거부
+
+    :param vector_db_path: 벡터 DB 폴더
+    :param embeddings: 사용할 임베딩 객체 (선택)
+    :param model_name: 사용할 임베딩 모델 이름 (선택)
+    :param device: HuggingFace 모델 실행 장치
+    :return: FAISS 벡터스토어
+    """
+    from langchain_community.vectorstores import FAISS
+
+    manifest = read_manifest(vector_db_path)
+    if manifest is None:
+        raise ValueError(
+            f"manifest.json이 없습니다: {vector_db_path} "
+            "(임베딩 모델을 알 수 없으므로 인덱스를 다시 빌드하세요.)"
+        )
+
+    if model_name and model_name != manifest["embedding_model"]:
+        raise ValueError(
+            f"임베딩 모델 불일치: 인덱스={manifest['embedding_model']}, 요청={model_name}"
+        )
+
+    if embeddings is None:
+        embeddings = make_embeddings(
+            manifest["embedding_model"], manifest.get("embedding_provider", "huggingface"), device
+        )
+    else:
+        query_dim = len(embeddings.embed_query("차원 확인"))
+        if query_dim != manifest["dimension"]:
+            raise ValueError(
+                f"임베딩 차원 불일치: 인덱스={manifest['dimension']}, 질의={query_dim}"
+            )
+
+    vectorstore = FAISS.load_local(
+        vector_db_path, embeddings, allow_dangerous_deserialization=True
+    )
+    if vectorstore.index.d != manifest["dimension"]:
+        raise ValueError(
+            f"인덱스 차원({vectorstore.index.d})이 manifest({manifest['dimension']})와 다릅니다."
+        )
+
+    print(f"벡터 DB 로드 완료: {manifest['embedding_model']} ({manifest['dimension']}차원)")
+    return vectorstore
+
+
+def _init_worker(model_name, num_threads):
+    """워커 프로세스 초기화: 임베딩 모델 로드 및 스레드 수 제한"""
+    global _worker_embeddings
+
+    # 워커끼리 코어를 나눠 쓰도록 torch 내부 스레드 수 제한 (과다 구독 방지)
+    try:
+        import torch
+
+        torch.set_num_threads(num_threads)
+    except ImportError:
+        pass
+
+    _worker_embeddings = make_embeddings(model_name)
+
+
+def _embed_batch(batch_idx, texts, shard_path):
+    """
+    워커에서 배치 하나를 임베딩하여 .npy 샤드로 저장
+
+    :return: (배치 번호, 샤드 경로, 벡터 개수, 소요 시간)
+    """
+    start_time = time.time()
+    vectors = np.asarray(_worker_embeddings.embed_documents(texts), dtype="float32")
+
+    # 쓰는 도중 중단되면 다음 실행에서 재사용되지 않도록 임시 파일 후 교체
+    tmp_path = f"{shard_path}.tmp.npy"
+    np.save(tmp_path, vectors)
+    os.replace(tmp_path, shard_path)
+
+    return batch_idx, shard_path, len(vectors), time.time() - start_time
+
+
+def splits_digest(splits):
+    """청크 본문/메타데이터 해시 (CSV 내용이나 청크 설정이 바뀌면 달라짐)"""
+    digest = hashlib.sha256()
+    for doc in splits:
+        digest.update(doc.page_content.encode("utf-8"))
+        digest.update(json.dumps(doc.metadata, sort_keys=True, default=str).encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def csv_source_info(csv_file_path):
+    """CSV 경로와 수정 시각/크기 (샤드 재사용 판단용)"""
+    stat = os.stat(csv_file_path)
+    return {
+        "csv_path": os.path.abspath(csv_file_path),
+        "csv_mtime": stat.st_mtime,
+        "csv_size": stat.st_size,
+    }
+
+
+def prepare_shard_dir(vector_db_path, build_info):
+    """
+    샤드 폴더 준비
+
+    기존 샤드의 빌드 정보(임베딩 모델, 원본 데이터, 배치/청크 설정)가 build_info와 다르면
+    이전 벡터가 새 인덱스에 섞이지 않도록 샤드를 모두 삭제하고 새로 시작
+
+    :return: 샤드 폴더 경로
+    """
+    shard_dir = os.path.join(vector_db_path, "shards")
+    manifest_path = os.path.join(shard_dir, SHARD_MANIFEST_FILE)
+    # JSON으로 저장했다 읽은 값과 비교하기 위해 같은 변환을 거침
+    build_info = json.loads(json.dumps(build_info, default=str))
+
+    previous = None
+    if os.path.exists(manifest_path):
+        with open(manifest_path, encoding="utf-8") as f:
+            previous = json.load(f)
+
+    if previous != build_info and os.path.isdir(shard_dir):
+        if os.listdir(shard_dir):
+            print("빌드 설정 또는 원본 데이터가 바뀌어 기존 샤드를 삭제합니다.")
+        shutil.rmtree(shard_dir)
+
+    os.makedirs(shard_dir, exist_ok=True)
+    with open(manifest_path, "w", encoding="utf-8") as f:
+        json.dump(build_info, f, ensure_ascii=False, indent=2)
+    return shard_dir
+
+
+def save_langchain_index(index, documents, vector_db_path):
+    """
+    FAISS 인덱스와 문서를 LangChain FAISS.load_local 형식으로 저장
+
+    :param index: faiss 인덱스 (documents와 같은 순서로 벡터 추가됨)
+    :param documents: Document 리스트
+    :param vector_db_path: 저장 폴더
+    """
+    os.makedirs(vector_db_path, exist_ok=True)
+
+    ids = [str(uuid.uuid4()) for _ in documents]
+    docstore = InMemoryDocstore(dict(zip(ids, documents)))
+    index_to_docstore_id = dict(enumerate(ids))
+
+    faiss.write_index(index, os.path.join(vector_db_path, "index.faiss"))
+    with open(os.path.join(vector_db_path, "index.pkl"), "wb") as f:
+        pickle.dump((docstore, index_to_docstore_id), f)
+
+
+def build_index_parallel(
+    splits,
+    model_name=DEFAULT_EMBEDDING_MODEL,
+    vector_db_path=DEFAULT_VECTOR_DB_PATH,
+    batch_size=2000,
+    workers=None,
+    build_info=None,
+):
+    """
+    청크 배치를 프로세스 풀로 분산 임베딩한 뒤, 배치 순서대로 하나의 인덱스로 병합
+
+    - 워커마다 임베딩 모델을 한 번만 로드 (initializer)
+    - 배치 결과는 vector_db_path/shards/*.npy 로 저장 → 중단 후 재실행 시 완료된 배치는 건너뜀
+      (모델, 배치 크기, 청크 내용이 같을 때만 재사용, 다르면 샤드를 지우고 새로 빌드)
+    - 완료 순서와 관계없이 배치 번호 순서대로 병합하므로 docstore 순서가 항상 일치
+
+    :param splits: 분할된 Document 리스트
+    :param model_name: HuggingFace 임베딩 모델 이름
+    :param vector_db_path: 저장 폴더
+    :param batch_size: 배치당 청크 수
+    :param workers: 워커 프로세스 수 (기본값: CPU 코어 수)
+    :param build_info: 샤드 재사용 판단에 함께 쓸 빌드 정보 (CSV 경로/수정 시각, 청크 설정 등)
+    :return: 병합된 faiss 인덱스
+    """
+    workers = workers or os.cpu_count() or 1
+    num_threads = max(1, (os.cpu_count() or 1) // workers)
+
+    shard_dir = prepare_shard_dir(
+        vector_db_path,
+        {
+            "mode": "parallel",
+            "embedding_provider": DEFAULT_EMBEDDING_PROVIDER,
+            "embedding_model": model_name,
+            "batch_size": batch_size,
+            "num_chunks": len(splits),
+            "splits_sha256": splits_digest(splits),
+            **(build_info or {}),
+        },
+    )
+
+    num_batches = (len(splits) + batch_size - 1) // batch_size
+    shard_paths = [
+        os.path.join(shard_dir, f"shard_{i:05d}.npy") for i in range(num_batches)
+    ]
+
+    pending = [i for i in range(num_batches) if not os.path.exists(shard_paths[i])]
+    completed = num_batches - len(pending)
+    if completed:
+        print(f"이전 진행 상태 감지: {completed}/{num_batches} 배치 완료됨.")
+
+    print(f"병렬 벡터화 시작: 워커 {workers}개, 워커당 스레드 {num_threads}개")
+    build_start = time.time()
+
+    index = None
+    next_to_merge = 0
+    done = set(i for i in range(num_batches) if i not in pending)
+
+    def merge_ready():
+        """앞 배치가 모두 끝난 샤드만 순서대로 인덱스에 추가"""
+        nonlocal index, next_to_merge
+        while next_to_merge in done:
+            vectors = np.load(shard_paths[next_to_merge])
+            if index is None:
+                index = faiss.IndexFlatL2(vectors.shape[1])
+            index.add(vectors)
+            next_to_merge += 1
+
+    merge_ready()
+
+    if pending:
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_worker,
+            initargs=(model_name, num_threads),
+        ) as executor:
+            futures = [
+                executor.submit(
+                    _embed_batch,
+                    i,
+                    [doc.page_content for doc in splits[i * batch_size : (i + 1) * batch_size]],
+                    shard_paths[i],
+                )
+                for i in pending
+            ]
+
+            for future in as_completed(futures):
+                batch_idx, _, count, elapsed = future.result()
+                done.add(batch_idx)
+                completed += 1
+
+                total_elapsed = time.time() - build_start
+                print(
+                    f"[{completed}/{num_batches}] 배치 {batch_idx + 1} 완료 "
+                    f"({count}개 청크, {elapsed:.2f}초 / 누적 {total_elapsed:.2f}초)"
+                )
+                merge_ready()
+
+    if index is None:
+        raise RuntimeError("임베딩할 청크가 없습니다.")
+
+    save_langchain_index(index, splits, vector_db_path)
+    write_manifest(
+        vector_db_path, model_name, index.d, index.ntotal, batch_size=batch_size, **(build_info or {})
+    )
+    print(
+        f"\n최종 벡터 DB 저장 완료: {vector_db_path} "
+        f"(벡터 {index.ntotal}개, 차원 {index.d}, 총 {time.time() - build_start:.2f}초)"
+    )
+    return index
+
+
+def iter_csv_documents(csv_file_path, encoding="utf-8"):
+    """
+    CSV를 한 행씩 읽어 CSVLoader와 같은 형식의 Document로 생성 (제너레이터)
+
+    - page_content: "컬럼: 값" 줄 목록
+    - metadata: {"source": CSV 경로, "row": 행 번호}
+    """
+    with open(csv_file_path, newline="", encoding=encoding) as f:
+        reader = csv.DictReader(f)
+        for row_num, row in enumerate(reader):
+            content = "\n".join(
+                f"{k.strip()}: {v.strip() if v is not None else ''}"
+                for k, v in row.items()
+                if k is not None
+            )
+            yield Document(
+                page_content=content,
+                metadata={"source": csv_file_path, "row": row_num},
+            )
+
+
+def iter_split_batches(
+    documents, batch_size=2000, chunk_size=1000, chunk_overlap=100, rows_per_split=500
+):
+    """
+    Document 스트림을 청크로 분할하며 batch_size개씩 묶어서 반환 (제너레이터)
+
+    전체 문서/청크 리스트를 만들지 않으므로 메모리 사용량은 배치 크기에만 비례
+    """
+    text_splitter = RecursiveCharacterTextSplitter(
+        chunk_size=chunk_size, chunk_overlap=chunk_overlap
+    )
+
+    rows, batch = [], []
+    for doc in documents:
+        rows.append(doc)
+        if len(rows) < rows_per_split:
+            continue
+        batch.extend(text_splitter.split_documents(rows))
+        rows = []
+        while len(batch) >= batch_size:
+            yield batch[:batch_size]
+            batch = batch[batch_size:]
+
+    if rows:
+        batch.extend(text_splitter.split_documents(rows))
+    while batch:
+        yield batch[:batch_size]
+        batch = batch[batch_size:]
+
+
+def assemble_index_from_shards(vector_db_path, num_batches, model_name, **manifest_extra):
+    """
+    .npy 샤드와 docs.jsonl을 순서대로 읽어 LangChain 형식 인덱스로 저장
+
+    샤드는 한 번에 하나씩만 읽어서 인덱스에 추가
+    """
+    shard_dir = os.path.join(vector_db_path, "shards")
+    index = None
+    for i in range(num_batches):
+        vectors = np.load(os.path.join(shard_dir, f"shard_{i:05d}.npy"))
+        if index is None:
+            index = faiss.IndexFlatL2(vectors.shape[1])
+        index.add(vectors)
+
+    if index is None:
+        raise RuntimeError("임베딩할 청크가 없습니다.")
+
+    docs = {}
+    index_to_docstore_id = {}
+    with open(os.path.join(vector_db_path, "docs.jsonl"), encoding="utf-8") as f:
+        for position, line in enumerate(f):
+            record = json.loads(line)
+            doc_id = str(uuid.uuid4())
+            docs[doc_id] = Document(
+                page_content=record["page_content"], metadata=record["metadata"]
+            )
+            index_to_docstore_id[position] = doc_id
+
+    if len(index_to_docstore_id) != index.ntotal:
+        raise RuntimeError(
+            f"문서 수({len(index_to_docstore_id)})와 벡터 수({index.ntotal})가 다릅니다."
+        )
+
+    faiss.write_index(index, os.path.join(vector_db_path, "index.faiss"))
+    with open(os.path.join(vector_db_path, "index.pkl"), "wb") as f:
+        pickle.dump((InMemoryDocstore(docs), index_to_docstore_id), f)
+    write_manifest(vector_db_path, model_name, index.d, index.ntotal, **manifest_extra)
+    return index
+
+
+def build_index_streaming(
+    csv_file_path=DEFAULT_CSV_PATH,
+    model_name=DEFAULT_EMBEDDING_MODEL,
+    vector_db_path=DEFAULT_VECTOR_DB_PATH,
+    batch_size=2000,
+    workers=1,
+    chunk_size=1000,
+    chunk_overlap=100,
+):
+    """
+    CSV를 스트리밍으로 읽어 분할/임베딩하고 벡터를 샤드로 바로 기록
+
+    - CSV 전체를 Document 리스트로 올리지 않음 (CSVLoader.load / split_documents 미사용)
+    - 청크 본문은 docs.jsonl에, 벡터는 shards/*.npy에 배치 단위로 즉시 기록
+    - workers > 1 이면 프로세스 풀 사용, 동시에 처리 중인 배치는 workers * 2개로 제한
+    - 이미 존재하는 샤드는 재사용 (중단 후 이어서 진행)
+      CSV 경로/수정 시각/크기, 모델, 배치/청크 설정이 같을 때만 재사용, 다르면 샤드를 지우고 새로 빌드
+
+    :return: 병합된 faiss 인덱스
+    """
+    source_info = csv_source_info(csv_file_path)
+    shard_dir = prepare_shard_dir(
+        vector_db_path,
+        {
+            "mode": "streaming",
+            "embedding_provider": DEFAULT_EMBEDDING_PROVIDER,
+            "embedding_model": model_name,
+            "batch_size": batch_size,
+            "chunk_size": chunk_size,
+            "chunk_overlap": chunk_overlap,
+            **source_info,
+        },
+    )
+
+    workers = max(1, workers or 1)
+    num_threads = max(1, (os.cpu_count() or 1) // workers)
+    max_in_flight = workers * 2
+
+    executor = None
+    if workers > 1:
+        executor = ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_worker,
+            initargs=(model_name, num_threads),
+        )
+    else:
+        _init_worker(model_name, num_threads)
+
+    print(f"스트리밍 벡터화 시작: 워커 {workers}개, 배치 {batch_size}개 청크")
+    build_start = time.time()
+    in_flight = set()
+    num_batches = 0
+    num_chunks = 0
+
+    def report(batch_idx, count, elapsed):
+        print(
+            f"배치 {batch_idx + 1} 완료 ({count}개 청크, {elapsed:.2f}초 / "
+            f"누적 {num_chunks}개 청크, {time.time() - build_start:.2f}초)"
+        )
+
+    try:
+        with open(os.path.join(vector_db_path, "docs.jsonl"), "w", encoding="utf-8") as docs_file:
+            batches = iter_split_batches(
+                iter_csv_documents(csv_file_path),
+                batch_size=batch_size,
+                chunk_size=chunk_size,
+                chunk_overlap=chunk_overlap,
+            )
+            for batch_idx, batch in enumerate(batches):
+                num_batches += 1
+                num_chunks += len(batch)
+                for doc in batch:
+                    docs_file.write(
+                        json.dumps(
+                            {"page_content": doc.page_content, "metadata": doc.metadata},
+                            ensure_ascii=False,
+                        )
+                        + "\n"
+                    )
+
+                shard_path = os.path.join(shard_dir, f"shard_{batch_idx:05d}.npy")
+                if os.path.exists(shard_path):
+                    continue
+
+                texts = [doc.page_content for doc in batch]
+                if executor is None:
+                    _, _, count, elapsed = _embed_batch(batch_idx, texts, shard_path)
+                    report(batch_idx, count, elapsed)
+                    continue
+
+                # 처리 중인 배치가 많으면 하나가 끝날 때까지 읽기를 멈춤 (메모리 상한)
+                while len(in_flight) >= max_in_flight:
+                    finished, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for future in finished:
+                        done_idx, _, count, elapsed = future.result()
+                        report(done_idx, count, elapsed)
+                in_flight.add(executor.submit(_embed_batch, batch_idx, texts, shard_path))
+
+        for future in as_completed(in_flight):
+            done_idx, _, count, elapsed = future.result()
+            report(done_idx, count, elapsed)
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    index = assemble_index_from_shards(
+        vector_db_path,
+        num_batches,
+        model_name,
+        batch_size=batch_size,
+        chunk_size=chunk_size,
+        chunk_overlap=chunk_overlap,
+        **source_info,
+    )
+    print(
+        f"\n최종 벡터 DB 저장 완료: {vector_db_path} "
+        f"(벡터 {index.ntotal}개, 차원 {index.d}, 총 {time.time() - build_start:.2f}초)"
+    )
+    return index